@@ -0,0 +1,331 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Throughput benchmark of the RL wrappers against the mock engine.
+
+Sweeps `RLEnv`, `ParallelRLEnv` and `MultiProcessRLEnv` over sensor configurations, numbers of maps shown per engine
+(`--n-show`) and numbers of engines (`--n-parallel`), and reports, for each run:
+- `steps_per_sec`: environment steps per second (a vectorized step counts as one step),
+- `bytes_per_step`: bytes sent and received through the sockets per step,
+- `retained_blocks_per_step` and `retained_bytes_per_step`: memory blocks (and their size) allocated during the steps
+  and still alive after them, from the difference of tracemalloc snapshots (leaks and growing caches),
+- `peak_allocated_bytes_per_step`: mean peak of the memory allocated during a step (temporary copies),
+- the p50/p95/p99 of each phase of the steps, see `RLEnv.stats`.
+
+The mock engine serves from separate processes, so only the python side of the pipeline is measured.
+
+Usage:
+    python benchmarks/benchmark_rl_envs.py --output results.jsonl
+    python benchmarks/benchmark_rl_envs.py --envs rl_env --sensors camera --steps 2000 --latency 0.001
+    python benchmarks/benchmark_rl_envs.py --sensors camera --compression xor_delta
+    python benchmarks/benchmark_rl_envs.py --envs multi_process_rl_env --n-show 1 4 16 --n-parallel 1 2 4
+"""
+import argparse
+import itertools
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import simulate as sm
+from simulate.engine.compression import COMPRESSION_MODES
+from simulate.engine.mock_engine import MockEngineServer
+from simulate.engine.transport import TcpTransport
+
+
+SENSORS = ["state", "raycast", "camera"]
+ENVS = ["rl_env", "parallel_rl_env", "multi_process_rl_env"]
+STARTING_PORT = 56001
+
+
+def create_map(sensor: str, index: int = 0) -> sm.Asset:
+    """Create a map with a single actor carrying the sensors of a configuration."""
+    root = sm.Box(name=f"map_{index}", position=[0, 0, 20 * index], bounds=[-5, 5, 0, 0.1, -5, 5])
+    if sensor == "camera":
+        actor = sm.EgocentricCameraActor(name=f"actor_{index}", camera_width=84, camera_height=84)
+    else:
+        actor = sm.SimpleActor(name=f"actor_{index}", position=[0, 0.5, 0])
+        if sensor == "state":
+            actor += sm.StateSensor(target_entity=root, properties=["position", "rotation", "distance"])
+        elif sensor == "raycast":
+            actor += sm.RaycastSensor(n_horizontal_rays=16, n_vertical_rays=4, horizontal_fov=120, vertical_fov=30)
+        else:
+            raise ValueError(f"Unknown sensor configuration {sensor}, should be one of {SENSORS}")
+    root += actor
+    return root
+
+
+def start_mock_engines(latency: float, n_engines: int = 1) -> int:
+    """
+    Start mock engines in separate processes, connecting to consecutive ports.
+
+    Returns:
+        port (`int`):
+            The port of the first mock engine.
+    """
+    port = TcpTransport.find_port_number(start_mock_engines.next_port)
+    while any(TcpTransport.find_port_number(port + i) != port + i for i in range(n_engines)):
+        port = TcpTransport.find_port_number(port + 1)
+    start_mock_engines.next_port = port + n_engines
+    for i in range(n_engines):
+        MockEngineServer(port=port + i, latency=latency).start(process=True)
+    return port
+
+
+start_mock_engines.next_port = STARTING_PORT
+
+
+def create_rl_env(sensor: str, latency: float, compression: Optional[str] = None) -> sm.RLEnv:
+    port = start_mock_engines(latency)
+    scene = sm.Scene(engine="unity", engine_exe=None, engine_port=port)
+    scene += create_map(sensor)
+    return sm.RLEnv(scene, sensor_compression=compression)
+
+
+def create_parallel_rl_env(
+    sensor: str,
+    latency: float,
+    compression: Optional[str] = None,
+    n_maps: int = 4,
+    n_show: int = 4,
+    port: Optional[int] = None,
+) -> sm.ParallelRLEnv:
+    if port is None:
+        port = start_mock_engines(latency)
+    return sm.ParallelRLEnv(
+        lambda index: create_map(sensor, index),
+        n_maps=n_maps,
+        n_show=n_show,
+        sensor_compression=compression,
+        engine_exe=None,
+        engine_port=port,
+    )
+
+
+def create_multi_process_rl_env(
+    sensor: str,
+    latency: float,
+    compression: Optional[str] = None,
+    n_parallel: int = 2,
+    n_maps: int = 4,
+    n_show: int = 4,
+) -> sm.MultiProcessRLEnv:
+    # The environments are created concurrently, the mock engines are started beforehand from the main thread
+    starting_port = start_mock_engines(latency, n_parallel)
+
+    def env_fn(port):
+        return create_parallel_rl_env(sensor, latency, compression, n_maps=n_maps, n_show=n_show, port=port)
+
+    return sm.MultiProcessRLEnv(env_fn, n_parallel=n_parallel, starting_port=starting_port)
+
+
+def get_engines(env: Any) -> List[sm.UnityEngine]:
+    envs = env.envs if isinstance(env, sm.MultiProcessRLEnv) else [env]
+    return [sub_env.scene.engine for sub_env in envs]
+
+
+def get_actions(env: Any, n_steps: int) -> List[Any]:
+    """Sample the actions before the benchmark, so sampling isn't measured."""
+    if isinstance(env, sm.RLEnv):
+        return [env.action_space.sample() for _ in range(n_steps)]
+    n_envs = env.num_envs if hasattr(env, "num_envs") else env.n_show
+    return [np.array([env.action_space.sample() for _ in range(n_envs)]) for _ in range(n_steps)]
+
+
+def benchmark(env: Any, n_steps: int, n_warmup_steps: int) -> Dict[str, Any]:
+    """
+    Step an environment and measure its throughput, message sizes and allocations.
+
+    Args:
+        env (`RLEnv`, `ParallelRLEnv` or `MultiProcessRLEnv`):
+            The environment to benchmark.
+        n_steps (`int`):
+            The number of measured steps.
+        n_warmup_steps (`int`):
+            The number of steps before measuring, e.g. to grow the receive buffers.
+
+    Returns:
+        results (`Dict[str, Any]`):
+            The measurements.
+    """
+    env.reset()
+    actions = get_actions(env, max(n_steps, n_warmup_steps))
+    for action in actions[:n_warmup_steps]:
+        env.step(action)
+
+    # Throughput and message sizes, without tracing the allocations which slows down the steps
+    engines = get_engines(env)
+    n_bytes = sum(engine.connection.bytes_sent + engine.connection.bytes_received for engine in engines)
+    env.enable_stats()
+    start = time.perf_counter()
+    for action in actions[:n_steps]:
+        env.step(action)
+    elapsed = time.perf_counter() - start
+    env.enable_stats(False)
+    n_bytes = sum(engine.connection.bytes_sent + engine.connection.bytes_received for engine in engines) - n_bytes
+
+    # Allocations
+    tracemalloc.start()
+    peaks = np.zeros(n_steps)  # Preallocated, so recording doesn't allocate
+    snapshot = tracemalloc.take_snapshot()
+    for i, action in enumerate(actions[:n_steps]):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        env.step(action)
+        peaks[i] = tracemalloc.get_traced_memory()[1] - current
+    # The memory allocated by the steps and not released, without the traces of tracemalloc itself
+    ignore_tracemalloc = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    retained = (
+        tracemalloc.take_snapshot()
+        .filter_traces(ignore_tracemalloc)
+        .compare_to(snapshot.filter_traces(ignore_tracemalloc), "traceback")
+    )
+    tracemalloc.stop()
+
+    stats = env.stats()
+    return {
+        "steps_per_sec": n_steps / elapsed,
+        "bytes_per_step": n_bytes / n_steps,
+        "retained_blocks_per_step": sum(diff.count_diff for diff in retained) / n_steps,
+        "retained_bytes_per_step": sum(diff.size_diff for diff in retained) / n_steps,
+        "peak_allocated_bytes_per_step": float(np.mean(peaks)),
+        "phases": {name: summary for name, summary in stats.items() if not name.startswith("bytes_")},
+    }
+
+
+ENV_FACTORIES: Dict[str, Callable] = {
+    "rl_env": create_rl_env,
+    "parallel_rl_env": create_parallel_rl_env,
+    "multi_process_rl_env": create_multi_process_rl_env,
+}
+
+
+def get_env_configs(
+    env_name: str, n_maps: Optional[List[int]], n_show: List[int], n_parallel: List[int]
+) -> List[Dict[str, int]]:
+    """
+    Get the sweep of the sizes of an environment.
+
+    Args:
+        env_name (`str`):
+            The environment, one of `ENVS`.
+        n_maps (`List[int]`, *optional*):
+            The numbers of maps of each engine, as many as the maps shown if not specified.
+        n_show (`List[int]`):
+            The numbers of maps shown by each engine, for `ParallelRLEnv` and `MultiProcessRLEnv`.
+        n_parallel (`List[int]`):
+            The numbers of engines, for `MultiProcessRLEnv`.
+
+    Returns:
+        configs (`List[Dict[str, int]]`):
+            The keyword arguments of the environment factory for each run, without the combinations showing more maps
+            than there are.
+    """
+    if env_name == "rl_env":
+        return [{}]
+    configs = []
+    for show, maps in itertools.product(n_show, n_maps or [None]):
+        maps = show if maps is None else maps
+        if maps < show:
+            continue
+        if env_name == "parallel_rl_env":
+            configs.append({"n_maps": maps, "n_show": show})
+        else:
+            configs.extend({"n_maps": maps, "n_show": show, "n_parallel": parallel} for parallel in n_parallel)
+    return configs
+
+
+def run(
+    envs: List[str],
+    sensors: List[str],
+    n_steps: int,
+    n_warmup_steps: int,
+    latency: float,
+    output: Optional[str],
+    compression: Optional[str] = None,
+    n_maps: Optional[List[int]] = None,
+    n_show: Optional[List[int]] = None,
+    n_parallel: Optional[List[int]] = None,
+) -> List[Dict[str, Any]]:
+    results = []
+    for env_name in envs:
+        for sensor in sensors:
+            for config in get_env_configs(env_name, n_maps, n_show or [4], n_parallel or [2]):
+                result = {
+                    "env": env_name,
+                    "sensor": sensor,
+                    **config,
+                    "n_steps": n_steps,
+                    "latency": latency,
+                    "compression": compression,
+                }
+                env = ENV_FACTORIES[env_name](sensor, latency, compression, **config)
+                try:
+                    result.update(benchmark(env, n_steps, n_warmup_steps))
+                finally:
+                    env.close()
+                results.append(result)
+                print(format_result(result))
+                if output is not None:
+                    with open(output, "a") as f:
+                        f.write(json.dumps(result) + "\n")
+    return results
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    config = " ".join(f"{key}={result[key]}" for key in ("n_maps", "n_show", "n_parallel") if key in result)
+    name = f"{result['env']:<22}{result['sensor']:<9}{config:<32}"
+    return (
+        f"{name}{result['steps_per_sec']:>10.1f} steps/s {result['bytes_per_step']:>10.0f} B/step "
+        f"{result['retained_blocks_per_step']:>7.2f} retained blocks/step "
+        f"{result['peak_allocated_bytes_per_step']:>10.0f} peak B/step"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark of the RL wrappers against the mock engine.")
+    parser.add_argument("--envs", nargs="+", choices=ENVS, default=ENVS)
+    parser.add_argument("--sensors", nargs="+", choices=SENSORS, default=SENSORS)
+    parser.add_argument("--steps", type=int, default=500, help="Number of measured steps.")
+    parser.add_argument("--warmup", type=int, default=50, help="Number of steps before measuring.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Compute time of the mock engine per step (s).")
+    parser.add_argument("--output", default=None, help="JSON lines file to append the results to.")
+    parser.add_argument("--compression", choices=COMPRESSION_MODES, default=None, help="Camera sensors compression.")
+    parser.add_argument(
+        "--n-maps", nargs="+", type=int, default=None, help="Numbers of maps per engine (default: as many as shown)."
+    )
+    parser.add_argument("--n-show", nargs="+", type=int, default=[4], help="Numbers of maps shown per engine.")
+    parser.add_argument("--n-parallel", nargs="+", type=int, default=[2], help="Numbers of engines (multi-process).")
+    args = parser.parse_args()
+
+    sm.logging.set_verbosity(sm.logging.WARNING)
+    run(
+        args.envs,
+        args.sensors,
+        args.steps,
+        args.warmup,
+        args.latency,
+        args.output,
+        args.compression,
+        n_maps=args.n_maps,
+        n_show=args.n_show,
+        n_parallel=args.n_parallel,
+    )
+
+
+if __name__ == "__main__":
+    main()
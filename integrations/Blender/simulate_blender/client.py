@@ -1,3 +1,4 @@
+import os
 import socket
 
 
@@ -5,11 +6,19 @@ class Client:
     def __init__(self):
         self.host = "127.0.0.1"
         self.port = 55001
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Set by the python API when using the unix transport
+        self.socket_path = os.environ.get("SIMULATE_SOCKET_PATH")
+        if self.socket_path:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._connect()
 
     def _connect(self):
-        self.socket.connect((self.host, self.port))
+        if self.socket_path:
+            self.socket.connect(self.socket_path)
+        else:
+            self.socket.connect((self.host, self.port))
 
     def listen(self, callback):
         chunk_size = 1024
@@ -0,0 +1,200 @@
+using System;
+using System.Collections.Generic;
+using System.Text;
+using Newtonsoft.Json;
+using Newtonsoft.Json.Linq;
+
+namespace Simulate {
+    /// <summary>
+    /// Binary tensor framing, mirrored by <c>simulate/engine/protocol.py</c> on the python side.
+    /// <para>Layout: "SIMB" | header length (uint32) | JSON header | padding | tensor payloads.</para>
+    /// <para>The JSON header holds the regular data under "data" and the tensor descriptions under "tensors".
+    /// Payloads are raw little-endian buffers aligned on 8 bytes.</para>
+    /// </summary>
+    public class BinaryFrame {
+        public static readonly byte[] MAGIC = Encoding.ASCII.GetBytes("SIMB");
+        public const int ALIGNMENT = 8;
+
+        public const string BINARY_RESPONSE = "binary_response";
+        public const string BINARY_ACTION = "binary_action";
+        public const string BINARY_SCENE = "binary_scene";
+
+        JObject data;
+        JArray descriptions;
+        List<(int offset, byte[] bytes)> payloads;
+        int payloadLength;
+
+        public BinaryFrame(JObject data = null) {
+            this.data = data ?? new JObject();
+            descriptions = new JArray();
+            payloads = new List<(int, byte[])>();
+            payloadLength = 0;
+        }
+
+        static int Aligned(int n) {
+            return (n + ALIGNMENT - 1) / ALIGNMENT * ALIGNMENT;
+        }
+
+        public void AddTensor(string[] path, string dtype, int[] shape, byte[] bytes) {
+            descriptions.Add(new JObject {
+                { "path", new JArray(path) },
+                { "dtype", dtype },
+                { "shape", new JArray(shape) },
+                { "offset", payloadLength },
+                { "nbytes", bytes.Length }
+            });
+            payloads.Add((payloadLength, bytes));
+            payloadLength = Aligned(payloadLength + bytes.Length);
+        }
+
+        /// <summary>
+        /// Add a tensor whose images were compressed separately, see <c>SensorCompression</c>.
+        /// </summary>
+        public void AddCompressedTensor(string[] path, string dtype, int[] shape, string compression, byte[][] chunks) {
+            int nbytes = 0;
+            foreach (byte[] chunk in chunks)
+                nbytes += chunk.Length;
+            byte[] bytes = new byte[nbytes];
+            int offset = 0;
+            foreach (byte[] chunk in chunks) {
+                System.Buffer.BlockCopy(chunk, 0, bytes, offset, chunk.Length);
+                offset += chunk.Length;
+            }
+            descriptions.Add(new JObject {
+                { "path", new JArray(path) },
+                { "dtype", dtype },
+                { "shape", new JArray(shape) },
+                { "offset", payloadLength },
+                { "nbytes", nbytes },
+                { "compression", compression },
+                { "chunks", new JArray(Array.ConvertAll(chunks, chunk => chunk.Length)) }
+            });
+            payloads.Add((payloadLength, bytes));
+            payloadLength = Aligned(payloadLength + nbytes);
+        }
+
+        /// <summary>
+        /// Add a buffer, in its dtype (e.g. floats sent as float16 or quantized to uint8).
+        /// </summary>
+        public void AddBuffer(string[] path, Buffer buffer, string compression = null) {
+            if (buffer.type != "float" && buffer.type != "uint8")
+                throw new ArgumentException("Unknown buffer type " + buffer.type);
+            byte[] bytes = buffer.ToBytes();
+            if (compression != null) {
+                byte[][] chunks = SensorCompression.Compress(path[path.Length - 1], compression, bytes, buffer.shape);
+                AddCompressedTensor(path, buffer.dtype, buffer.shape, compression, chunks);
+            } else {
+                AddTensor(path, buffer.dtype, buffer.shape, bytes);
+            }
+        }
+
+        public void AddFrame(string[] path, uint[,,] frame) {
+            int[] shape = { frame.GetLength(0), frame.GetLength(1), frame.GetLength(2) };
+            byte[] bytes = new byte[frame.Length];
+            int i = 0;
+            foreach (uint value in frame)
+                bytes[i++] = (byte)value;
+            AddTensor(path, "uint8", shape, bytes);
+        }
+
+        public byte[] ToBytes() {
+            JObject jo = new JObject {
+                { "data", data },
+                { "tensors", descriptions }
+            };
+            byte[] header = Encoding.UTF8.GetBytes(jo.ToString(Formatting.None));
+            int headerEnd = MAGIC.Length + 4 + header.Length;
+            int payloadStart = Aligned(headerEnd);
+            int paddedHeaderLength = payloadStart - MAGIC.Length - 4;
+
+            byte[] frame = new byte[payloadStart + payloadLength];
+            System.Buffer.BlockCopy(MAGIC, 0, frame, 0, MAGIC.Length);
+            System.Buffer.BlockCopy(BitConverter.GetBytes(paddedHeaderLength), 0, frame, MAGIC.Length, 4);
+            System.Buffer.BlockCopy(header, 0, frame, MAGIC.Length + 4, header.Length);
+            // Pad the header with spaces (valid JSON whitespace) so the payloads start on an aligned offset
+            for (int i = headerEnd; i < payloadStart; i++)
+                frame[i] = (byte)' ';
+            foreach (var payload in payloads)
+                System.Buffer.BlockCopy(payload.bytes, 0, frame, payloadStart + payload.offset, payload.bytes.Length);
+            return frame;
+        }
+
+        public static bool IsBinaryFrame(byte[] frame) {
+            if (frame.Length < MAGIC.Length + 4)
+                return false;
+            for (int i = 0; i < MAGIC.Length; i++) {
+                if (frame[i] != MAGIC[i])
+                    return false;
+            }
+            return true;
+        }
+
+        /// <summary>
+        /// Parse a binary frame received from the python API.
+        /// <para>Tensors are returned separately, keyed by their path. Paths of length 2 are grouped
+        /// in a dictionary, e.g. ["action", "actuator"] is returned as tensors["action"]["actuator"].</para>
+        /// </summary>
+        public static JObject Parse(byte[] frame, out Dictionary<string, object> tensors) {
+            int headerLength = BitConverter.ToInt32(frame, MAGIC.Length);
+            int payloadStart = MAGIC.Length + 4 + headerLength;
+            JObject header = JObject.Parse(Encoding.UTF8.GetString(frame, MAGIC.Length + 4, headerLength));
+
+            tensors = new Dictionary<string, object>();
+            foreach (JObject description in header["tensors"] ?? new JArray()) {
+                string[] path = description["path"].ToObject<string[]>();
+                Tensor tensor = new Tensor(
+                    description["dtype"].ToObject<string>(),
+                    description["shape"].ToObject<int[]>(),
+                    frame,
+                    payloadStart + description["offset"].ToObject<int>(),
+                    description["nbytes"].ToObject<int>()
+                );
+                if (path.Length == 1) {
+                    tensors[path[0]] = tensor;
+                } else if (path.Length == 2) {
+                    if (!tensors.TryGetValue(path[0], out object group))
+                        tensors[path[0]] = group = new Dictionary<string, Tensor>();
+                    ((Dictionary<string, Tensor>)group)[path[1]] = tensor;
+                } else {
+                    throw new ArgumentException("Unsupported tensor path " + string.Join("/", path));
+                }
+            }
+            return header["data"] as JObject ?? new JObject();
+        }
+
+        /// <summary>
+        /// Serialize the event data, sending buffers and camera frames as raw tensors.
+        /// <para>The uint8 sensor buffers are compressed as configured at initialization, unless <c>compress</c>
+        /// is false (e.g. for stacked rollout buffers, which aren't part of the XOR delta sequence).</para>
+        /// </summary>
+        public static byte[] FromEventData(EventData eventData, object requestId = null, bool compress = true) {
+            compress &= Client.HasProtocolFeature(SensorCompression.COMPRESSION);
+            JObject data = new JObject();
+            if (requestId != null && Client.HasProtocolFeature(Client.REQUEST_ID))
+                data.Add(Client.REQUEST_ID, JToken.FromObject(requestId));
+            data.Add("nodes", JObject.FromObject(eventData.nodes));
+            data.Add("frames", new JObject());
+            BinaryFrame frame = new BinaryFrame(data);
+            foreach (KeyValuePair<string, uint[,,]> cameraFrame in eventData.frames)
+                frame.AddFrame(new string[] { "frames", cameraFrame.Key }, cameraFrame.Value);
+            foreach (KeyValuePair<string, object> kwarg in eventData.outputKwargs) {
+                if (kwarg.Value is Buffer buffer) {
+                    frame.AddBuffer(new string[] { kwarg.Key }, buffer);
+                } else if (kwarg.Value is Dictionary<string, Buffer> buffers) {
+                    foreach (KeyValuePair<string, Buffer> subBuffer in buffers) {
+                        string compression = null;
+                        // Only camera images are compressed, not the floats quantized to uint8
+                        if (compress && subBuffer.Value.type == "uint8" && subBuffer.Value.dtype == Buffer.UINT8)
+                            SensorCompression.TryGetMode(subBuffer.Key, out compression);
+                        frame.AddBuffer(new string[] { kwarg.Key, subBuffer.Key }, subBuffer.Value, compression);
+                    }
+                } else if (kwarg.Value is NodeDeltas nodeDeltas) {
+                    nodeDeltas.AddTo(frame, data);
+                } else {
+                    data.Add(kwarg.Key, JToken.FromObject(kwarg.Value));
+                }
+            }
+            return frame.ToBytes();
+        }
+    }
+}
@@ -13,13 +13,26 @@ namespace Simulate {
     public class Client : Singleton<Client> {
         public static string host;
         public static int port;
+        public static string socketPath;
         private static bool isOpen = false;
 
-        static TcpClient _client;
-        static TcpClient client {
+        static Socket _socket;
+        static NetworkStream _stream;
+        static NetworkStream stream {
             get {
-                _client ??= new TcpClient(host, port);
-                return _client;
+                if(_stream == null) {
+                    if(!string.IsNullOrEmpty(socketPath)) {
+                        _socket = new Socket(AddressFamily.Unix, SocketType.Stream, ProtocolType.Unspecified);
+                        _socket.Connect(new UnixDomainSocketEndPoint(socketPath));
+                    } else {
+                        _socket = new Socket(SocketType.Stream, ProtocolType.Tcp);
+                        // The length prefix and the message are written separately, don't wait for an ACK in between
+                        _socket.NoDelay = true;
+                        _socket.Connect(host, port);
+                    }
+                    _stream = new NetworkStream(_socket, true);
+                }
+                return _stream;
             }
         }
 
@@ -33,12 +46,46 @@ namespace Simulate {
 
         static Coroutine listenCoroutine;
 
+        // Commands are queued and executed one after the other, so the python API can pipeline requests
+        static Queue<(JObject, Dictionary<string, object>)> commandQueue = new Queue<(JObject, Dictionary<string, object>)>();
+        static bool commandRunning;
+
+        public const string REQUEST_ID = "request_id";
+
+        static readonly HashSet<string> supportedProtocolFeatures = new HashSet<string> {
+            BinaryFrame.BINARY_RESPONSE,
+            BinaryFrame.BINARY_ACTION,
+            BinaryFrame.BINARY_SCENE,
+            REQUEST_ID,
+            SensorCompression.COMPRESSION,
+            RlAgents.ObservationRing.SHARED_MEMORY,
+            RlAgents.Reset.RESET_OBSERVATIONS
+        };
+        static HashSet<string> protocolFeatures = new HashSet<string>();
+
+        /// <summary>
+        /// Enable the protocol features requested by the python API which are supported by this build.
+        /// </summary>
+        /// <returns>The list of enabled features.</returns>
+        public static List<string> EnableProtocolFeatures(List<string> requested) {
+            protocolFeatures.Clear();
+            if (requested != null)
+                protocolFeatures.UnionWith(requested.Where(feature => supportedProtocolFeatures.Contains(feature)));
+            return protocolFeatures.ToList();
+        }
+
+        public static bool HasProtocolFeature(string feature) {
+            return protocolFeatures.Contains(feature);
+        }
+
         /// <summary>
         /// Connect to server and begin listening for commands.
+        /// <para>Connects to the Unix domain socket at socketPath if given, and over TCP otherwise.</para>
         /// </summary>
-        public static void Initialize(string host = "localhost", int port = 55001) {
+        public static void Initialize(string host = "localhost", int port = 55001, string socketPath = null) {
             Client.host = host;
             Client.port = port;
+            Client.socketPath = socketPath;
             LoadCommands();
             isOpen = true;
             if(listenCoroutine == null)
@@ -60,39 +107,60 @@ namespace Simulate {
         }
 
         private static IEnumerator ListenCoroutine() {
-            int chunkSize = 1024;
-            byte[] buffer = new byte[chunkSize];
+            byte[] lengthBuffer = new byte[4];
             while(isOpen) {
-                NetworkStream stream = client.GetStream();
-                if(stream.DataAvailable) {
-                    byte[] lengthBuffer = new byte[4];
-                    stream.Read(lengthBuffer, 0, 4);
+                while(stream.DataAvailable) {
+                    ReadExactly(lengthBuffer, 4);
 
                     int messageLength = BitConverter.ToInt32(lengthBuffer, 0);
                     byte[] data = new byte[messageLength];
-                    int dataReceived = 0;
-
-                    while(dataReceived < messageLength)
-                        dataReceived += stream.Read(data, dataReceived, Math.Min(chunkSize, messageLength - dataReceived));
+                    // Large messages (e.g. the glTF scene) are read in as few calls as the stream allows
+                    int dataReceived = ReadExactly(data, messageLength);
 
                     Debug.Assert(dataReceived == messageLength);
-                    string json = Encoding.ASCII.GetString(data, 0, messageLength);
-                    TryExecuteCommand(json);
+                    if(BinaryFrame.IsBinaryFrame(data)) {
+                        JObject jObject = BinaryFrame.Parse(data, out Dictionary<string, object> tensors);
+                        commandQueue.Enqueue((jObject, tensors));
+                    } else {
+                        string json = Encoding.ASCII.GetString(data, 0, messageLength);
+                        commandQueue.Enqueue((JObject.Parse(json), null));
+                    }
+                }
+                while(!commandRunning && commandQueue.Count > 0) {
+                    var (jObject, tensors) = commandQueue.Dequeue();
+                    TryExecuteCommand(jObject, tensors);
                 }
                 yield return null;
             }
         }
 
+        static int ReadExactly(byte[] buffer, int count) {
+            int received = 0;
+            while(received < count) {
+                int n = stream.Read(buffer, received, count - received);
+                if(n == 0)
+                    throw new System.IO.EndOfStreamException("Connection closed by the server");
+                received += n;
+            }
+            return received;
+        }
+
         /// <summary>
         /// Write a message back to the server.
         /// </summary>
         /// <param name="message"></param>
         public static void WriteMessage(string message) {
-            if(client == null || !isOpen) return;
+            WriteMessage(Encoding.ASCII.GetBytes(message));
+        }
+
+        /// <summary>
+        /// Write a raw message (e.g. a binary frame) back to the server.
+        /// </summary>
+        /// <param name="buffer"></param>
+        public static void WriteMessage(byte[] buffer) {
+            if(!isOpen) return;
             try {
-                NetworkStream stream = client.GetStream();
                 if(stream.CanWrite) {
-                    byte[] buffer = Encoding.ASCII.GetBytes(message);
                     byte[] lengthBytes = BitConverter.GetBytes(buffer.Length);
                     Debug.Assert(lengthBytes.Length == 4);
                     stream.Write(lengthBytes, 0, 4);
@@ -108,12 +176,14 @@ namespace Simulate {
         /// </summary>
         public static void Close() {
             isOpen = false;
-            if(client != null && client.Connected)
-                client.Close();
+            commandQueue.Clear();
+            commandRunning = false;
+            _stream?.Close();
+            _stream = null;
+            _socket = null;
         }
 
-        private static void TryExecuteCommand(string json) {
-            JObject jObject = JObject.Parse(json);
+        private static void TryExecuteCommand(JObject jObject, Dictionary<string, object> tensors = null) {
             Dictionary<string, JToken> tokens = jObject.Properties()
                 .ToDictionary(x => x.Name, x => x.Value);
             if(!tokens.TryGetValue("type", out JToken type)) {
@@ -141,13 +211,41 @@ namespace Simulate {
             // Populate class with kwargs
             JsonConvert.PopulateObject(JsonConvert.SerializeObject(kwargs), command);
 
+            // Tensors are passed as is, they don't go through JSON serialization
+            if(tensors != null) {
+                foreach(KeyValuePair<string, object> tensor in tensors)
+                    kwargs[tensor.Key] = tensor.Value;
+            }
+
             // Try to execute the command
+            // Commands which write their response themselves (e.g. as a binary frame) call back with null
+            kwargs.TryGetValue(REQUEST_ID, out object requestId);
+            commandRunning = true;
             try {
-                command.Execute(kwargs, result => WriteMessage(result));
+                command.Execute(kwargs, result => {
+                    if(result != null)
+                        WriteMessage(WithRequestId(result, requestId));
+                    commandRunning = false;
+                });
             } catch(System.Exception e) {
                 Debug.LogWarning(e.ToString());
                 WriteMessage(e.ToString());
+                commandRunning = false;
             }
         }
+
+        /// <summary>
+        /// Add the id of the request to a JSON object response, so the python API can match pipelined responses.
+        /// </summary>
+        static string WithRequestId(string result, object requestId) {
+            if(requestId == null || !HasProtocolFeature(REQUEST_ID))
+                return result;
+            string trimmed = result.TrimStart();
+            if(!trimmed.StartsWith("{"))
+                return result;
+            string rest = trimmed.Substring(1).TrimStart();
+            string separator = rest.StartsWith("}") ? "" : ",";
+            return "{\"" + REQUEST_ID + "\":" + JsonConvert.SerializeObject(requestId) + separator + rest;
+        }
     }
 }
\ No newline at end of file
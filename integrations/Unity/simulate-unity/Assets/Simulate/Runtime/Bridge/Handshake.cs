@@ -0,0 +1,20 @@
+using System.Collections.Generic;
+using Newtonsoft.Json;
+using UnityEngine.Events;
+
+namespace Simulate {
+    /// <summary>
+    /// Negotiate the protocol features with the python API, before the scene is sent.
+    /// </summary>
+    public class Handshake : ICommand {
+        public List<string> protocol_features;
+
+        public void Execute(Dictionary<string, object> kwargs, UnityAction<string> callback) {
+            List<string> enabledFeatures = Client.EnableProtocolFeatures(protocol_features);
+            protocol_features = null;
+            callback(JsonConvert.SerializeObject(new Dictionary<string, object> {
+                { "protocol_features", enabledFeatures }
+            }));
+        }
+    }
+}
@@ -1,4 +1,5 @@
 using System.Collections.Generic;
+using Newtonsoft.Json;
 using UnityEngine;
 using UnityEngine.Events;
 
@@ -12,14 +13,24 @@ namespace Simulate {
 
         async void ExecuteAsync(Dictionary<string, object> kwargs, UnityAction<string> callback) {
             try {
-                await Simulator.Initialize(b64bytes, kwargs);
+                SensorCompression.Configure(kwargs);
+                // The scene is sent as a raw tensor with binary framing, and base64 encoded otherwise
+                if (kwargs.TryGetValue("glb", out object glb) && glb is Tensor tensor)
+                    await Simulator.Initialize(tensor.ToBytes(), kwargs);
+                else
+                    await Simulator.Initialize(b64bytes, kwargs);
             } catch (System.Exception e) {
                 string error = "Failed to build scene from GLTF: " + e.ToString();
                 Debug.LogError(error);
                 callback(error);
                 return;
+            } finally {
+                b64bytes = null;
             }
-            callback("{}");
+            Dictionary<string, object> response = new Dictionary<string, object>();
+            if (RlAgents.RLPlugin.sharedMemoryLayout != null)
+                response.Add("shared_memory", RlAgents.RLPlugin.sharedMemoryLayout);
+            callback(JsonConvert.SerializeObject(response));
         }
     }
-}
\ No newline at end of file
+}
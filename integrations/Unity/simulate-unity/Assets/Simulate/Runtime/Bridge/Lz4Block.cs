@@ -0,0 +1,84 @@
+using System;
+
+namespace Simulate {
+    /// <summary>
+    /// Minimal encoder of the LZ4 block format, decompressed with lz4.block.decompress in python.
+    /// <para>Greedy matching on a hash table of 4-byte sequences, favoring speed over ratio.</para>
+    /// </summary>
+    public static class Lz4Block {
+        const int MIN_MATCH = 4;
+        // The last match must start 12 bytes before the end of the block, and the last 5 bytes are literals
+        const int MF_LIMIT = 12;
+        const int LAST_LITERALS = 5;
+        const int HASH_LOG = 12;
+        const int MAX_OFFSET = 65535;
+
+        public static byte[] Compress(byte[] src, int offset, int count) {
+            byte[] dst = new byte[count + count / 255 + 16];
+            int dstPos = 0;
+            int end = offset + count;
+            int matchLimit = end - LAST_LITERALS;
+            int mfLimit = end - MF_LIMIT;
+            int anchor = offset;
+            int pos = offset;
+
+            int[] table = new int[1 << HASH_LOG];
+            for (int i = 0; i < table.Length; i++)
+                table[i] = -1;
+
+            while (pos < mfLimit) {
+                uint sequence = BitConverter.ToUInt32(src, pos);
+                int hash = (int)((sequence * 2654435761u) >> (32 - HASH_LOG));
+                int candidate = table[hash];
+                table[hash] = pos;
+                if (candidate < 0 || pos - candidate > MAX_OFFSET || BitConverter.ToUInt32(src, candidate) != sequence) {
+                    pos++;
+                    continue;
+                }
+
+                int matchLength = MIN_MATCH;
+                while (pos + matchLength < matchLimit && src[candidate + matchLength] == src[pos + matchLength])
+                    matchLength++;
+
+                dstPos = WriteSequence(dst, dstPos, src, anchor, pos - anchor, pos - candidate, matchLength);
+                pos += matchLength;
+                anchor = pos;
+            }
+            dstPos = WriteLiterals(dst, dstPos, src, anchor, end - anchor);
+
+            Array.Resize(ref dst, dstPos);
+            return dst;
+        }
+
+        static int WriteSequence(byte[] dst, int dstPos, byte[] src, int literalStart, int literalLength, int matchOffset, int matchLength) {
+            int extraMatchLength = matchLength - MIN_MATCH;
+            dst[dstPos++] = (byte)((Math.Min(literalLength, 15) << 4) | Math.Min(extraMatchLength, 15));
+            dstPos = WriteLength(dst, dstPos, literalLength);
+            Array.Copy(src, literalStart, dst, dstPos, literalLength);
+            dstPos += literalLength;
+            dst[dstPos++] = (byte)matchOffset;
+            dst[dstPos++] = (byte)(matchOffset >> 8);
+            return WriteLength(dst, dstPos, extraMatchLength);
+        }
+
+        static int WriteLiterals(byte[] dst, int dstPos, byte[] src, int literalStart, int literalLength) {
+            dst[dstPos++] = (byte)(Math.Min(literalLength, 15) << 4);
+            dstPos = WriteLength(dst, dstPos, literalLength);
+            Array.Copy(src, literalStart, dst, dstPos, literalLength);
+            return dstPos + literalLength;
+        }
+
+        // Lengths of 15 and more continue in the following bytes, 255 at a time
+        static int WriteLength(byte[] dst, int dstPos, int length) {
+            if (length < 15)
+                return dstPos;
+            length -= 15;
+            while (length >= 255) {
+                dst[dstPos++] = 255;
+                length -= 255;
+            }
+            dst[dstPos++] = (byte)length;
+            return dstPos;
+        }
+    }
+}
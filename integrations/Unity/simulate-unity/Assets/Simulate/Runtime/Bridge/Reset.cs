@@ -1,11 +1,41 @@
+using System.Collections;
 using System.Collections.Generic;
+using Newtonsoft.Json;
 using UnityEngine.Events;
 
 namespace Simulate.RlAgents {
+    /// <summary>
+    /// Reset the scene, or only the maps at the given "indices" as when their episode is done (see RLPlugin.ResetAt).
+    /// <para>With "observe", the observations of the actors of the reset maps are rendered without simulating and
+    /// returned in the same response, instead of stepping with frame_skip=0 in a second round-trip.</para>
+    /// </summary>
     public class Reset : ICommand {
+        public const string RESET_OBSERVATIONS = "reset_observations";
+
         public void Execute(Dictionary<string, object> kwargs, UnityAction<string> callback) {
-            Simulator.Reset();
-            callback("{}");
+            ExecuteCoroutine(kwargs, callback).RunCoroutine();
+        }
+
+        IEnumerator ExecuteCoroutine(Dictionary<string, object> kwargs, UnityAction<string> callback) {
+            List<int> indices = kwargs.TryParse("indices", out List<int> mapIndices) ? mapIndices : null;
+            if (indices != null)
+                RLPlugin.ResetMaps(indices);
+            else
+                Simulator.Reset();
+            if (!kwargs.TryParse("observe", out bool observe) || !observe) {
+                callback("{}");
+                yield break;
+            }
+
+            EventData eventData = new EventData();
+            yield return RLPlugin.ObserveCoroutine(eventData, indices, kwargs);
+            if (Client.HasProtocolFeature(BinaryFrame.BINARY_RESPONSE)) {
+                kwargs.TryGetValue(Client.REQUEST_ID, out object requestId);
+                Client.WriteMessage(BinaryFrame.FromEventData(eventData, requestId));
+                callback(null);
+                yield break;
+            }
+            callback(JsonConvert.SerializeObject(eventData, new EventDataConverter()));
         }
     }
-}
\ No newline at end of file
+}
@@ -0,0 +1,129 @@
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.IO.Compression;
+using UnityEngine;
+
+namespace Simulate {
+    /// <summary>
+    /// Compression of the uint8 sensor buffers (camera images) sent in binary frames,
+    /// mirrored by <c>simulate/engine/compression.py</c> on the python side.
+    /// <para>Each image of a buffer (one per map and actor) is compressed separately, so that the python API
+    /// can decompress them in parallel. The compressed size of each image is sent in the tensor description.</para>
+    /// </summary>
+    public static class SensorCompression {
+        public const string COMPRESSION = "compression";
+
+        public const string ZLIB = "zlib";
+        public const string LZ4 = "lz4";
+        public const string PNG = "png";
+        public const string XOR_DELTA = "xor_delta";
+        public const string ALL_SENSORS = "*";
+
+        static readonly HashSet<string> modes = new HashSet<string> { ZLIB, LZ4, PNG, XOR_DELTA };
+
+        static Dictionary<string, string> sensorModes = new Dictionary<string, string>();
+        // The last image sent for each sensor, to send the next ones as XOR deltas
+        static Dictionary<string, byte[]> previousFrames = new Dictionary<string, byte[]>();
+        static Dictionary<(int, int), Texture2D> textures = new Dictionary<(int, int), Texture2D>();
+
+        /// <summary>
+        /// Read the compression mode of each sensor tag from the "sensor_compression" kwarg of Initialize,
+        /// "*" applying to all the uint8 sensors.
+        /// </summary>
+        public static void Configure(Dictionary<string, object> kwargs) {
+            sensorModes.Clear();
+            previousFrames.Clear();
+            if (!Client.HasProtocolFeature(COMPRESSION)
+                || !kwargs.TryParse("sensor_compression", out Dictionary<string, string> requested))
+                return;
+            foreach (KeyValuePair<string, string> entry in requested) {
+                if (!modes.Contains(entry.Value))
+                    throw new ArgumentException("Unknown sensor compression mode " + entry.Value);
+                sensorModes[entry.Key] = entry.Value;
+            }
+        }
+
+        public static bool TryGetMode(string tag, out string mode) {
+            if (sensorModes.TryGetValue(tag, out mode))
+                return true;
+            return sensorModes.TryGetValue(ALL_SENSORS, out mode);
+        }
+
+        /// <summary>
+        /// Compress each image of a (..., 3, height, width) uint8 buffer.
+        /// <para>With XOR deltas, the buffer becomes the reference of the next buffer of the same sensor.</para>
+        /// </summary>
+        public static byte[][] Compress(string tag, string mode, byte[] bytes, int[] shape) {
+            int imageSize = 1;
+            for (int i = Math.Max(shape.Length - 3, 0); i < shape.Length; i++)
+                imageSize *= shape[i];
+            int nImages = imageSize == 0 ? 0 : bytes.Length / imageSize;
+
+            byte[] delta = null;
+            if (mode == XOR_DELTA) {
+                if (!previousFrames.TryGetValue(tag, out byte[] previous) || previous.Length != bytes.Length)
+                    previous = new byte[bytes.Length];
+                delta = new byte[bytes.Length];
+                for (int i = 0; i < bytes.Length; i++)
+                    delta[i] = (byte)(bytes[i] ^ previous[i]);
+                previousFrames[tag] = bytes;
+            }
+
+            byte[][] chunks = new byte[nImages][];
+            for (int i = 0; i < nImages; i++) {
+                int offset = i * imageSize;
+                switch (mode) {
+                    case ZLIB:
+                        chunks[i] = Deflate(bytes, offset, imageSize);
+                        break;
+                    case LZ4:
+                        chunks[i] = Lz4Block.Compress(bytes, offset, imageSize);
+                        break;
+                    case PNG:
+                        chunks[i] = EncodePNG(bytes, offset, shape);
+                        break;
+                    case XOR_DELTA:
+                        chunks[i] = Deflate(delta, offset, imageSize);
+                        break;
+                    default:
+                        throw new ArgumentException("Unknown sensor compression mode " + mode);
+                }
+            }
+            return chunks;
+        }
+
+        /// <summary>
+        /// Raw DEFLATE stream (without the zlib header), decompressed with zlib.decompress(data, -15) in python.
+        /// </summary>
+        static byte[] Deflate(byte[] bytes, int offset, int count) {
+            using (MemoryStream output = new MemoryStream()) {
+                using (DeflateStream deflate = new DeflateStream(output, System.IO.Compression.CompressionLevel.Fastest, true))
+                    deflate.Write(bytes, offset, count);
+                return output.ToArray();
+            }
+        }
+
+        /// <summary>
+        /// Encode a (3, height, width) image as an RGB PNG. Buffer rows are bottom-up, as texture rows.
+        /// </summary>
+        static byte[] EncodePNG(byte[] bytes, int offset, int[] shape) {
+            if (shape.Length < 3 || shape[shape.Length - 3] != 3)
+                throw new ArgumentException("PNG compression requires (3, height, width) images");
+            int height = shape[shape.Length - 2];
+            int width = shape[shape.Length - 1];
+            if (!textures.TryGetValue((width, height), out Texture2D texture))
+                textures[(width, height)] = texture = new Texture2D(width, height, TextureFormat.RGB24, false);
+
+            int channelSize = width * height;
+            byte[] pixels = new byte[3 * channelSize];
+            for (int i = 0; i < channelSize; i++) {
+                pixels[3 * i] = bytes[offset + i];
+                pixels[3 * i + 1] = bytes[offset + channelSize + i];
+                pixels[3 * i + 2] = bytes[offset + 2 * channelSize + i];
+            }
+            texture.SetPixelData(pixels, 0);
+            return texture.EncodeToPNG();
+        }
+    }
+}
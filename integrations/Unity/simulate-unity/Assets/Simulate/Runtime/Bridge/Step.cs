@@ -11,6 +11,12 @@ namespace Simulate {
 
         IEnumerator ExecuteCoroutine(Dictionary<string, object> kwargs, UnityAction<string> callback) {
             yield return Simulator.StepCoroutine(kwargs);
+            if (Client.HasProtocolFeature(BinaryFrame.BINARY_RESPONSE)) {
+                kwargs.TryGetValue(Client.REQUEST_ID, out object requestId);
+                Client.WriteMessage(BinaryFrame.FromEventData(Simulator.currentEvent, requestId));
+                callback(null);
+                yield break;
+            }
             string json = JsonConvert.SerializeObject(Simulator.currentEvent, new EventDataConverter());
             callback(json);
         }
@@ -0,0 +1,101 @@
+using System;
+using System.Collections.Generic;
+
+namespace Simulate {
+    /// <summary>
+    /// A contiguous tensor received through binary framing.
+    /// <para>Data is converted to floats on first access whatever the wire dtype, to match how actions are consumed.
+    /// Raw payloads (e.g. a glTF scene) can be accessed without conversion with ToBytes.</para>
+    /// </summary>
+    public class Tensor {
+        public string dtype;
+        public int[] shape;
+
+        byte[] frame;
+        int offset;
+        int nbytes;
+
+        float[] _data;
+        public float[] data {
+            get {
+                _data ??= ToFloats();
+                return _data;
+            }
+        }
+
+        public Tensor(string dtype, int[] shape, byte[] frame, int offset, int nbytes) {
+            this.dtype = dtype;
+            this.shape = shape;
+            this.frame = frame;
+            this.offset = offset;
+            this.nbytes = nbytes;
+            if (dtype != "float32" && dtype != "int32" && dtype != "uint8")
+                throw new ArgumentException("Unsupported tensor dtype " + dtype);
+        }
+
+        /// <summary>
+        /// Copy of the raw payload of the tensor.
+        /// </summary>
+        public byte[] ToBytes() {
+            byte[] bytes = new byte[nbytes];
+            System.Buffer.BlockCopy(frame, offset, bytes, 0, nbytes);
+            return bytes;
+        }
+
+        /// <summary>
+        /// View of the index-th slice of the tensor along its first dimension, without copying the payload.
+        /// </summary>
+        public Tensor Slice(int index) {
+            if (shape.Length < 2)
+                throw new ArgumentException($"Expected a tensor of rank at least 2, got rank {shape.Length}");
+            if (index < 0 || index >= shape[0])
+                throw new ArgumentOutOfRangeException(nameof(index));
+            int[] sliceShape = new int[shape.Length - 1];
+            Array.Copy(shape, 1, sliceShape, 0, sliceShape.Length);
+            int sliceBytes = nbytes / shape[0];
+            return new Tensor(dtype, sliceShape, frame, offset + index * sliceBytes, sliceBytes);
+        }
+
+        float[] ToFloats() {
+            float[] data;
+            switch (dtype) {
+                case "float32":
+                    data = new float[nbytes / sizeof(float)];
+                    System.Buffer.BlockCopy(frame, offset, data, 0, nbytes);
+                    break;
+                case "int32":
+                    data = new float[nbytes / sizeof(int)];
+                    for (int i = 0; i < data.Length; i++)
+                        data[i] = BitConverter.ToInt32(frame, offset + i * sizeof(int));
+                    break;
+                case "uint8":
+                    data = new float[nbytes];
+                    for (int i = 0; i < data.Length; i++)
+                        data[i] = frame[offset + i];
+                    break;
+                default:
+                    throw new ArgumentException("Unsupported tensor dtype " + dtype);
+            }
+            return data;
+        }
+
+        /// <summary>
+        /// Convert a (n_maps, n_actors, action_size) tensor to nested lists, as parsed from JSON actions.
+        /// </summary>
+        public List<List<List<float>>> ToNestedList() {
+            if (shape.Length != 3)
+                throw new ArgumentException($"Expected a tensor of rank 3, got rank {shape.Length}");
+            List<List<List<float>>> result = new List<List<List<float>>>(shape[0]);
+            int index = 0;
+            for (int i = 0; i < shape[0]; i++) {
+                List<List<float>> actors = new List<List<float>>(shape[1]);
+                for (int j = 0; j < shape[1]; j++) {
+                    actors.Add(new List<float>(new ArraySegment<float>(data, index, shape[2])));
+                    index += shape[2];
+                }
+                result.Add(actors);
+            }
+            return result;
+        }
+    }
+}
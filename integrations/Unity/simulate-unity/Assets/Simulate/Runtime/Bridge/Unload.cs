@@ -0,0 +1,15 @@
+using System.Collections.Generic;
+using UnityEngine.Events;
+
+namespace Simulate {
+    /// <summary>
+    /// Unload the scene but keep the engine running and connected,
+    /// so that the python API can reuse it for the next Initialize (see EnginePool).
+    /// </summary>
+    public class Unload : ICommand {
+        public void Execute(Dictionary<string, object> kwargs, UnityAction<string> callback) {
+            Simulator.Unload();
+            callback("{}");
+        }
+    }
+}
@@ -31,6 +31,7 @@ namespace Simulate.GLTF {
 
         public class Extras {
             public string? sensor_tag;
+            public string? sensor_dtype;
             public bool? is_actor;
         }
 
@@ -16,6 +16,8 @@ namespace Simulate.GLTF {
             public float vertical_fov;
             public float ray_length;
             public string sensor_tag;
+            public string dtype;
+            public float[] quantization_range;
         }
     }
 }
\ No newline at end of file
@@ -12,6 +12,8 @@ namespace Simulate.GLTF {
             public string target_entity;
             public List<string> properties;
             public string sensor_tag;
+            public string dtype;
+            public float[] quantization_range;
         }
     }
 
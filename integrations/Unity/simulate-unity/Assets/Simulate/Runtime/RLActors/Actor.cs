@@ -57,7 +57,7 @@ namespace Simulate.RlAgents {
                     Debug.Log("Found camera data: " + node2.cameraData);
                     Debug.Log("Found camera data extra: " + node2.cameraData.extras);
                     Debug.Log("Found camera data extra sensor tag: " + node2.cameraData.extras.sensor_tag);
-                    CameraSensor cameraSensor = new CameraSensor(node2.camera, node2.cameraData.extras.sensor_tag);
+                    CameraSensor cameraSensor = new CameraSensor(node2.camera, node2.cameraData.extras.sensor_tag, node2.cameraData.extras.sensor_dtype);
                     sensors.Add(cameraSensor);
                 }
                 // search children for StateSensors
@@ -104,9 +104,11 @@ namespace Simulate.RlAgents {
             return (reward, done);
         }
 
-        public void EnableSensors() {
+        // Only the sensors with the given tags are enabled (and rendered for cameras), all of them if null
+        public void EnableSensors(HashSet<string> tags = null) {
             foreach (var sensor in sensors) {
-                sensor.Enable();
+                if (tags == null || tags.Contains(sensor.GetName()))
+                    sensor.Enable();
             }
         }
 
@@ -116,9 +118,10 @@ namespace Simulate.RlAgents {
             }
         }
 
-        public void ReadSensorObservations(Dictionary<string, Buffer> sensorBuffers, int bufferIndex) {
+        public void ReadSensorObservations(Dictionary<string, Buffer> sensorBuffers, int bufferIndex, HashSet<string> tags = null) {
             foreach (var sensor in sensors) {
-                sensor.AddObsToBuffer(sensorBuffers[sensor.GetName()], bufferIndex);
+                if (tags == null || tags.Contains(sensor.GetName()))
+                    sensor.AddObsToBuffer(sensorBuffers[sensor.GetName()], bufferIndex);
             }
         }
 
@@ -44,7 +44,7 @@ namespace Simulate.RlAgents {
                     return;
                 }
             }
-            CameraSensor cameraSensor = new CameraSensor(node.camera, node.cameraData.extras.sensor_tag); // same instance shared across actors
+            CameraSensor cameraSensor = new CameraSensor(node.camera, node.cameraData.extras.sensor_tag, node.cameraData.extras.sensor_dtype); // same instance shared across actors
             foreach (var actor in actors.Values) {
                 actor.sensors.Add(cameraSensor);
             }
@@ -95,12 +95,12 @@ namespace Simulate.RlAgents {
             return rewardDones;
         }
 
-        public void GetActorObservations(Dictionary<string, Buffer> sensorBuffers, int mapIndex) {
+        public void GetActorObservations(Dictionary<string, Buffer> sensorBuffers, int mapIndex, HashSet<string> tags = null) {
             int actorIndex = 0;
             foreach (string key in actors.Keys) {
                 int bufferIndex = mapIndex * actors.Count + actorIndex;
                 Actor actor = actors[key];
-                actor.ReadSensorObservations(sensorBuffers, bufferIndex);
+                actor.ReadSensorObservations(sensorBuffers, bufferIndex, tags);
                 actorIndex++;
             }
         }
@@ -112,9 +112,9 @@ namespace Simulate.RlAgents {
                 actor.Reset();
         }
 
-        public void EnableActorSensors() {
+        public void EnableActorSensors(HashSet<string> tags = null) {
             foreach (Actor Actor in actors.Values)
-                Actor.EnableSensors();
+                Actor.EnableSensors(tags);
         }
 
         public void DisableActorSensors() {
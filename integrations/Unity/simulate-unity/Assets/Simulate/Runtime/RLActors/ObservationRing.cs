@@ -0,0 +1,96 @@
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.IO.MemoryMappedFiles;
+using Newtonsoft.Json.Linq;
+
+namespace Simulate.RlAgents {
+    /// <summary>
+    /// Ring of observation slots in a memory-mapped file shared with the python API,
+    /// mirrored by <c>simulate/engine/shared_memory.py</c>.
+    /// <para>Each step writes the sensor, reward and done buffers in the next slot,
+    /// only the index of the slot is sent back through the socket.</para>
+    /// </summary>
+    public class ObservationRing : IDisposable {
+        public const string SHARED_MEMORY = "shared_memory";
+        const int ALIGNMENT = 8;
+
+        public class Config {
+            public string path;
+            public int slots = 4;
+        }
+
+        public JObject layout { get; private set; }
+
+        MemoryMappedFile file;
+        MemoryMappedViewAccessor accessor;
+        List<(Buffer buffer, long offset)> tensors;
+        Dictionary<Buffer, byte[]> byteBuffers;
+        HashSet<Buffer> sensorTensors;
+        int slots;
+        long slotSize;
+        int nextSlot;
+
+        public ObservationRing(Config config, List<(string[] path, Buffer buffer)> buffers) {
+            slots = config.slots;
+            tensors = new List<(Buffer, long)>();
+            byteBuffers = new Dictionary<Buffer, byte[]>();
+            sensorTensors = new HashSet<Buffer>();
+            JArray descriptions = new JArray();
+            long offset = 0;
+            foreach (var (path, buffer) in buffers) {
+                int nbytes = buffer.nbytes;
+                if (buffer.type != "float" || buffer.dtype != Buffer.FLOAT32)
+                    byteBuffers[buffer] = new byte[nbytes];
+                if (path[0] == "actor_sensor_buffers")
+                    sensorTensors.Add(buffer);
+                descriptions.Add(new JObject {
+                    { "path", new JArray(path) },
+                    { "dtype", buffer.dtype },
+                    { "shape", new JArray(buffer.shape) },
+                    { "offset", offset },
+                    { "nbytes", nbytes }
+                });
+                tensors.Add((buffer, offset));
+                offset = (offset + nbytes + ALIGNMENT - 1) / ALIGNMENT * ALIGNMENT;
+            }
+            slotSize = Math.Max(offset, ALIGNMENT);
+
+            file = MemoryMappedFile.CreateFromFile(config.path, FileMode.Create, null, slots * slotSize);
+            accessor = file.CreateViewAccessor();
+            layout = new JObject {
+                { "slots", slots },
+                { "slot_size", slotSize },
+                { "tensors", descriptions }
+            };
+        }
+
+        /// <summary>
+        /// Copy the current content of the buffers in the next slot of the ring.
+        /// </summary>
+        /// <param name="sensorBuffers">The sensor buffers to copy, all of them if null. The reward and done buffers are always copied.</param>
+        /// <returns>The index of the written slot.</returns>
+        public int Write(ICollection<Buffer> sensorBuffers = null) {
+            int slot = nextSlot;
+            nextSlot = (nextSlot + 1) % slots;
+            long slotOffset = slot * slotSize;
+            foreach (var (buffer, offset) in tensors) {
+                if (sensorBuffers != null && sensorTensors.Contains(buffer) && !sensorBuffers.Contains(buffer))
+                    continue;
+                if (byteBuffers.TryGetValue(buffer, out byte[] bytes)) {
+                    buffer.WriteBytes(bytes);
+                    accessor.WriteArray(slotOffset + offset, bytes, 0, bytes.Length);
+                } else {
+                    accessor.WriteArray(slotOffset + offset, buffer.floatBuffer, 0, buffer.floatBuffer.Length);
+                }
+            }
+            accessor.Flush();
+            return slot;
+        }
+
+        public void Dispose() {
+            accessor?.Dispose();
+            file?.Dispose();
+        }
+    }
+}
@@ -1,4 +1,5 @@
 using System;
+using System.Collections;
 using System.Collections.Generic;
 using UnityEngine;
 using System.Linq;
@@ -16,7 +17,16 @@ namespace Simulate.RlAgents {
         static Dictionary<string, Buffer> sensorBuffers;
         static Buffer doneBuffer;
         static Buffer rewardBuffer;
+        static ObservationRing observationRing;
         static bool active;
+        // The tags of the sensors requested by the current step, all the sensors if null.
+        // The other sensors are neither rendered, read nor sent.
+        static HashSet<string> requestedSensors;
+
+        // Set while a Rollout stacks the buffers of several steps, they are then sent in the response
+        public static bool suspendObservationRing;
+
+        public static Newtonsoft.Json.Linq.JObject sharedMemoryLayout => observationRing?.layout;
 
         public RLPlugin() {
             instance = this;
@@ -63,6 +73,24 @@ namespace Simulate.RlAgents {
 
             if (active)
                 InitializeBuffers();
+
+            if (active && Client.HasProtocolFeature(ObservationRing.SHARED_MEMORY)
+                && kwargs.TryParse<ObservationRing.Config>("shared_memory", out ObservationRing.Config sharedMemoryConfig))
+                InitializeObservationRing(sharedMemoryConfig);
+        }
+
+        static void InitializeObservationRing(ObservationRing.Config config) {
+            List<(string[], Buffer)> buffers = new List<(string[], Buffer)>();
+            foreach (KeyValuePair<string, Buffer> sensorBuffer in sensorBuffers)
+                buffers.Add((new string[] { "actor_sensor_buffers", sensorBuffer.Key }, sensorBuffer.Value));
+            buffers.Add((new string[] { "actor_reward_buffer" }, rewardBuffer));
+            buffers.Add((new string[] { "actor_done_buffer" }, doneBuffer));
+            try {
+                observationRing = new ObservationRing(config, buffers);
+            } catch (Exception e) {
+                Debug.LogWarning($"Failed to create shared memory at {config.path}, falling back to the socket: {e}");
+                observationRing = null;
+            }
         }
 
         static void InitializeBuffers() {
@@ -77,7 +105,9 @@ namespace Simulate.RlAgents {
                 Buffer sensorBuffer = new Buffer(
                     nActiveMaps * nActors * sensor.GetSize(),
                     bufferShape.ToArray(),
-                    sensor.GetSensorBufferType()
+                    sensor.GetSensorBufferType(),
+                    sensor.GetDtype(),
+                    sensor.GetQuantizationRange()
                 );
                 // TODO: error is thrown due to multiple sensors with the same name here
                 sensorBuffers.Add(sensor.GetName(), sensorBuffer);
@@ -115,7 +145,8 @@ namespace Simulate.RlAgents {
         // Where "individual actions" is a list of integers/floats coresponding to the actions
         public override void OnBeforeStep(EventData eventData) {
             if (!active) return;
-            if (eventData.inputKwargs.TryParse<Dictionary<string, List<List<List<float>>>>>("action", out Dictionary<string, List<List<List<float>>>> actions)) {
+            requestedSensors = eventData.inputKwargs.TryParse("sensors", out List<string> tags) ? new HashSet<string>(tags) : null;
+            if (TryGetActions(eventData.inputKwargs, out Dictionary<string, List<List<List<float>>>> actions)) {
                 for (int i = 0; i < activeMaps.Count; i++) {
                     // Create a dictionary of actions for the map
                     Dictionary<string, List<List<float>>> actionsForMap = new Dictionary<string, List<List<float>>>();
@@ -127,6 +158,17 @@ namespace Simulate.RlAgents {
             }
         }
 
+        // Actions are either sent as JSON nested lists or as binary tensors of shape (n_maps, n_actors, action_size)
+        static bool TryGetActions(Dictionary<string, object> kwargs, out Dictionary<string, List<List<List<float>>>> actions) {
+            if (kwargs.TryGetValue("action", out object value) && value is Dictionary<string, Tensor> tensors) {
+                actions = new Dictionary<string, List<List<List<float>>>>();
+                foreach (KeyValuePair<string, Tensor> tensor in tensors)
+                    actions[tensor.Key] = tensor.Value.ToNestedList();
+                return true;
+            }
+            return kwargs.TryParse("action", out actions);
+        }
+
         // After Simulator step, before rendering, check if any maps are done
         // If so, reset them, and update the map data
         public override void OnStep(EventData eventData) {
@@ -149,16 +191,33 @@ namespace Simulate.RlAgents {
             eventData.outputKwargs.Add("actor_reward_buffer", rewardBuffer);
 
             for (int i = 0; i < activeMaps.Count; i++)
-                activeMaps[i].EnableActorSensors();
+                activeMaps[i].EnableActorSensors(requestedSensors);
         }
 
         // After Simulator step, record sensor observations
         public override void OnAfterStep(EventData eventData) {
             if (!active) return;
             for (int i = 0; i < activeMaps.Count; i++) {
-                activeMaps[i].GetActorObservations(sensorBuffers, i);
+                activeMaps[i].GetActorObservations(sensorBuffers, i, requestedSensors);
+            }
+            Dictionary<string, Buffer> stepSensorBuffers = sensorBuffers;
+            if (requestedSensors != null) {
+                stepSensorBuffers = new Dictionary<string, Buffer>();
+                foreach (KeyValuePair<string, Buffer> sensorBuffer in sensorBuffers)
+                    if (requestedSensors.Contains(sensorBuffer.Key))
+                        stepSensorBuffers.Add(sensorBuffer.Key, sensorBuffer.Value);
+            }
+            if (observationRing != null && !suspendObservationRing) {
+                // Buffers are sent through the shared memory, only the slot index goes through the socket
+                eventData.outputKwargs.Remove("actor_done_buffer");
+                eventData.outputKwargs.Remove("actor_reward_buffer");
+                eventData.outputKwargs.Add("shared_memory_slot", observationRing.Write(requestedSensors == null ? null : stepSensorBuffers.Values));
+                // The slots keep stale buffers for the sensors which weren't requested
+                if (requestedSensors != null)
+                    eventData.outputKwargs.Add("shared_memory_sensors", new List<string>(stepSensorBuffers.Keys));
+            } else {
+                eventData.outputKwargs.Add("actor_sensor_buffers", stepSensorBuffers);
             }
-            eventData.outputKwargs.Add("actor_sensor_buffers", sensorBuffers);
             for (int i = 0; i < activeMaps.Count; i++)
                 activeMaps[i].DisableActorSensors();
         }
@@ -173,6 +232,41 @@ namespace Simulate.RlAgents {
             activeMaps[index] = map;
         }
 
+        // Reset the maps at the given indices only, e.g. to restart some episodes of a vector environment
+        public static void ResetMaps(List<int> indices) {
+            foreach (int index in indices) {
+                if (index < 0 || index >= activeMaps.Count) {
+                    Debug.LogWarning($"Map index {index} out of range, {activeMaps.Count} maps are shown");
+                    continue;
+                }
+                ResetAt(index);
+            }
+        }
+
+        // Render and read the observations of the actors without simulating, e.g. after a reset.
+        // Only the maps at the given indices are observed, all of them if null.
+        public static IEnumerator ObserveCoroutine(EventData eventData, List<int> indices, Dictionary<string, object> kwargs) {
+            if (!active) yield break;
+            HashSet<string> tags = kwargs.TryParse("sensors", out List<string> sensorTags) ? new HashSet<string>(sensorTags) : null;
+            List<int> observedMaps = (indices ?? Enumerable.Range(0, activeMaps.Count))
+                .Where(index => index >= 0 && index < activeMaps.Count).ToList();
+            foreach (int index in observedMaps)
+                activeMaps[index].EnableActorSensors(tags);
+
+            yield return new WaitForEndOfFrame();
+
+            foreach (int index in observedMaps)
+                activeMaps[index].GetActorObservations(sensorBuffers, index, tags);
+            Dictionary<string, Buffer> observedBuffers = new Dictionary<string, Buffer>();
+            foreach (KeyValuePair<string, Buffer> sensorBuffer in sensorBuffers)
+                if (tags == null || tags.Contains(sensorBuffer.Key))
+                    observedBuffers.Add(sensorBuffer.Key, sensorBuffer.Value);
+            // The observations go through the socket, the shared memory ring only holds steps
+            eventData.outputKwargs.Add("actor_sensor_buffers", observedBuffers);
+            foreach (int index in observedMaps)
+                activeMaps[index].DisableActorSensors();
+        }
+
         public override void OnReset() {
             for (int i = activeMaps.Count - 1; i >= 0; i--) {
                 Map map = activeMaps[i];
@@ -188,6 +282,8 @@ namespace Simulate.RlAgents {
             activeMaps.Clear();
             positions.Clear();
             sensorBuffers.Clear();
+            observationRing?.Dispose();
+            observationRing = null;
         }
 
         static void CreatePositionPool() {
@@ -0,0 +1,111 @@
+using System;
+using System.Collections;
+using System.Collections.Generic;
+using Newtonsoft.Json;
+using Newtonsoft.Json.Linq;
+using UnityEngine.Events;
+
+namespace Simulate.RlAgents {
+    /// <summary>
+    /// Apply a sequence of actions back to back and return the stacked buffers in a single response.
+    /// <para>Actions have a leading time dimension, (n_steps, n_maps, n_actors, action_size). Buffers are returned
+    /// with a leading time dimension too. Done maps are reset after each step, as in a regular step.</para>
+    /// </summary>
+    public class Rollout : ICommand {
+        public void Execute(Dictionary<string, object> kwargs, UnityAction<string> callback) {
+            ExecuteCoroutine(kwargs, callback).RunCoroutine();
+        }
+
+        IEnumerator ExecuteCoroutine(Dictionary<string, object> kwargs, UnityAction<string> callback) {
+            int nSteps = GetStepCount(kwargs);
+            Dictionary<string, object> stacked = new Dictionary<string, object>();
+            // Buffers are copied after each step, they can't go through the shared memory ring
+            RLPlugin.suspendObservationRing = true;
+            for (int t = 0; t < nSteps; t++) {
+                Dictionary<string, object> stepKwargs = new Dictionary<string, object>(kwargs);
+                if (kwargs.TryGetValue("action", out object action))
+                    stepKwargs["action"] = SliceAction(action, t);
+                yield return Simulator.StepCoroutine(stepKwargs);
+                Stack(Simulator.currentEvent.outputKwargs, stacked, t, nSteps);
+            }
+            RLPlugin.suspendObservationRing = false;
+
+            EventData eventData = new EventData();
+            eventData.nodes = Simulator.currentEvent.nodes;
+            eventData.frames = Simulator.currentEvent.frames;
+            eventData.outputKwargs = stacked;
+            if (Client.HasProtocolFeature(BinaryFrame.BINARY_RESPONSE)) {
+                kwargs.TryGetValue(Client.REQUEST_ID, out object requestId);
+                Client.WriteMessage(BinaryFrame.FromEventData(eventData, requestId, compress: false));
+                callback(null);
+                yield break;
+            }
+            callback(JsonConvert.SerializeObject(eventData, new EventDataConverter()));
+        }
+
+        int GetStepCount(Dictionary<string, object> kwargs) {
+            if (kwargs.TryGetValue("action", out object action)) {
+                if (action is Dictionary<string, Tensor> tensors) {
+                    foreach (Tensor tensor in tensors.Values)
+                        return tensor.shape[0];
+                } else if (action is JObject jObject) {
+                    foreach (KeyValuePair<string, JToken> value in jObject)
+                        return ((JArray)value.Value).Count;
+                }
+            }
+            // Without actions, the number of steps is given explicitly
+            return kwargs.TryGetValue("n_steps", out object nSteps) ? Convert.ToInt32(nSteps) : 1;
+        }
+
+        static object SliceAction(object action, int t) {
+            if (action is Dictionary<string, Tensor> tensors) {
+                Dictionary<string, Tensor> slices = new Dictionary<string, Tensor>();
+                foreach (KeyValuePair<string, Tensor> tensor in tensors)
+                    slices[tensor.Key] = tensor.Value.Slice(t);
+                return slices;
+            }
+            JObject jSlices = new JObject();
+            foreach (KeyValuePair<string, JToken> value in (JObject)action)
+                jSlices[value.Key] = value.Value[t];
+            return jSlices;
+        }
+
+        static void Stack(Dictionary<string, object> outputKwargs, Dictionary<string, object> stacked, int t, int nSteps) {
+            foreach (KeyValuePair<string, object> kwarg in outputKwargs) {
+                if (kwarg.Value is NodeDeltas nodeDeltas) {
+                    // The deltas of all the steps, as the later deltas are relative to the earlier ones
+                    stacked[kwarg.Key] = stacked.TryGetValue(kwarg.Key, out object earlier)
+                        ? ((NodeDeltas)earlier).Merge(nodeDeltas)
+                        : nodeDeltas;
+                } else if (kwarg.Value is Buffer buffer) {
+                    if (!stacked.TryGetValue(kwarg.Key, out object stackedBuffer))
+                        stacked[kwarg.Key] = stackedBuffer = CreateStackedBuffer(buffer, nSteps);
+                    CopyAt((Buffer)stackedBuffer, buffer, t);
+                } else if (kwarg.Value is Dictionary<string, Buffer> buffers) {
+                    if (!stacked.TryGetValue(kwarg.Key, out object group))
+                        stacked[kwarg.Key] = group = new Dictionary<string, Buffer>();
+                    Dictionary<string, Buffer> stackedBuffers = (Dictionary<string, Buffer>)group;
+                    foreach (KeyValuePair<string, Buffer> subBuffer in buffers) {
+                        if (!stackedBuffers.TryGetValue(subBuffer.Key, out Buffer stackedBuffer))
+                            stackedBuffers[subBuffer.Key] = stackedBuffer = CreateStackedBuffer(subBuffer.Value, nSteps);
+                        CopyAt(stackedBuffer, subBuffer.Value, t);
+                    }
+                }
+            }
+        }
+
+        static Buffer CreateStackedBuffer(Buffer buffer, int nSteps) {
+            int[] shape = new int[buffer.shape.Length + 1];
+            shape[0] = nSteps;
+            Array.Copy(buffer.shape, 0, shape, 1, buffer.shape.Length);
+            return new Buffer(nSteps * buffer.size, shape, buffer.type, buffer.dtype, buffer.quantizationRange);
+        }
+
+        static void CopyAt(Buffer stacked, Buffer buffer, int t) {
+            if (buffer.type == "float")
+                Array.Copy(buffer.floatBuffer, 0, stacked.floatBuffer, t * buffer.size, buffer.size);
+            else
+                Array.Copy(buffer.uintBuffer, 0, stacked.uintBuffer, t * buffer.size, buffer.size);
+        }
+    }
+}
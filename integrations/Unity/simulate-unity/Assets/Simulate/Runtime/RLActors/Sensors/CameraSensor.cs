@@ -11,13 +11,15 @@ namespace Simulate {
         Node m_node;
 
         bool cached = false;
+        string dtype;
 
         Color32[] pixels;
 
-        public CameraSensor(RenderCamera renderCamera, string sensorName) {
+        public CameraSensor(RenderCamera renderCamera, string sensorName, string dtype = null) {
             m_node = node;
             m_renderCamera = renderCamera;
             mName = sensorName;
+            this.dtype = dtype;
             renderCamera.camera.enabled = false;
             tex = new Texture2D(renderCamera.camera.targetTexture.width, renderCamera.camera.targetTexture.height);
         }
@@ -30,6 +32,14 @@ namespace Simulate {
             return mType;
         }
 
+        public string GetDtype() {
+            return dtype;
+        }
+
+        public float[] GetQuantizationRange() {
+            return null;
+        }
+
         public int GetSize() {
             return renderCamera.camera.targetTexture.width * renderCamera.camera.targetTexture.height * 3;
         }
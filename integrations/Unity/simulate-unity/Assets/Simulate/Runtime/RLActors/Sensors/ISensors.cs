@@ -3,6 +3,10 @@ using UnityEngine;
 
 namespace Simulate {
     public class Buffer {
+        public const string FLOAT32 = "float32";
+        public const string FLOAT16 = "float16";
+        public const string UINT8 = "uint8";
+
         public float[] floatBuffer;
         public uint[] uintBuffer;
         public string type;
@@ -10,10 +14,22 @@ namespace Simulate {
 
         public int size;
 
-        public Buffer(int size, int[] shape, string type) {
+        // The dtype in which the values are sent: floats can be sent as float16 or quantized to uint8,
+        // uint8 values (e.g. camera pixels) can be sent normalized to [0, 1] as float32 or float16
+        public string dtype;
+        // The (low, high) range mapped to [0, 255] when quantizing floats to uint8
+        public float[] quantizationRange;
+
+        public int nbytes => dtype == FLOAT32 ? size * 4 : dtype == FLOAT16 ? size * 2 : size;
+
+        public Buffer(int size, int[] shape, string type, string dtype = null, float[] quantizationRange = null) {
             this.type = type;
             this.shape = shape;
             this.size = size;
+            this.dtype = dtype ?? (type == "float" ? FLOAT32 : UINT8);
+            this.quantizationRange = quantizationRange;
+            if (this.dtype == UINT8 && type == "float" && (quantizationRange == null || quantizationRange.Length != 2))
+                throw new System.ArgumentException("Quantizing a float buffer to uint8 requires a (low, high) range");
             if (type == "float") {
                 floatBuffer = new float[size];
             } else if (type == "uint8") {
@@ -23,6 +39,50 @@ namespace Simulate {
             }
         }
 
+        /// <summary>
+        /// Write the values in their dtype, as little-endian bytes.
+        /// </summary>
+        public void WriteBytes(byte[] bytes) {
+            if (type == "float") {
+                if (dtype == FLOAT32) {
+                    System.Buffer.BlockCopy(floatBuffer, 0, bytes, 0, size * sizeof(float));
+                } else if (dtype == FLOAT16) {
+                    for (int i = 0; i < size; i++) {
+                        ushort half = Mathf.FloatToHalf(floatBuffer[i]);
+                        bytes[2 * i] = (byte)half;
+                        bytes[2 * i + 1] = (byte)(half >> 8);
+                    }
+                } else {
+                    float low = quantizationRange[0];
+                    float scale = 255f / (quantizationRange[1] - low);
+                    for (int i = 0; i < size; i++)
+                        bytes[i] = (byte)Mathf.Round(Mathf.Clamp((floatBuffer[i] - low) * scale, 0f, 255f));
+                }
+            } else {
+                if (dtype == UINT8) {
+                    for (int i = 0; i < size; i++)
+                        bytes[i] = (byte)uintBuffer[i];
+                } else if (dtype == FLOAT16) {
+                    for (int i = 0; i < size; i++) {
+                        ushort half = Mathf.FloatToHalf(uintBuffer[i] / 255f);
+                        bytes[2 * i] = (byte)half;
+                        bytes[2 * i + 1] = (byte)(half >> 8);
+                    }
+                } else {
+                    float[] values = new float[size];
+                    for (int i = 0; i < size; i++)
+                        values[i] = uintBuffer[i] / 255f;
+                    System.Buffer.BlockCopy(values, 0, bytes, 0, size * sizeof(float));
+                }
+            }
+        }
+
+        public byte[] ToBytes() {
+            byte[] bytes = new byte[nbytes];
+            WriteBytes(bytes);
+            return bytes;
+        }
+
         public string ToJson(int[] shape, string name) {
             if (type == "float") {
                 return JsonHelper.ToJson(floatBuffer, shape, name);
@@ -38,6 +98,8 @@ namespace Simulate {
     public interface ISensor {
         string GetName();
         string GetSensorBufferType();
+        string GetDtype();
+        float[] GetQuantizationRange();
         int GetSize();
         int[] GetShape();
         void Enable();
@@ -6,6 +6,8 @@ namespace Simulate {
         public string mName = "RaycastSensor";
         public static string mType = "float";
         public Node node => m_node;
+        string dtype;
+        float[] quantizationRange;
         Node m_node;
 
         private List<(float horizontal, float vertical)> raycastAngles;
@@ -20,6 +22,8 @@ namespace Simulate {
         public RaycastSensor(Node node, Simulate.GLTF.HFRaycastSensors.HFRaycastSensor data) {
             m_node = node;
             mName = data.sensor_tag;
+            dtype = data.dtype;
+            quantizationRange = data.quantization_range;
             // calculate ray angles etc
 
             nHorizontalRays = data.n_horizontal_rays;
@@ -56,6 +60,14 @@ namespace Simulate {
             return mType;
         }
 
+        public string GetDtype() {
+            return dtype;
+        }
+
+        public float[] GetQuantizationRange() {
+            return quantizationRange;
+        }
+
         public int GetSize() {
             return raycastAngles.Count;
         }
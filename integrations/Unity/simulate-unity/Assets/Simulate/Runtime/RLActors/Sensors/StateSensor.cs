@@ -6,6 +6,8 @@ namespace Simulate {
         public string mName = "StateSensor";
         public static string mType = "float";
         public Node node => m_node;
+        string dtype;
+        float[] quantizationRange;
 
         Node m_node;
         GameObject referenceEntity;
@@ -19,6 +21,8 @@ namespace Simulate {
         public StateSensor(Node node, Simulate.GLTF.HFStateSensors.HFStateSensor data) {
             m_node = node;
             mName = data.sensor_tag;
+            dtype = data.dtype;
+            quantizationRange = data.quantization_range;
             properties = data.properties;
             referenceEntity = GameObject.Find(data.reference_entity);
             targetEntity = GameObject.Find(data.target_entity);
@@ -42,6 +46,14 @@ namespace Simulate {
             return mType;
         }
 
+        public string GetDtype() {
+            return dtype;
+        }
+
+        public float[] GetQuantizationRange() {
+            return quantizationRange;
+        }
+
         public int GetSize() {
             Dictionary<string, int> VALID_PROPERTIES = new Dictionary<string, int>();
             VALID_PROPERTIES.Add("position", 3);
@@ -19,6 +19,8 @@ namespace Simulate {
         [JsonProperty(PropertyName = "frame_skip")] public int frameSkip = 1;
         [JsonProperty(PropertyName = "return_nodes")] public bool returnNodes = true;
         [JsonProperty(PropertyName = "return_frames")] public bool returnFrames = true;
+        [JsonProperty(PropertyName = "node_deltas")] public bool nodeDeltas = false;
+        [JsonProperty(PropertyName = "node_delta_epsilon")] public float nodeDeltaEpsilon = 1e-4f;
         [JsonProperty(PropertyName = "node_filter")] public List<string> nodeFilter;
         [JsonProperty(PropertyName = "camera_filter")] public List<string> cameraFilter;
         [JsonProperty(PropertyName = "ambient_color"), JsonConverter(typeof(ColorRGBConverter))] public Color ambientColor = Color.gray;
@@ -28,6 +30,8 @@ namespace Simulate {
         public bool ShouldSerializeframeSkip() => frameSkip != 1;
         public bool ShouldSerializereturnNodes() => !returnNodes;
         public bool ShouldSerializereturnFrames() => !returnFrames;
+        public bool ShouldSerializenodeDeltas() => nodeDeltas;
+        public bool ShouldSerializenodeDeltaEpsilon() => nodeDeltaEpsilon != 1e-4f;
         public bool ShouldSerializenodeFilter() => nodeFilter != null && nodeFilter.Count > 0;
         public bool ShouldSerializecameraFilter() => cameraFilter != null && cameraFilter.Count > 0;
         public bool ShouldSerializeambientColor() => ambientColor != Color.gray;
@@ -44,6 +48,8 @@ namespace Simulate {
             kwargs.TryParse<int>("frame_skip", out frameSkip, frameSkip);
             kwargs.TryParse<bool>("return_nodes", out returnNodes, returnNodes);
             kwargs.TryParse<bool>("return_frames", out returnFrames, returnFrames);
+            kwargs.TryParse<bool>("node_deltas", out nodeDeltas, nodeDeltas);
+            kwargs.TryParse<float>("node_delta_epsilon", out nodeDeltaEpsilon, nodeDeltaEpsilon);
             kwargs.TryParse<List<string>>("node_filter", out nodeFilter, nodeFilter);
             kwargs.TryParse<List<string>>("camera_filter", out cameraFilter, cameraFilter);
             kwargs.TryParse<float[]>("ambient_color", out float[] ambientColorBuffer,
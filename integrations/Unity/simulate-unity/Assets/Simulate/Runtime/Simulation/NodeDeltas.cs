@@ -0,0 +1,129 @@
+using System;
+using System.Collections.Generic;
+using Newtonsoft.Json;
+using Newtonsoft.Json.Linq;
+using UnityEngine;
+
+namespace Simulate {
+    /// <summary>
+    /// Node states returned as deltas, mirrored by <c>simulate/engine/node_deltas.py</c> on the python side.
+    /// <para>Only the nodes whose state changed by more than the epsilon since it was last sent are returned,
+    /// as an array of node indices and a (n_changed, 13) float32 array of states: position (3), rotation (4),
+    /// velocity (3) and angular velocity (3). The names of the nodes, which the indices refer to, are sent
+    /// with the first deltas after the scene is initialized, which hold the state of all the nodes.</para>
+    /// </summary>
+    public class NodeDeltas {
+        public const string NODE_DELTAS = "node_deltas";
+        public const int STATE_SIZE = 13;
+
+        [JsonProperty(NullValueHandling = NullValueHandling.Ignore)] public string[] names;
+        public int[] indices;
+        public float[] states;
+
+        // The tracked nodes and the states last sent for them
+        static List<Node> trackedNodes;
+        static float[] sentStates;
+
+        /// <summary>
+        /// Start a new sequence of deltas, e.g. when the scene is initialized.
+        /// </summary>
+        public static void Reset() {
+            trackedNodes = null;
+            sentStates = null;
+        }
+
+        /// <summary>
+        /// Get the nodes whose state changed by more than epsilon (in any component) since it was last sent.
+        /// </summary>
+        public static NodeDeltas Encode(IEnumerable<Node> nodes, float epsilon) {
+            NodeDeltas deltas = new NodeDeltas();
+            if (trackedNodes == null) {
+                trackedNodes = new List<Node>(nodes);
+                sentStates = null;
+                deltas.names = trackedNodes.ConvertAll(node => node.name).ToArray();
+            }
+
+            float[] current = new float[trackedNodes.Count * STATE_SIZE];
+            for (int i = 0; i < trackedNodes.Count; i++)
+                WriteState(trackedNodes[i], current, i * STATE_SIZE);
+
+            List<int> changed = new List<int>();
+            for (int i = 0; i < trackedNodes.Count; i++) {
+                if (sentStates == null || Changed(current, sentStates, i * STATE_SIZE, epsilon))
+                    changed.Add(i);
+            }
+            sentStates ??= new float[current.Length];
+
+            deltas.indices = changed.ToArray();
+            deltas.states = new float[changed.Count * STATE_SIZE];
+            for (int k = 0; k < changed.Count; k++) {
+                int offset = changed[k] * STATE_SIZE;
+                Array.Copy(current, offset, deltas.states, k * STATE_SIZE, STATE_SIZE);
+                Array.Copy(current, offset, sentStates, offset, STATE_SIZE);
+            }
+            return deltas;
+        }
+
+        static bool Changed(float[] current, float[] sent, int offset, float epsilon) {
+            for (int j = offset; j < offset + STATE_SIZE; j++) {
+                if (Math.Abs(current[j] - sent[j]) > epsilon)
+                    return true;
+            }
+            return false;
+        }
+
+        static void WriteState(Node node, float[] states, int offset) {
+            Node.Data data = node.GetData();
+            Vector3 velocity = data.velocity ?? Vector3.zero;
+            Vector3 angularVelocity = data.angular_velocity ?? Vector3.zero;
+            float[] state = {
+                data.position.x, data.position.y, data.position.z,
+                data.rotation.x, data.rotation.y, data.rotation.z, data.rotation.w,
+                velocity.x, velocity.y, velocity.z,
+                angularVelocity.x, angularVelocity.y, angularVelocity.z
+            };
+            Array.Copy(state, 0, states, offset, STATE_SIZE);
+        }
+
+        /// <summary>
+        /// Merge the deltas of a later step, e.g. to return the deltas of all the steps of a rollout at once.
+        /// </summary>
+        public NodeDeltas Merge(NodeDeltas later) {
+            SortedDictionary<int, int> latest = new SortedDictionary<int, int>();
+            for (int k = 0; k < indices.Length; k++)
+                latest[indices[k]] = k;
+            for (int k = 0; k < later.indices.Length; k++)
+                latest[later.indices[k]] = indices.Length + k;
+
+            NodeDeltas merged = new NodeDeltas {
+                names = names ?? later.names,
+                indices = new int[latest.Count],
+                states = new float[latest.Count * STATE_SIZE]
+            };
+            int position = 0;
+            foreach (KeyValuePair<int, int> entry in latest) {
+                merged.indices[position] = entry.Key;
+                if (entry.Value < indices.Length)
+                    Array.Copy(states, entry.Value * STATE_SIZE, merged.states, position * STATE_SIZE, STATE_SIZE);
+                else
+                    Array.Copy(later.states, (entry.Value - indices.Length) * STATE_SIZE, merged.states, position * STATE_SIZE, STATE_SIZE);
+                position++;
+            }
+            return merged;
+        }
+
+        /// <summary>
+        /// Add the deltas to a binary frame: the names in the data, the indices and states as raw tensors.
+        /// </summary>
+        public void AddTo(BinaryFrame frame, JObject data) {
+            if (names != null)
+                data.Add(NODE_DELTAS, new JObject { { "names", new JArray(names) } });
+            byte[] indexBytes = new byte[indices.Length * sizeof(int)];
+            System.Buffer.BlockCopy(indices, 0, indexBytes, 0, indexBytes.Length);
+            frame.AddTensor(new string[] { NODE_DELTAS, "indices" }, "int32", new int[] { indices.Length }, indexBytes);
+            byte[] stateBytes = new byte[states.Length * sizeof(float)];
+            System.Buffer.BlockCopy(states, 0, stateBytes, 0, stateBytes.Length);
+            frame.AddTensor(new string[] { NODE_DELTAS, "states" }, "float32", new int[] { indices.Length, STATE_SIZE }, stateBytes);
+        }
+    }
+}
@@ -53,8 +53,8 @@ namespace Simulate {
             Physics.autoSimulation = false;
             LoadCustomAssemblies();
             LoadPlugins();
-            GetCommandLineArgs(out int port);
-            Client.Initialize("localhost", port);
+            GetCommandLineArgs(out int port, out string socketPath);
+            Client.Initialize("localhost", port, socketPath);
         }
 
         private void OnDestroy() {
@@ -62,25 +62,32 @@ namespace Simulate {
             UnloadPlugins();
         }
 
-        static void GetCommandLineArgs(out int port) {
+        static void GetCommandLineArgs(out int port, out string socketPath) {
             port = 55001;
+            socketPath = null;
             string[] args = System.Environment.GetCommandLineArgs();
             for (int i = 0; i < args.Length - 1; i++) {
                 if (args[i] == "port")
                     int.TryParse(args[i + 1], out port);
+                else if (args[i] == "socket_path")
+                    socketPath = args[i + 1];
             }
         }
 
         public static async Task Initialize(string b64bytes, Dictionary<string, object> kwargs) {
+            await Initialize(Convert.FromBase64String(b64bytes), kwargs);
+        }
+
+        public static async Task Initialize(byte[] bytes, Dictionary<string, object> kwargs) {
             if (root != null)
                 throw new System.Exception("Scene is already initialized. Close before opening a new scene.");
 
             // Load scene from bytes
-            byte[] bytes = Convert.FromBase64String(b64bytes);
             root = await Importer.LoadFromBytesAsync(bytes);
 
             // Gather reference to nodes and cameras
             nodes = new Dictionary<string, Node>();
+            NodeDeltas.Reset();
             cameras = new List<RenderCamera>();
             foreach (Node node in root.GetComponentsInChildren<Node>(true)) {
                 nodes.Add(node.gameObject.name, node);
@@ -106,10 +113,12 @@ namespace Simulate {
             float timeStep = Config.instance.timeStep;
             bool returnNodes = Config.instance.returnNodes;
             bool returnFrames = Config.instance.returnFrames;
+            bool nodeDeltas = Config.instance.nodeDeltas;
             kwargs.TryParse("frame_skip", out Config.instance.frameSkip, frameSkip);
             kwargs.TryParse("time_step", out Config.instance.timeStep, timeStep);
             kwargs.TryParse("return_nodes", out Config.instance.returnNodes, returnNodes);
             kwargs.TryParse("return_frames", out Config.instance.returnFrames, returnFrames);
+            kwargs.TryParse("node_deltas", out Config.instance.nodeDeltas, nodeDeltas);
 
             if (currentEvent == null)
                 currentEvent = new EventData();
@@ -146,6 +155,7 @@ namespace Simulate {
             Config.instance.timeStep = timeStep;
             Config.instance.returnFrames = returnFrames;
             Config.instance.returnNodes = returnNodes;
+            Config.instance.nodeDeltas = nodeDeltas;
         }
 
         static void OnEarlyStepInternal(bool readCameraData) {
@@ -156,7 +166,12 @@ namespace Simulate {
         }
 
         static void OnStepInternal(bool readNodeData, bool readCameraData) {
-            if (readNodeData) {
+            if (readNodeData && Config.instance.nodeDeltas) {
+                // Only the nodes which moved since they were last sent, see NodeDeltas
+                IEnumerable<Node> filteredNodes = nodes.Values.Where(
+                    node => Config.instance.nodeFilter == null || Config.instance.nodeFilter.Contains(node.name));
+                currentEvent.outputKwargs.Add(NodeDeltas.NODE_DELTAS, NodeDeltas.Encode(filteredNodes, Config.instance.nodeDeltaEpsilon));
+            } else if (readNodeData) {
                 foreach (Node node in nodes.Values) {
                     if (Config.instance.nodeFilter == null || Config.instance.nodeFilter.Contains(node.name))
                         currentEvent.nodes.Add(node.name, node.GetData());
@@ -186,6 +201,11 @@ namespace Simulate {
                 plugin.OnBeforeSceneUnloaded();
             if (root != null)
                 GameObject.DestroyImmediate(root);
+            // Forget the scene, so that the engine can be reused for the next Initialize
+            root = null;
+            nodes = null;
+            cameras = null;
+            currentEvent = null;
         }
 
         private static void LoadCustomAssemblies() {
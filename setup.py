@@ -71,6 +71,7 @@ REQUIRED_PKGS = [
     "vtk>=9.0",  # Pyvista doesn't always install vtk, so we do it here
     "pyvista>=0.35",  # For mesh creation and edition and simple vizualization
     "huggingface_hub>=0.10",  # For sharing objects, environments & trained RL policies
+    "filelock",  # For extracting the Unity build once across concurrent processes
     'pybind11>=2.10.0',  # For compiling extensions pybind11
     'scikit-build>=0.5',  # For compiling extensions
 ]
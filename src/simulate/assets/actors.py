@@ -154,6 +154,10 @@ class EgocentricCameraActor(Capsule):
             Height of the camera above the actor.
         camera_width (`int`, *optional*, defaults to `40`):
             Width of the camera above the actor.
+        camera_tag (`str`, *optional*, defaults to `"CameraSensor"`):
+            Sensor tag of the camera above the actor.
+        camera_dtype (`str`, *optional*, defaults to `"uint8"`):
+            Dtype of the observations of the camera above the actor, see `Camera`.
         transformation_matrix (`np.ndarray`, *optional*, defaults to `None`):
             Transformation matrix of the actor in the scene.
         parent (`Asset`, *optional*, defaults to `None`):
@@ -175,6 +179,7 @@ class EgocentricCameraActor(Capsule):
         camera_height: int = 40,
         camera_width: int = 40,
         camera_tag: Optional[str] = "CameraSensor",
+        camera_dtype: str = "uint8",
         transformation_matrix: Optional[np.ndarray] = None,
         material: Optional[Material] = None,
         parent: Optional["Asset"] = None,
@@ -200,7 +205,13 @@ class EgocentricCameraActor(Capsule):
         )
 
         # Add our camera
-        camera = Camera(sensor_tag=camera_tag, width=camera_width, height=camera_height, position=[0, 0.25, 0])
+        camera = Camera(
+            sensor_tag=camera_tag,
+            width=camera_width,
+            height=camera_height,
+            dtype=camera_dtype,
+            position=[0, 0.25, 0],
+        )
         children = self.tree_children
         self.tree_children = children + (camera,)
 
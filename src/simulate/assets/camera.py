@@ -21,6 +21,7 @@ import numpy as np
 
 from ..utils import logging
 from .asset import Asset
+from .sensors import check_sensor_dtype, get_sensor_observation_space
 
 
 logger = logging.get_logger(__name__)
@@ -72,6 +73,9 @@ class Camera(Asset):
             The name of the Camera.
         sensor_tag (`str`, *optional*, defaults to `CameraSensor`):
             The tag of the Camera.
+        dtype (`str`, *optional*, defaults to `"uint8"`):
+            The dtype of the observations of the Camera: `"uint8"` RGB values, or `"float16"`/`"float32"` RGB values
+            normalized to [0, 1].
         position (`List[float]`, *optional*, defaults to `[0.0, 0.0, 0.0]`):
             The position of the Camera.
         rotation (`List[float]`, *optional*, defaults to `[0.0, 0.0, 0.0]`):
@@ -101,6 +105,7 @@ class Camera(Asset):
         ymag: Optional[float] = None,
         name: Optional[str] = None,
         sensor_tag: str = "CameraSensor",
+        dtype: str = "uint8",
         position: Optional[List[float]] = None,
         rotation: Optional[List[float]] = None,
         scaling: Optional[Union[float, List[float]]] = None,
@@ -122,6 +127,8 @@ class Camera(Asset):
 
         self.camera_type = camera_type
         self.sensor_tag = sensor_tag
+        check_sensor_dtype(dtype)
+        self.dtype = dtype
         if camera_type not in ALLOWED_CAMERA_TYPES:
             raise ValueError(f"Camera type {camera_type} is not allowed. Allowed types are: {ALLOWED_CAMERA_TYPES}")
         if camera_type == "perspective":
@@ -147,7 +154,7 @@ class Camera(Asset):
             observation (`spaces.Box`):
                 The observation space of the Camera.
         """
-        return spaces.Box(low=0, high=255, shape=[3, self.height, self.width], dtype=np.uint8)
+        return get_sensor_observation_space([3, self.height, self.width], self.dtype, low=0.0, high=1.0)
 
     def copy(self, with_children: bool = True, **kwargs: Any):
         """
@@ -175,6 +182,7 @@ class Camera(Asset):
             camera_type=self.camera_type,
             xmag=self.xmag,
             ymag=self.ymag,
+            dtype=self.dtype,
         )
 
         if with_children:
@@ -222,6 +230,8 @@ class CameraDistant(Camera):
             The name of the Camera.
         sensor_tag (`str`, *optional*, defaults to `CameraSensor`):
             The tag of the Camera.
+        dtype (`str`, *optional*, defaults to `"uint8"`):
+            The dtype of the observations of the Camera, see `Camera`.
         position (`List[float]`, *optional*, defaults to `[0.0, 5.0, -10.0]`):
             The position of the Camera.
         rotation (`List[float]`, *optional*, defaults to `[0.0, 1.0, 0.0, 0.0]`):
@@ -251,6 +261,7 @@ class CameraDistant(Camera):
         ymag: Optional[float] = None,
         name: Optional[str] = None,
         sensor_tag: str = "CameraSensor",
+        dtype: str = "uint8",
         position: Optional[List[float]] = None,
         rotation: Optional[List[float]] = None,
         scaling: Optional[Union[float, List[float]]] = None,
@@ -267,6 +278,7 @@ class CameraDistant(Camera):
         super().__init__(
             name=name,
             sensor_tag=sensor_tag,
+            dtype=dtype,
             position=position,
             rotation=rotation,
             scaling=scaling,
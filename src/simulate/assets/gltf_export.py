@@ -587,7 +587,7 @@ def add_camera_to_model(
         )
 
     if camera.sensor_tag is not None:
-        gl_camera.extras = {"sensor_tag": camera.sensor_tag}
+        gl_camera.extras = {"sensor_tag": camera.sensor_tag, "sensor_dtype": camera.dtype}
 
     # If we have already created exactly the same camera we avoid double storing
     cached_id = is_data_cached(data=gl_camera.to_json(), cache=cache)
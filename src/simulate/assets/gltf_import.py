@@ -314,6 +314,7 @@ def build_node_tree(
         # Let's add a Camera
         gltf_camera = gltf_model.cameras[gltf_node.camera]
         camera_type = gltf_camera.type
+        camera_extras = gltf_camera.extras if isinstance(gltf_camera.extras, dict) else {}
 
         scene_node = Camera(
             aspect_ratio=gltf_camera.perspective.aspectRatio if camera_type == "perspective" else None,
@@ -323,6 +324,7 @@ def build_node_tree(
             camera_type=camera_type,
             xmag=gltf_camera.orthographic.xmag if camera_type == "orthographic" else None,
             ymag=gltf_camera.orthographic.ymag if camera_type == "orthographic" else None,
+            dtype=camera_extras.get("sensor_dtype", "uint8"),
             **common_kwargs,
         )
     # It is a light
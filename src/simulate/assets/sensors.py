@@ -60,6 +60,72 @@ ALLOWED_STATE_SENSOR_PROPERTIES = {
     "distance": 1,
 }
 
+# The dtypes in which the sensors can send their observations: floats can be sent as float16 or quantized to uint8
+# over a range, and camera pixels can be sent normalized to [0, 1] as floats
+SENSOR_DTYPES = ("float32", "float16", "uint8")
+
+# Raycast observations are normalized distances, 1 for a hit at the sensor and 0 for no hit
+RAYCAST_QUANTIZATION_RANGE = (0.0, 1.0)
+
+
+def check_sensor_dtype(dtype: str, quantization_range: Optional[List[float]] = None):
+    """
+    Check the dtype and quantization range of a sensor.
+
+    Args:
+        dtype (`str`):
+            The dtype of the observations, one of `"float32"`, `"float16"` or `"uint8"`.
+        quantization_range (`List[float]`, *optional*, defaults to `None`):
+            The (low, high) range of the values quantized to [0, 255] with the `"uint8"` dtype.
+    """
+    if dtype not in SENSOR_DTYPES:
+        raise ValueError(f"The sensor dtype {dtype} is not supported, should be one of {SENSOR_DTYPES}")
+    if quantization_range is not None and (
+        len(quantization_range) != 2 or quantization_range[0] >= quantization_range[1]
+    ):
+        raise ValueError(f"The quantization range should be a (low, high) pair, got {quantization_range}")
+
+
+def get_sensor_observation_space(shape: List[int], dtype: str, low: float = -inf, high: float = inf) -> spaces.Box:
+    """
+    Get the observation space of a sensor from the dtype of its observations.
+
+    Args:
+        shape (`List[int]`):
+            The shape of the observations.
+        dtype (`str`):
+            The dtype of the observations.
+        low (`float`, *optional*, defaults to `-inf`):
+            The lower bound of the values, for floats.
+        high (`float`, *optional*, defaults to `inf`):
+            The upper bound of the values, for floats.
+
+    Returns:
+        observation_space (`gym.spaces.Box`):
+            The observation space.
+    """
+    if dtype == "uint8":
+        return spaces.Box(low=0, high=255, shape=shape, dtype=np.uint8)
+    return spaces.Box(low=low, high=high, shape=shape, dtype=np.dtype(dtype))
+
+
+def dequantize(observation: np.ndarray, quantization_range: List[float]) -> np.ndarray:
+    """
+    Map observations quantized to uint8 back to their range.
+
+    Args:
+        observation (`np.ndarray`):
+            The uint8 observations.
+        quantization_range (`List[float]`):
+            The (low, high) range of the sensor.
+
+    Returns:
+        observation (`np.ndarray`):
+            The observations as float32, up to the quantization step of (high - low) / 255.
+    """
+    low, high = quantization_range
+    return low + observation.astype(np.float32) * np.float32((high - low) / 255)
+
 
 def get_state_sensor_n_properties(sensor: Union["StateSensor", "RaycastSensor"]) -> int:
     """
@@ -102,6 +168,12 @@ class StateSensor(Asset, GltfExtensionMixin, gltf_extension_name="HF_state_senso
             ]
         sensor_tag (`str`, *optional*, defaults to `"StateSensor"`):
             Type of sensor. Allowed values are: "position", "velocity", "rotation", "angular_velocity", "distance".
+        dtype (`str`, *optional*, defaults to `"float32"`):
+            The dtype of the observations: `"float32"`, `"float16"` to halve their size, or `"uint8"` to quantize
+            them over `quantization_range`.
+        quantization_range (`List[float]`, *optional*, defaults to `None`):
+            The (low, high) range mapped to [0, 255] with the `"uint8"` dtype, values outside are clipped.
+            Required with the `"uint8"` dtype, see `dequantize` to map the observations back.
 
         name (`str`, *optional*, defaults to `None`):
             Name of the sensor.
@@ -125,6 +197,8 @@ class StateSensor(Asset, GltfExtensionMixin, gltf_extension_name="HF_state_senso
     reference_entity: Optional[Any] = None
     properties: Optional[Union[str, List[str]]] = None
     sensor_tag: str = "StateSensor"
+    dtype: str = "float32"
+    quantization_range: Optional[List[float]] = None
 
     name: InitVar[Optional[str]] = None
     position: InitVar[Optional[List[float]]] = None
@@ -161,6 +235,10 @@ class StateSensor(Asset, GltfExtensionMixin, gltf_extension_name="HF_state_senso
                 f"\nAllowed properties are: {ALLOWED_STATE_SENSOR_PROPERTIES}"
             )
 
+        check_sensor_dtype(self.dtype, self.quantization_range)
+        if self.dtype == "uint8" and self.quantization_range is None:
+            raise ValueError("A StateSensor with the uint8 dtype requires a quantization_range")
+
     @property
     def observation_space(self) -> spaces.Box:
         """
@@ -170,7 +248,7 @@ class StateSensor(Asset, GltfExtensionMixin, gltf_extension_name="HF_state_senso
             observation_space (`gym.spaces.Box`):
                 The observation space of the sensor.
         """
-        return spaces.Box(low=-inf, high=inf, shape=[get_state_sensor_n_properties(self)], dtype=np.float32)
+        return get_sensor_observation_space([get_state_sensor_n_properties(self)], self.dtype)
 
     ##############################
     # Properties copied from Asset()
@@ -366,6 +444,12 @@ class RaycastSensor(Asset, GltfExtensionMixin, gltf_extension_name="HF_raycast_s
             The length of the ray to cast.
         sensor_tag (`str`, *optional*, defaults to `"RaycastSensor"`):
             The tag of the sensor.
+        dtype (`str`, *optional*, defaults to `"float32"`):
+            The dtype of the observations: `"float32"`, `"float16"` to halve their size, or `"uint8"` to quantize
+            them over `quantization_range`.
+        quantization_range (`List[float]`, *optional*, defaults to `None`):
+            The (low, high) range mapped to [0, 255] with the `"uint8"` dtype. Defaults to `[0.0, 1.0]`, the range
+            of the normalized distances.
 
         name (`str`, *optional*, defaults to `None`):
             The name of the sensor.
@@ -391,6 +475,8 @@ class RaycastSensor(Asset, GltfExtensionMixin, gltf_extension_name="HF_raycast_s
     vertical_fov: float = 0.0
     ray_length: float = 100.0
     sensor_tag: str = "RaycastSensor"
+    dtype: str = "float32"
+    quantization_range: Optional[List[float]] = None
 
     name: InitVar[Optional[str]] = None
     position: InitVar[Optional[List[float]]] = None
@@ -417,6 +503,10 @@ class RaycastSensor(Asset, GltfExtensionMixin, gltf_extension_name="HF_raycast_s
             created_from_file=created_from_file,
         )
 
+        check_sensor_dtype(self.dtype, self.quantization_range)
+        if self.dtype == "uint8" and self.quantization_range is None:
+            self.quantization_range = list(RAYCAST_QUANTIZATION_RANGE)
+
     @property
     def observation_space(self) -> spaces.Box:
         """
@@ -426,7 +516,7 @@ class RaycastSensor(Asset, GltfExtensionMixin, gltf_extension_name="HF_raycast_s
             observation_space (`gym.spaces.Box`):
                 The observation space of the sensor.
         """
-        return spaces.Box(low=-inf, high=inf, shape=[self.n_horizontal_rays * self.n_vertical_rays], dtype=np.float32)
+        return get_sensor_observation_space([self.n_horizontal_rays * self.n_vertical_rays], self.dtype)
 
     ##############################
     # Properties copied from Asset()
@@ -33,6 +33,11 @@ class Config(GltfExtensionMixin, gltf_extension_name="HF_config", object_type="s
             Whether to return node data by default from step().
         return_frames (`bool`, *optional*, defaults to `True`):
             Whether to return camera rendering by default from step().
+        node_deltas (`bool`, *optional*, defaults to `False`):
+            Whether to return the node data as deltas, only for the nodes which moved since they were last returned,
+            see `NodeStateTracker`.
+        node_delta_epsilon (`float`, *optional*, defaults to `1e-4`):
+            The change in position, rotation or velocity above which a node is returned again with `node_deltas`.
         node_filter (`List[str]`, *optional*, defaults to `None`):
             If not None, constrain returned nodes to only the provided node names.
         camera_filter (`List[str]`, *optional*, defaults to `None`):
@@ -47,6 +52,8 @@ class Config(GltfExtensionMixin, gltf_extension_name="HF_config", object_type="s
     frame_skip: Optional[int] = None
     return_nodes: Optional[bool] = None
     return_frames: Optional[bool] = None
+    node_deltas: Optional[bool] = None
+    node_delta_epsilon: Optional[float] = None
     node_filter: Optional[List[str]] = None
     camera_filter: Optional[List[str]] = None
     ambient_color: Optional[List[float]] = None
@@ -59,5 +66,8 @@ class Config(GltfExtensionMixin, gltf_extension_name="HF_config", object_type="s
             self.return_nodes = True
         if self.return_frames is None:
             self.return_frames = True
+        if self.node_deltas is None:
+            self.node_deltas = False
+        self.node_delta_epsilon = self.node_delta_epsilon or 1e-4
         self.ambient_color = self.ambient_color or [0.329412, 0.329412, 0.329412]
         self.gravity = self.gravity or [0, -9.81, 0]
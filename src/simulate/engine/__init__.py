@@ -1,6 +1,10 @@
+from .async_engine import AsyncUnityEngine
 from .blender_engine import BlenderEngine
 from .engine import Engine
+from .engine_pool import EnginePool
 from .godot_engine import GodotEngine
+from .mock_engine import MockEngineServer
+from .node_deltas import NodeStateTracker
 from .notebook_engine import NotebookEngine, in_notebook
 from .pyvista_engine import PyVistaEngine
 from .unity_engine import UnityEngine
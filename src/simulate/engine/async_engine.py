@@ -0,0 +1,174 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" asyncio client for the Unity engine."""
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from ..utils import logging
+from .connection import AsyncConnection
+from .unity_engine import SOCKET_TIME_OUT
+
+
+if TYPE_CHECKING:
+    from .unity_engine import UnityEngine
+
+
+logger = logging.get_logger(__name__)
+
+
+class AsyncUnityEngine:
+    """
+    asyncio client of a Unity engine.
+
+    The engine is launched, connected and shown with the blocking `UnityEngine`, then its socket is handed over to
+    the running event loop: commands become awaitable, and a single event loop can drive many engines concurrently,
+    e.g. with `asyncio.gather`. The blocking `UnityEngine` must not be used to send commands anymore.
+
+    The responses are matched to the commands by order: at most one command waits for its response at a time, so the
+    engine must not be pipelined (`pipeline_depth=1`).
+
+    Args:
+        engine (`UnityEngine`):
+            The Unity engine, with its scene already shown.
+        timeout (`float`, *optional*, defaults to `30.0`):
+            The timeout in seconds when waiting for a response of the engine.
+    """
+
+    def __init__(self, engine: "UnityEngine", timeout: Optional[float] = SOCKET_TIME_OUT):
+        if engine.pipeline_depth > 1:
+            raise ValueError(
+                f"AsyncUnityEngine doesn't support pipelined engines, got pipeline_depth={engine.pipeline_depth}."
+            )
+        self.engine = engine
+        self.timeout = timeout
+        self.connection: Optional[AsyncConnection] = None
+
+    async def connect(self) -> "AsyncUnityEngine":
+        """
+        Hand the socket of the engine over to the running event loop.
+
+        Returns:
+            self (`AsyncUnityEngine`):
+                The connected client.
+        """
+        if self.connection is None:
+            self.connection = await AsyncConnection.from_socket(self.engine.client)
+        return self
+
+    async def run_command(self, command: str, wait_for_response: bool = True, **kwargs: Any) -> Union[Dict, str]:
+        """
+        Encode a command and send it to the engine.
+
+        Args:
+            command (`str`):
+                The command to send.
+            wait_for_response (`bool`, *optional*, defaults to `True`):
+                Whether to wait for the response of the engine.
+
+        Returns:
+            response (`Dict` or `str`):
+                The response of the engine.
+        """
+        await self.connect()
+        stats = self.engine._stats
+        with stats.timer("encode"):
+            message = self.engine._encode_command(command, **kwargs)
+        with stats.timer("send"):
+            await self.connection.send(message)
+        if stats.enabled:
+            stats.record("bytes_sent", sum(memoryview(part).nbytes for part in message))
+        if wait_for_response:
+            return await self.get_response()
+
+    async def get_response(self) -> Union[Dict, str]:
+        """
+        Wait for the next response of the engine.
+
+        Returns:
+            response (`Dict` or `str`):
+                The response of the engine.
+        """
+        stats = self.engine._stats
+        with stats.timer("receive"):
+            response = await asyncio.wait_for(self.connection.recv(), self.timeout)
+        if stats.enabled:
+            stats.record("bytes_received", len(response))
+        with stats.timer("decode"):
+            return self.engine._decode_response(response)
+
+    async def step(self, action: Optional[Dict] = None, **kwargs: Any) -> Union[Dict, str]:
+        """
+        Step the environment with the given action.
+
+        Args:
+            action (`Dict`, *optional*, defaults to `None`):
+                The action to take in the environment.
+
+        Returns:
+            response (`Dict` or `str`):
+                The response of the engine.
+        """
+        if action is not None:
+            kwargs.update({"action": action})
+        return await self.run_command("Step", **kwargs)
+
+    async def step_send_async(self, **kwargs: Any):
+        """Send the Step command without waiting for its response."""
+        await self.run_command("Step", wait_for_response=False, **kwargs)
+
+    async def step_recv_async(self) -> Union[Dict, str]:
+        """Wait for the response of the Step command."""
+        return await self.get_response()
+
+    async def reset(
+        self, indices: Optional[List[int]] = None, observe: bool = False, **kwargs: Any
+    ) -> Union[Dict, str]:
+        """
+        Reset the environment, see `UnityEngine.reset`.
+
+        Args:
+            indices (`List[int]`, *optional*, defaults to `None`):
+                The indices of the maps to reset, the whole scene if not specified.
+            observe (`bool`, *optional*, defaults to `False`):
+                Whether to return the observations of the actors after the reset in the same response.
+
+        Returns:
+            response (`Dict` or `str`):
+                The response of the engine.
+        """
+        reset_kwargs = self.engine._get_reset_kwargs(indices, observe, kwargs)
+        if reset_kwargs is not None:
+            return await self.run_command("Reset", **reset_kwargs)
+        await self.run_command("Reset")
+        return await self.step(frame_skip=0, return_frames=True, **kwargs)
+
+    async def close(self):
+        """Close the engine."""
+        if self.connection is None:
+            self.engine.close()
+            return
+        try:
+            await self.run_command("Close", wait_for_response=False)
+        except Exception as e:
+            logger.error(f"Exception sending close message: {e}")
+        await self.connection.close()
+        self.engine._release()
+
+        pooled_engine, self.engine._pooled_engine = self.engine._pooled_engine, None
+        if pooled_engine is not None:
+            # The socket was handed over to the event loop and is closed, the pool replaces the engine
+            pooled_engine.connection = None
+            self.engine.engine_pool.release(pooled_engine, reusable=False)
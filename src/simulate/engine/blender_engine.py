@@ -16,11 +16,12 @@
 import atexit
 import base64
 import json
-import socket
 from typing import TYPE_CHECKING, Any, Dict, Optional, Union
 
 from ..utils import logging
+from .connection import Connection
 from .engine import Engine
+from .transport import create_transport
 
 
 if TYPE_CHECKING:
@@ -46,6 +47,14 @@ class BlenderEngine(Engine):
             The frame to end the simulation at.
         time_step (`float`, *optional*, defaults to `1.0 / 24.0`):
             The time step of the simulation.
+        engine_port (`int`, *optional*, defaults to `55001`):
+            The port to use for the TCP server.
+        engine_transport (`str`, *optional*, defaults to `"tcp"`):
+            The transport to the engine, one of `"tcp"` or `"unix"`.
+            With `"unix"`, Blender connects to the socket path given in its `SIMULATE_SOCKET_PATH` environment variable.
+        engine_socket_path (`str`, *optional*, defaults to `None`):
+            The path of the Unix domain socket with the `"unix"` transport.
+            If not specified, a new path is chosen and logged.
     """
 
     def __init__(
@@ -55,25 +64,24 @@ class BlenderEngine(Engine):
         start_frame: int = 0,
         end_frame: int = 500,
         time_step: float = 1.0 / 24.0,
+        engine_port: int = 55001,
+        engine_transport: str = "tcp",
+        engine_socket_path: Optional[str] = None,
     ):
         super().__init__(scene=scene, auto_update=auto_update)
         self.start_frame = start_frame
         self.end_frame = end_frame
         self.time_step = time_step
 
-        self.host = "127.0.0.1"
-        self.port = 55001
+        self.transport = create_transport(engine_transport, port=engine_port, socket_path=engine_socket_path)
         self._initialize_server()
         atexit.register(self._close)
 
     def _initialize_server(self):
-        """Create TCP socket and listen for connections."""
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.bind((self.host, self.port))
-        logger.info("Server started. Waiting for connection...")
-        self.socket.listen()
-        self.client, self.client_address = self.socket.accept()
-        logger.info(f"Connection from {self.client_address}")
+        """Create the server socket and listen for connections."""
+        self.socket = self.transport.listen()
+        self.client, self.client_address = self.transport.accept()
+        self.connection = Connection(self.client)
 
     def _send_bytes(self, bytes_data: bytes, ack: bool) -> str:
         """
@@ -81,14 +89,14 @@ class BlenderEngine(Engine):
 
         Args:
             bytes_data (`bytes`):
-                The bytes to send.
+                The message to send, the length prefix is added by the connection.
             ack (`bool`):
                 Whether to wait for an acknowledgement.
 
         Returns:
             response (`bytes`): The response from the socket.
         """
-        self.client.sendall(bytes_data)
+        self.connection.send(bytes_data)
         if ack:
             return self._get_response()
 
@@ -96,8 +104,7 @@ class BlenderEngine(Engine):
         """Encode command and send the bytes to the socket"""
         message = json.dumps(command)
         logger.info(f"Sending command: {message}")
-        message_bytes = len(message).to_bytes(4, "little") + bytes(message.encode())
-        return self._send_bytes(message_bytes, ack)
+        return self._send_bytes(message.encode(), ack)
 
     def _get_response(self) -> str:
         """
@@ -106,15 +113,7 @@ class BlenderEngine(Engine):
         Returns:
             response (`str`): The response from the socket.
         """
-        while True:
-            data_length = self.client.recv(4)
-            data_length = int.from_bytes(data_length, "little")
-
-            if data_length:
-                response = ""  # TODO: string concatenation may be slow
-                while len(response) < data_length:
-                    response += self.client.recv(data_length - len(response)).decode()
-                return response
+        return str(self.connection.recv(), "utf-8")
 
     def _send_gltf(self, bytes_data: bytes):
         """
@@ -164,8 +163,8 @@ class BlenderEngine(Engine):
         """Close the socket."""
         command = {"type": "close", "contents": {"message": "close"}}
         self.run_command(command)
-        self.client.close()
-        self.socket.close()
+        self.connection.close()
+        self.transport.close()
 
         try:
             atexit.unregister(self._close)
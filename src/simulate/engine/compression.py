@@ -0,0 +1,277 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Compression of the uint8 sensor buffers (camera images) sent in binary frames.
+
+Each image of a compressed buffer (one per map and actor) is compressed separately, so that the images of all the maps
+can be decompressed in parallel. The modes are:
+
+- `"zlib"`: a raw DEFLATE stream (without the zlib header and checksum),
+- `"lz4"`: an LZ4 block, requires the `lz4` package,
+- `"png"`: an RGB PNG image, requires `Pillow`. Rows are stored bottom-up, as in the buffers of the Unity engine,
+- `"xor_delta"`: the image XOR-ed with the previous image of the same sensor, map and actor, as a raw DEFLATE stream.
+  Consecutive camera images mostly differ by a few pixels, which makes the delta very compressible.
+
+The XOR delta is stateful: the encoder and the decoder both keep the last image of each sensor, until the scene is
+initialized again. Only the buffers of steps are compressed, not the stacked buffers of rollouts.
+"""
+import io
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..utils import is_lz4_available, is_pil_available
+from .protocol import CompressedTensor
+
+
+if is_lz4_available():
+    import lz4.block
+
+if is_pil_available():
+    from PIL import Image
+
+
+ZLIB = "zlib"
+LZ4 = "lz4"
+PNG = "png"
+XOR_DELTA = "xor_delta"
+COMPRESSION_MODES = (ZLIB, LZ4, PNG, XOR_DELTA)
+
+# Key of the compression mode applied to all the uint8 sensors
+ALL_SENSORS = "*"
+
+# Raw DEFLATE streams, as written by the engines
+DEFLATE_WBITS = -15
+DEFLATE_LEVEL = 1
+
+
+def normalize_sensor_compression(sensor_compression: Optional[Union[str, Dict[str, str]]]) -> Dict[str, str]:
+    """
+    Check the compression modes of the sensors.
+
+    Args:
+        sensor_compression (`str` or `Dict[str, str]`, *optional*):
+            A compression mode applied to all the uint8 sensors, or the compression mode of each sensor tag.
+
+    Returns:
+        sensor_compression (`Dict[str, str]`):
+            The compression mode of each sensor tag, `"*"` standing for all the uint8 sensors.
+    """
+    if sensor_compression is None:
+        return {}
+    if isinstance(sensor_compression, str):
+        sensor_compression = {ALL_SENSORS: sensor_compression}
+    for tag, mode in sensor_compression.items():
+        if mode not in COMPRESSION_MODES:
+            raise ValueError(f"Unknown compression mode {mode} for sensor {tag}, should be one of {COMPRESSION_MODES}")
+        if mode == LZ4 and not is_lz4_available():
+            raise ImportError("The lz4 compression requires the lz4 package: `pip install lz4`")
+        if mode == PNG and not is_pil_available():
+            raise ImportError("The png compression requires Pillow: `pip install Pillow`")
+    return dict(sensor_compression)
+
+
+def _deflate(data: Union[bytes, memoryview, np.ndarray]) -> bytes:
+    compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, DEFLATE_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_image(mode: str, image: np.ndarray, previous: Optional[np.ndarray] = None) -> bytes:
+    """
+    Compress an image as the engines do.
+
+    Args:
+        mode (`str`):
+            The compression mode.
+        image (`np.ndarray`):
+            The uint8 image, of shape (3, height, width) for the `"png"` mode.
+        previous (`np.ndarray`, *optional*, defaults to `None`):
+            The previous image of the same sensor, map and actor for the `"xor_delta"` mode, zeros if not specified.
+
+    Returns:
+        chunk (`bytes`):
+            The compressed image.
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    if mode == ZLIB:
+        return _deflate(image)
+    if mode == LZ4:
+        return lz4.block.compress(image, store_size=False)
+    if mode == PNG:
+        output = io.BytesIO()
+        Image.fromarray(np.ascontiguousarray(image.transpose(1, 2, 0)[::-1])).save(
+            output, format="PNG", compress_level=DEFLATE_LEVEL
+        )
+        return output.getvalue()
+    if mode == XOR_DELTA:
+        return _deflate(image if previous is None else np.bitwise_xor(image, previous))
+    raise ValueError(f"Unknown compression mode {mode}, should be one of {COMPRESSION_MODES}")
+
+
+def _decode_image(task: Tuple[str, memoryview, np.ndarray, Optional[np.ndarray]]):
+    """Decompress an image in its slice of the output tensor."""
+    mode, chunk, out, previous = task
+    if mode == PNG:
+        image = np.asarray(Image.open(io.BytesIO(chunk)).convert("RGB"))
+        out[:] = image[::-1].transpose(2, 0, 1)
+        return
+    if mode == LZ4:
+        decoded = lz4.block.decompress(chunk, uncompressed_size=out.nbytes)
+    elif mode in (ZLIB, XOR_DELTA):
+        decoded = zlib.decompress(chunk, DEFLATE_WBITS)
+    else:
+        raise ValueError(f"Unknown compression mode {mode}, should be one of {COMPRESSION_MODES}")
+    if len(decoded) != out.nbytes:
+        raise ValueError(f"Decompressed {len(decoded)} bytes, expected {out.nbytes}")
+    decoded = np.frombuffer(decoded, dtype=np.uint8).reshape(out.shape)
+    if previous is not None:
+        np.bitwise_xor(decoded, previous, out=out)
+    else:
+        out[:] = decoded
+
+
+class FrameDecoder:
+    """
+    Decompress the compressed tensors of the binary frames received from an engine.
+
+    The images of all the maps and actors are decompressed in parallel in a thread pool (the decompressors release the
+    GIL). The decoder keeps the last images of the `"xor_delta"` sensors, it should be `reset` when the scene is
+    initialized again.
+
+    Args:
+        n_threads (`int`, *optional*, defaults to `0`):
+            The number of decompression threads, the images are decompressed in the calling thread if `0`.
+    """
+
+    def __init__(self, n_threads: int = 0):
+        self.n_threads = n_threads
+        self._executor = ThreadPoolExecutor(n_threads, thread_name_prefix="simulate-decoder") if n_threads else None
+        self._previous: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    def decode(self, tensors: Sequence[Tuple[Dict[str, Any], memoryview]]) -> List[np.ndarray]:
+        """
+        Decompress tensors.
+
+        Args:
+            tensors (`Sequence[Tuple[Dict[str, Any], memoryview]]`):
+                The compressed tensors, as tuples of (description in the frame header, payload).
+
+        Returns:
+            arrays (`List[np.ndarray]`):
+                The decompressed tensors.
+        """
+        tasks, arrays, deltas = [], [], []
+        for description, payload in tensors:
+            mode = description["compression"]
+            if description["dtype"] != "uint8":
+                raise ValueError(f"Only uint8 tensors can be compressed, got {description['dtype']}")
+            shape = tuple(description["shape"])
+            chunks = description["chunks"]
+            array = np.empty(shape, dtype=np.uint8)
+            arrays.append(array)
+            if not chunks:
+                continue
+
+            images = array.reshape(len(chunks), *shape[-3:]) if mode == PNG else array.reshape(len(chunks), -1)
+            previous_images = None
+            if mode == XOR_DELTA:
+                key = tuple(description["path"])
+                previous = self._previous.get(key)
+                if previous is None or previous.shape != shape:
+                    previous = np.zeros(shape, dtype=np.uint8)
+                previous_images = previous.reshape(images.shape)
+                deltas.append((key, array))
+
+            offset = 0
+            for index, size in enumerate(chunks):
+                tasks.append(
+                    (
+                        mode,
+                        payload[offset : offset + size],
+                        images[index],
+                        None if previous_images is None else previous_images[index],
+                    )
+                )
+                offset += size
+
+        if self._executor is not None and len(tasks) > 1:
+            # Consume the results to raise the exceptions of the workers
+            for _ in self._executor.map(_decode_image, tasks):
+                pass
+        else:
+            for task in tasks:
+                _decode_image(task)
+
+        # Keep copies, as the returned observations may be modified in place
+        for key, array in deltas:
+            self._previous[key] = array.copy()
+        return arrays
+
+    def reset(self):
+        """Forget the previous images of the `"xor_delta"` sensors."""
+        self._previous = {}
+
+    def close(self):
+        """Stop the decompression threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class SensorCompressor:
+    """
+    Compress the uint8 sensor buffers as the engines do, e.g. for the mock engine.
+
+    Args:
+        sensor_compression (`str` or `Dict[str, str]`, *optional*, defaults to `None`):
+            A compression mode applied to all the uint8 sensors, or the compression mode of each sensor tag.
+    """
+
+    def __init__(self, sensor_compression: Optional[Union[str, Dict[str, str]]] = None):
+        self.sensor_compression = normalize_sensor_compression(sensor_compression)
+        self._previous: Dict[str, np.ndarray] = {}
+
+    def compress(self, tag: str, buffer: np.ndarray) -> Optional[CompressedTensor]:
+        """
+        Compress each image of a (..., 3, height, width) uint8 sensor buffer.
+
+        Args:
+            tag (`str`):
+                The tag of the sensor.
+            buffer (`np.ndarray`):
+                The sensor buffer.
+
+        Returns:
+            tensor (`CompressedTensor`, *optional*):
+                The compressed buffer, or `None` if the sensor isn't compressed.
+        """
+        mode = self.sensor_compression.get(tag, self.sensor_compression.get(ALL_SENSORS))
+        if mode is None or buffer.dtype != np.uint8:
+            return None
+        images = buffer.reshape(-1, *buffer.shape[-3:])
+        previous_images = [None] * len(images)
+        if mode == XOR_DELTA:
+            previous = self._previous.get(tag)
+            if previous is not None and previous.shape == buffer.shape:
+                previous_images = previous.reshape(images.shape)
+            self._previous[tag] = buffer.copy()
+        chunks = [compress_image(mode, image, previous) for image, previous in zip(images, previous_images)]
+        return CompressedTensor("uint8", tuple(buffer.shape), mode, chunks)
+
+    def reset(self):
+        """Forget the previous images of the `"xor_delta"` sensors."""
+        self._previous = {}
@@ -0,0 +1,215 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Length-prefixed message framing shared by the socket engines."""
+import asyncio
+import select
+import socket
+from typing import Sequence, Union
+
+
+HEADER_SIZE = 4  # Messages are prefixed by their length as a little-endian uint32
+INITIAL_BUFFER_SIZE = 1 << 16
+# Below this size, the length prefix and the message are sent in a single call
+SMALL_MESSAGE_SIZE = 1 << 16
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class Connection:
+    """
+    A connection to an engine exchanging length-prefixed messages.
+
+    Messages are received in a preallocated buffer which grows to fit the largest message, so receiving doesn't
+    allocate in the steady state. The received frames are returned as `memoryview` into this buffer: they are only
+    valid until the next call to `recv`, use `copy=True` to get a `bytes` copy which can be kept.
+
+    Args:
+        sock (`socket.socket`):
+            The socket connected to the engine.
+        initial_buffer_size (`int`, *optional*, defaults to `65536`):
+            The initial size of the receive buffer.
+    """
+
+    def __init__(self, sock: socket.socket, initial_buffer_size: int = INITIAL_BUFFER_SIZE):
+        self.socket = sock
+        self._buffer = bytearray(max(initial_buffer_size, HEADER_SIZE))
+        self._view = memoryview(self._buffer)
+
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+
+    def send(self, message: Union[Buffer, Sequence[Buffer]]):
+        """
+        Send a message, prefixed with its length.
+
+        Args:
+            message (`bytes`, `bytearray`, `memoryview` or a sequence of them):
+                The message to send. A message given as a sequence of buffers is sent without joining them, to avoid
+                copying large payloads.
+        """
+        parts = [message] if isinstance(message, (bytes, bytearray, memoryview)) else message
+        message_length = sum(memoryview(part).nbytes for part in parts)
+        header = message_length.to_bytes(HEADER_SIZE, "little")
+        if message_length < SMALL_MESSAGE_SIZE:
+            self.socket.sendall(b"".join([header, *parts]))
+        else:
+            # Avoid copying large messages to prepend the header
+            self.socket.sendall(header)
+            for part in parts:
+                self.socket.sendall(part)
+        self.bytes_sent += HEADER_SIZE + message_length
+        self.messages_sent += 1
+
+    def _recv_exactly(self, n_bytes: int):
+        """Fill the first `n_bytes` of the buffer, looping on partial reads."""
+        received = 0
+        while received < n_bytes:
+            n = self.socket.recv_into(self._view[received:n_bytes], n_bytes - received)
+            if n == 0:
+                raise ConnectionError("Connection closed by the engine")
+            received += n
+        self.bytes_received += n_bytes
+
+    def recv(self, copy: bool = False) -> Union[memoryview, bytes]:
+        """
+        Receive the next non-empty message.
+
+        Args:
+            copy (`bool`, *optional*, defaults to `False`):
+                Whether to return a copy of the message instead of a view into the receive buffer.
+
+        Returns:
+            message (`memoryview` or `bytes`):
+                The message, without its length prefix. Views are only valid until the next call to `recv`.
+        """
+        message_length = 0
+        while message_length == 0:
+            self._recv_exactly(HEADER_SIZE)
+            message_length = int.from_bytes(self._buffer[:HEADER_SIZE], "little")
+
+        if message_length > len(self._buffer):
+            # Grow geometrically so a slowly increasing message size doesn't reallocate at each message
+            self._buffer = bytearray(max(message_length, 2 * len(self._buffer)))
+            self._view = memoryview(self._buffer)
+        self._recv_exactly(message_length)
+        self.messages_received += 1
+
+        message = self._view[:message_length]
+        return bytes(message) if copy else message
+
+    def poll(self, timeout: float = 0.0) -> bool:
+        """
+        Wait for a message to start arriving.
+
+        Args:
+            timeout (`float`, *optional*, defaults to `0.0`):
+                The maximum time to wait, in seconds.
+
+        Returns:
+            readable (`bool`):
+                Whether data can be received without blocking, or the connection was closed by the engine.
+        """
+        # Messages are never read ahead of `recv`, the socket tells whether the next one arrived
+        readable, _, _ = select.select([self.socket], [], [], timeout)
+        return bool(readable)
+
+    def close(self):
+        """Close the socket."""
+        self.socket.close()
+
+
+class AsyncConnection:
+    """
+    An asyncio connection to an engine exchanging length-prefixed messages, the awaitable counterpart of `Connection`.
+
+    Args:
+        reader (`asyncio.StreamReader`):
+            The stream reader of the connection.
+        writer (`asyncio.StreamWriter`):
+            The stream writer of the connection.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+
+    @classmethod
+    async def from_socket(cls, sock: socket.socket) -> "AsyncConnection":
+        """
+        Hand a connected socket over to the running event loop.
+
+        Args:
+            sock (`socket.socket`):
+                The socket connected to the engine (TCP or Unix domain socket). It must not be used directly anymore.
+
+        Returns:
+            connection (`AsyncConnection`):
+                The asyncio connection.
+        """
+        reader, writer = await asyncio.open_connection(sock=sock)
+        return cls(reader, writer)
+
+    async def send(self, message: Union[Buffer, Sequence[Buffer]]):
+        """
+        Send a message, prefixed with its length, and wait until it can be written to the socket.
+
+        Args:
+            message (`bytes`, `bytearray`, `memoryview` or a sequence of them):
+                The message to send.
+        """
+        parts = [message] if isinstance(message, (bytes, bytearray, memoryview)) else message
+        message_length = sum(memoryview(part).nbytes for part in parts)
+        self.writer.write(message_length.to_bytes(HEADER_SIZE, "little"))
+        for part in parts:
+            self.writer.write(part)
+        await self.writer.drain()
+        self.bytes_sent += HEADER_SIZE + message_length
+        self.messages_sent += 1
+
+    async def recv(self) -> bytes:
+        """
+        Receive the next non-empty message.
+
+        Returns:
+            message (`bytes`):
+                The message, without its length prefix.
+        """
+        try:
+            message_length = 0
+            while message_length == 0:
+                message_length = int.from_bytes(await self.reader.readexactly(HEADER_SIZE), "little")
+                self.bytes_received += HEADER_SIZE
+            message = await self.reader.readexactly(message_length)
+        except asyncio.IncompleteReadError as e:
+            raise ConnectionError("Connection closed by the engine") from e
+        self.bytes_received += message_length
+        self.messages_received += 1
+        return message
+
+    async def close(self):
+        """Close the connection."""
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
@@ -16,6 +16,9 @@
 """ A generic engine."""
 
 import typing
+from typing import Dict, Optional, Union
+
+from ..utils.stats import DEFAULT_WINDOW_SIZE, StepStats
 
 
 if typing.TYPE_CHECKING:
@@ -32,11 +35,53 @@ class Engine:
             The scene to simulate.
         auto_update (`bool`, *optional*, defaults to `True`):
             Whether to automatically update the scene when an asset is updated.
+        collect_stats (`bool`, *optional*, defaults to `False`):
+            Whether to record the timings and payload sizes of the commands, see `stats`.
     """
 
-    def __init__(self, scene: "Scene", auto_update: bool = True):
+    def __init__(self, scene: "Scene", auto_update: bool = True, collect_stats: bool = False):
         self._scene = scene
         self.auto_update = auto_update
+        self._stats = StepStats(enabled=collect_stats)
+
+    def enable_stats(self, enabled: bool = True, window_size: int = DEFAULT_WINDOW_SIZE):
+        """
+        Start or stop recording the timings and payload sizes of the commands.
+
+        Args:
+            enabled (`bool`, *optional*, defaults to `True`):
+                Whether to record them.
+            window_size (`int`, *optional*, defaults to `1000`):
+                The number of values kept per phase to compute the percentiles.
+        """
+        self._stats.enabled = enabled
+        if window_size != self._stats.window_size:
+            self._stats.window_size = window_size
+            self._stats.reset()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the recorded timings (in seconds) and payload sizes (in bytes) of the commands, by phase.
+
+        Returns:
+            stats (`Dict[str, Dict[str, float]]`):
+                For each phase, the number of recorded values and the mean, p50, p95, p99 and max of the last ones.
+        """
+        return self._stats.summary()
+
+    def configure_sensor_compression(
+        self, sensor_compression: Optional[Union[str, Dict[str, str]]] = None, decode_threads: Optional[int] = None
+    ):
+        """
+        Configure the compression of the uint8 sensor buffers, before the scene is shown.
+
+        Args:
+            sensor_compression (`str` or `Dict[str, str]`, *optional*, defaults to `None`):
+                A compression mode applied to all the uint8 sensors, or the compression mode of each sensor tag.
+            decode_threads (`int`, *optional*, defaults to `None`):
+                The number of threads decompressing the images.
+        """
+        raise NotImplementedError(f"{self} doesn't support sensor compression.")
 
     def update_asset(self, asset_node: "Asset"):
         """Add an asset or update its location and all its children in the scene."""
@@ -0,0 +1,311 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" A pool of Unity engine processes, reused from one scene to the next."""
+import atexit
+import json
+import queue
+import subprocess
+import threading
+from typing import List, Optional
+
+from ..utils import logging
+from .connection import Connection
+from .transport import Transport, create_transport
+from .unity_engine import SOCKET_TIME_OUT, UnityEngine, launch_executable
+
+
+logger = logging.get_logger(__name__)
+
+
+CLOSE_TIME_OUT = 10.0  # Time given to the engine processes to quit after the Close command, in seconds
+CONNECT_TIME_OUT = 120.0  # Time given to the engine processes to start and connect, in seconds
+MAX_CONNECT_ATTEMPTS = 3  # Number of processes launched in a slot of the pool before giving up
+
+
+class PooledEngine:
+    """
+    An engine process of an `EnginePool`, with its transport and its connection.
+
+    Args:
+        index (`int`):
+            The index of the engine in the pool, which gives its port when it is started separately.
+        transport (`Transport`):
+            The listening transport the engine connects to.
+        proc (`subprocess.Popen`, *optional*, defaults to `None`):
+            The process of the engine, `None` if it is started separately (e.g. the editor).
+    """
+
+    def __init__(self, index: int, transport: Transport, proc: Optional[subprocess.Popen] = None):
+        self.index = index
+        self.transport = transport
+        self.proc = proc
+        self.client = None
+        self.client_address = None
+        self.connection: Optional[Connection] = None
+        self.n_scenes = 0
+
+    def connect(self, timeout: Optional[float] = None):
+        """
+        Wait for the engine to connect, if it isn't connected yet. Raises a `TimeoutError` if the engine doesn't
+        connect in time, and a `ConnectionError` if its process exits first.
+
+        Args:
+            timeout (`float`, *optional*, defaults to `None`):
+                The maximum time to wait for the engine, in seconds. Waits indefinitely if not specified.
+        """
+        if self.connection is None:
+            self.client, self.client_address = self.transport.accept(timeout=timeout, proc=self.proc)
+            self.client.settimeout(SOCKET_TIME_OUT)
+            self.connection = Connection(self.client)
+
+    def is_alive(self) -> bool:
+        """Whether the process of the engine is still running."""
+        return self.proc is None or self.proc.poll() is None
+
+    def close(self):
+        """Ask the engine to quit, and close the connection and the transport."""
+        connected = self.connection is not None
+        if connected:
+            try:
+                self.connection.send([json.dumps({"type": "Close"}).encode()])
+            except Exception as e:
+                logger.error(f"Exception sending close message: {e}")
+            self.connection.close()
+            self.connection = None
+        self.transport.close()
+
+        if self.proc is not None:
+            if not connected and self.proc.poll() is None:
+                # The engine never connected, it can't be asked to quit
+                logger.warning(f"The engine {self.proc.pid} didn't connect, killing it.")
+                self.proc.kill()
+            try:
+                self.proc.wait(timeout=CLOSE_TIME_OUT)
+            except subprocess.TimeoutExpired:
+                logger.warning(f"The engine {self.proc.pid} didn't quit, killing it.")
+                self.proc.kill()
+                self.proc.wait()
+
+
+class EnginePool:
+    """
+    A pool of Unity engine processes, launched ahead of time and reused from one scene to the next.
+
+    Launching a Unity executable takes seconds, usually much longer than simulating a short-lived scene. The engines
+    of the pool are all launched when the pool is created, and scenes created with `engine_pool=pool` take one of
+    them instead of launching their own. When the scene is closed, the engine unloads it and goes back to the pool,
+    ready for the next scene. Engines which can't unload scenes (older builds) are closed and replaced by a new
+    process, launched in the background.
+
+    Example:
+
+    ```python
+    with sm.EnginePool(n_engines=4, engine_headless=True) as pool:
+        for scene_id in range(100):
+            scene = sm.Scene(engine="unity", engine_pool=pool)
+            ...
+            scene.show()
+            scene.step()
+            scene.close()  # the engine goes back to the pool
+    ```
+
+    Args:
+        n_engines (`int`, *optional*, defaults to `1`):
+            The number of engine processes. Scenes wait for an engine when all of them are in use.
+        engine_exe (`str`, *optional*, defaults to `""`):
+            The path to the Unity executable.
+            If not specified, the Unity executable will be downloaded from Hugging Face Hub.
+            If `None`, the engines are started separately (e.g. mock engines in tests) and connect to consecutive
+            ports starting from `engine_port`.
+        engine_host (`str`, *optional*, defaults to `"127.0.0.1"`):
+            The host to connect to.
+        engine_port (`int`, *optional*, defaults to `55001`):
+            The port to connect to. Each engine uses the first free port from this one.
+        engine_transport (`str`, *optional*, defaults to `"tcp"`):
+            The transport to the engines, one of `"tcp"` or `"unix"`.
+        engine_headless (`bool`, *optional*, defaults to `False`):
+            Whether to run the Unity executables in headless mode.
+        max_scenes_per_engine (`int`, *optional*, defaults to `None`):
+            The number of scenes after which an engine process is replaced by a new one, e.g. to bound the memory
+            leaked by long running engines. Engines are reused indefinitely if not specified.
+        connect_timeout (`float`, *optional*, defaults to `120.0`):
+            The time given to an engine to start and connect, in seconds. Waits indefinitely if `None`. An engine
+            which doesn't connect in time or exits before connecting is replaced by a new process, up to
+            `MAX_CONNECT_ATTEMPTS` times in a row before raising a `ConnectionError`.
+    """
+
+    def __init__(
+        self,
+        n_engines: int = 1,
+        engine_exe: Optional[str] = "",
+        engine_host: str = "127.0.0.1",
+        engine_port: int = 55001,
+        engine_transport: str = "tcp",
+        engine_headless: bool = False,
+        max_scenes_per_engine: Optional[int] = None,
+        connect_timeout: Optional[float] = CONNECT_TIME_OUT,
+    ):
+        if n_engines < 1:
+            raise ValueError(f"n_engines should be at least 1, got {n_engines}")
+        if engine_exe is None and engine_transport != "tcp":
+            raise ValueError("Engines started separately (engine_exe=None) can only connect with the tcp transport.")
+        if engine_exe == "":
+            engine_exe = UnityEngine._get_unity_from_hub()
+
+        self.n_engines = n_engines
+        self.engine_exe = engine_exe
+        self.engine_host = engine_host
+        self.engine_port = engine_port
+        self.engine_transport = engine_transport
+        self.engine_headless = engine_headless
+        self.max_scenes_per_engine = max_scenes_per_engine
+        self.connect_timeout = connect_timeout
+
+        self._lock = threading.Lock()
+        self._engines: List[PooledEngine] = []
+        self._idle_engines = queue.Queue()
+        self._closed = False
+
+        # All the processes start in parallel, before waiting for the first one to connect
+        engines = [self._launch(index) for index in range(n_engines)]
+        try:
+            for engine in engines:
+                self._idle_engines.put(self._connect(engine))
+        except ConnectionError:
+            self.close()
+            raise
+
+        atexit.register(self.close)
+
+    def _launch(self, index: int) -> PooledEngine:
+        """Launch the engine of a slot of the pool, without waiting for it to connect."""
+        transport = create_transport(
+            self.engine_transport,
+            host=self.engine_host,
+            port=self.engine_port if self.engine_exe is not None else self.engine_port + index,
+            find_free_port=self.engine_exe is not None,
+        )
+        transport.listen()
+        proc = None
+        if self.engine_exe is not None:
+            logger.info(f"Starting Unity executable {self.engine_exe}...")
+            proc = launch_executable(self.engine_exe, args=transport.engine_args(), headless=self.engine_headless)
+        engine = PooledEngine(index, transport, proc)
+        with self._lock:
+            self._engines.append(engine)
+        return engine
+
+    def _connect(self, engine: PooledEngine) -> PooledEngine:
+        """
+        Wait for an engine to connect, replacing its process when it exits or doesn't connect in time.
+
+        Returns:
+            engine (`PooledEngine`):
+                The connected engine, either the given one or the one launched in its slot.
+        """
+        for attempt in range(1, MAX_CONNECT_ATTEMPTS + 1):
+            try:
+                engine.connect(timeout=self.connect_timeout)
+                return engine
+            except (TimeoutError, ConnectionError) as e:
+                self._discard(engine)
+                if attempt == MAX_CONNECT_ATTEMPTS:
+                    raise ConnectionError(
+                        f"The engine {engine.index} of the pool failed to connect {attempt} times in a row."
+                    ) from e
+                logger.warning(f"The engine {engine.index} of the pool failed to connect ({e}), launching a new one.")
+                engine = self._launch(engine.index)
+
+    def _discard(self, engine: PooledEngine):
+        """Remove an engine from the pool and close it."""
+        with self._lock:
+            if engine in self._engines:
+                self._engines.remove(engine)
+        engine.close()
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledEngine:
+        """
+        Take an engine from the pool, waiting for one to be released if they are all in use.
+
+        Args:
+            timeout (`float`, *optional*, defaults to `None`):
+                The maximum time to wait for an engine, in seconds. Waits indefinitely if not specified.
+
+        Returns:
+            engine (`PooledEngine`):
+                The connected engine, with no scene loaded.
+        """
+        if self._closed:
+            raise RuntimeError("The engine pool is closed.")
+        try:
+            engine = self._idle_engines.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No engine of the pool was released after {timeout} seconds.")
+        index = engine.index
+        try:
+            engine = self._connect(engine)
+        except ConnectionError:
+            # The slot gets a new process for the next scenes
+            self._idle_engines.put(self._launch(index))
+            raise
+        engine.n_scenes += 1
+        return engine
+
+    def release(self, engine: PooledEngine, reusable: bool = True):
+        """
+        Give an engine back to the pool, once its scene is unloaded.
+
+        Args:
+            engine (`PooledEngine`):
+                The engine taken with `acquire`.
+            reusable (`bool`, *optional*, defaults to `True`):
+                Whether the engine unloaded its scene and can be used for the next one. Otherwise, the engine is closed
+                and a new process is launched in its place.
+        """
+        if self._closed:
+            engine.close()
+            return
+        if self.max_scenes_per_engine is not None and engine.n_scenes >= self.max_scenes_per_engine:
+            reusable = False
+        if reusable and engine.is_alive():
+            self._idle_engines.put(engine)
+            return
+
+        logger.info("Replacing an engine of the pool by a new process.")
+        self._discard(engine)
+        # The new engine connects when it is acquired, its startup overlaps with the scenes of the other engines
+        self._idle_engines.put(self._launch(engine.index))
+
+    def close(self):
+        """Close all the engines of the pool, including the ones still in use."""
+        if self._closed:
+            return
+        self._closed = True
+        with self._lock:
+            engines, self._engines = self._engines, []
+        for engine in engines:
+            engine.close()
+
+        try:
+            atexit.unregister(self.close)
+        except Exception as e:
+            logger.error(f"Exception unregistering close method: {e}")
+
+    def __enter__(self) -> "EnginePool":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -16,11 +16,12 @@
 import atexit
 import base64
 import json
-import socket
 from typing import TYPE_CHECKING, Any, Dict, Optional, Union
 
 from ..utils import logging
+from .connection import Connection
 from .engine import Engine
+from .transport import create_transport
 
 
 if TYPE_CHECKING:
@@ -48,6 +49,9 @@ class GodotEngine(Engine):
             The time step to use for the simulation.
         engine_port (`int`, *optional*, defaults to `55001`):
             The port to use for the TCP server.
+        engine_transport (`str`, *optional*, defaults to `"tcp"`):
+            The transport to the engine. Only `"tcp"` is supported: Godot 4 streams can't connect to Unix domain
+            sockets.
     """
 
     def __init__(
@@ -58,7 +62,13 @@ class GodotEngine(Engine):
         end_frame: int = 500,
         time_step: float = 1 / 24.0,
         engine_port: int = 55001,
+        engine_transport: str = "tcp",
     ):
+        if engine_transport != "tcp":
+            raise ValueError(
+                f"The Godot engine only supports the tcp transport, got {engine_transport}: Godot 4 streams can't "
+                "connect to Unix domain sockets."
+            )
         super().__init__(scene=scene, auto_update=auto_update)
         self.start_frame = start_frame
         self.end_frame = end_frame
@@ -67,21 +77,17 @@ class GodotEngine(Engine):
         self.action_space = None
         self.observation_space = None
 
-        self.host = "127.0.0.1"
-        self.port = engine_port
+        self.transport = create_transport(engine_transport, port=engine_port)
         self._initialize_server()
         atexit.register(self._close)
 
         self._map_pool = False
 
     def _initialize_server(self):
-        """Create TCP socket and listen for connections."""
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.bind((self.host, self.port))
-        logger.info("Server started. Waiting for connection...")
-        self.socket.listen()
-        self.client, self.client_address = self.socket.accept()
-        logger.info(f"Connection from {self.client_address}")
+        """Create the server socket and listen for connections."""
+        self.socket = self.transport.listen()
+        self.client, self.client_address = self.transport.accept()
+        self.connection = Connection(self.client)
 
     def _send_bytes(self, bytes_data: bytes, ack: bool) -> str:
         """
@@ -89,7 +95,7 @@ class GodotEngine(Engine):
 
         Args:
             bytes_data (`bytes`):
-                The bytes to send.
+                The message to send, the length prefix is added by the connection.
             ack (`bool`):
                 Whether to wait for an acknowledgement.
 
@@ -97,7 +103,7 @@ class GodotEngine(Engine):
             response (`bytes`):
                 The response from the socket.
         """
-        self.client.sendall(bytes_data)
+        self.connection.send(bytes_data)
         if ack:
             return self._get_response()
 
@@ -113,9 +119,7 @@ class GodotEngine(Engine):
             response (`Dict` or `str`):
                 The response from the socket.
         """
-        message = json.dumps({"type": command, **kwargs})
-        message_bytes = len(message).to_bytes(4, "little") + bytes(message.encode())
-        self.client.sendall(message_bytes)
+        self.connection.send(json.dumps({"type": command, **kwargs}).encode())
         response = self._get_response()
         try:
             return json.loads(response)
@@ -131,9 +135,7 @@ class GodotEngine(Engine):
             command (`str`):
                 The command to send.
         """
-        message = json.dumps({"type": command, **kwargs})
-        message_bytes = len(message).to_bytes(4, "little") + bytes(message.encode())
-        self.client.sendall(message_bytes)
+        self.connection.send(json.dumps({"type": command, **kwargs}).encode())
 
     def _get_response(self) -> str:
         """
@@ -143,15 +145,7 @@ class GodotEngine(Engine):
             response (`str`):
                 The response from the socket.
         """
-        while True:
-            data_length = self.client.recv(4)
-            data_length = int.from_bytes(data_length, "little")
-
-            if data_length:
-                response = ""  # TODO: string concatenation may be slow
-                while len(response) < data_length:
-                    response += self.client.recv(data_length - len(response)).decode()
-                return response
+        return str(self.connection.recv(), "utf-8")
 
     def get_response_async(self) -> Union[Dict, str]:
         """
@@ -220,8 +214,8 @@ class GodotEngine(Engine):
             self.run_command("close")
         except Exception as e:
             logger.error(f"Exception sending close message: {e}")
-        self.client.close()
-        self.socket.close()
+        self.connection.close()
+        self.transport.close()
         try:
             atexit.unregister(self._close)
         except Exception as e:
@@ -0,0 +1,554 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" A pure-Python stand-in for the Unity engine, to test and benchmark the python side without a Unity build."""
+import base64
+import json
+import multiprocessing
+import signal
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..assets.sensors import ALLOWED_STATE_SENSOR_PROPERTIES
+from ..utils import logging
+from .compression import SensorCompressor
+from .connection import Connection
+from .node_deltas import DEFAULT_EPSILON, NODE_DELTAS, STATE_SIZE, NodeDeltaEncoder
+from .protocol import (
+    BINARY_ACTION_FEATURE,
+    BINARY_RESPONSE_FEATURE,
+    BINARY_SCENE_FEATURE,
+    COMPRESSION_FEATURE,
+    REQUEST_ID_FEATURE,
+    RESET_OBSERVATIONS_FEATURE,
+    decode_binary_frame,
+    encode_binary_frame_parts,
+    is_binary_frame,
+)
+
+
+logger = logging.get_logger(__name__)
+
+
+SUPPORTED_PROTOCOL_FEATURES = [
+    BINARY_RESPONSE_FEATURE,
+    BINARY_ACTION_FEATURE,
+    BINARY_SCENE_FEATURE,
+    REQUEST_ID_FEATURE,
+    COMPRESSION_FEATURE,
+    RESET_OBSERVATIONS_FEATURE,
+]
+
+CONNECT_TIME_OUT = 30.0
+CONNECT_RETRIES_DELAY = 0.05
+
+# Size of the camera frames when the glTF camera doesn't specify it, as in `Camera`
+DEFAULT_CAMERA_SIZE = 256
+
+# A sensor: its tag, the shape of its observation for one actor and the dtype in which it is sent
+SensorSpec = Tuple[str, Tuple[int, ...], str]
+
+
+class MockEngineServer:
+    """
+    A pure-Python stand-in for the Unity engine, speaking the same protocol over the same framing.
+
+    The mock engine connects to a `UnityEngine` started with `engine_exe=None`, and answers its commands without
+    simulating anything: steps return sensor, reward and done buffers with the shapes the Unity engine would send for
+    the shown scene (its actors, sensors, maps and `n_show`), filled with synthetic values. This allows to test and
+    benchmark the python side of the pipeline in isolation, e.g. in CI. With the `node_deltas` config, the actors
+    drift randomly and are returned as node deltas, the other nodes stay still.
+
+    Example:
+
+    ```python
+    server = MockEngineServer(port=55001, latency=0.005).start()
+    scene = sm.Scene(engine="unity", engine_exe=None, engine_port=55001)
+    ```
+
+    Args:
+        host (`str`, *optional*, defaults to `"127.0.0.1"`):
+            The host of the `UnityEngine` to connect to.
+        port (`int`, *optional*, defaults to `55001`):
+            The port of the `UnityEngine` to connect to.
+        socket_path (`str`, *optional*, defaults to `None`):
+            The path of the Unix domain socket of a `UnityEngine` using the `"unix"` transport.
+            If specified, `host` and `port` are ignored.
+        latency (`float`, *optional*, defaults to `0.0`):
+            The artificial compute time of each step, in seconds.
+        episode_length (`int`, *optional*, defaults to `None`):
+            The number of steps after which the episodes of the maps are done (and reset). Episodes never end if not
+            specified.
+        protocol_features (`List[str]`, *optional*, defaults to all the supported features):
+            The protocol features the mock engine accepts during the handshake, e.g. `[]` to mimic an old build
+            exchanging JSON only.
+        seed (`int`, *optional*, defaults to `None`):
+            The seed of the synthetic sensor values and rewards.
+        fail_after_steps (`int`, *optional*, defaults to `None`):
+            The number of steps after which the mock engine fails, to test the recovery from engine failures. Never
+            fails if not specified.
+        failure (`str`, *optional*, defaults to `"crash"`):
+            How the mock engine fails: `"crash"` closes the connection, `"hang"` stops answering.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 55001,
+        socket_path: Optional[str] = None,
+        latency: float = 0.0,
+        episode_length: Optional[int] = None,
+        protocol_features: Optional[List[str]] = None,
+        seed: Optional[int] = None,
+        fail_after_steps: Optional[int] = None,
+        failure: str = "crash",
+    ):
+        if failure not in ("crash", "hang"):
+            raise ValueError(f"failure should be 'crash' or 'hang', got {failure}")
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.latency = latency
+        self.episode_length = episode_length
+        self.supported_protocol_features = (
+            SUPPORTED_PROTOCOL_FEATURES if protocol_features is None else list(protocol_features)
+        )
+        self.seed = seed
+        self.fail_after_steps = fail_after_steps
+        self.failure = failure
+
+        self.protocol_features = set()
+        self.sensor_specs: List[SensorSpec] = []
+        self.n_maps = 0
+        self.n_actors = 0
+        self.n_steps = 0
+        self.n_scenes = 0
+        self._rng = np.random.default_rng(seed)
+        self._sensor_buffers: Dict[str, np.ndarray] = {}
+        self._reward_buffer = None
+        self._done_buffer = None
+        self._episode_steps = None
+        self._compressor = SensorCompressor()
+        self._config: Dict[str, Any] = {}
+        self._node_names: List[str] = []
+        self._node_states = np.zeros((0, STATE_SIZE), dtype=np.float32)
+        self._actor_nodes = np.zeros(0, dtype=np.int64)
+        self._node_encoder = NodeDeltaEncoder()
+        self._runner: Optional[Union[threading.Thread, multiprocessing.Process]] = None
+
+    def start(self, process: bool = False) -> "MockEngineServer":
+        """
+        Serve in the background, until the engine is closed.
+
+        Args:
+            process (`bool`, *optional*, defaults to `False`):
+                Whether to serve from a separate process instead of a thread, so that the mock engine doesn't compete
+                with the python side for the GIL when benchmarking.
+
+        Returns:
+            self (`MockEngineServer`):
+                The started mock engine.
+        """
+        if process:
+            self._runner = multiprocessing.Process(target=self._serve_process, daemon=True)
+        else:
+            self._runner = threading.Thread(target=self.serve, daemon=True)
+        self._runner.start()
+        return self
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait until the mock engine started with `start` is closed."""
+        if self._runner is not None:
+            self._runner.join(timeout)
+
+    def connect(self, timeout: float = CONNECT_TIME_OUT) -> socket.socket:
+        """
+        Connect to the `UnityEngine`, waiting for it to listen.
+
+        Args:
+            timeout (`float`, *optional*, defaults to `30.0`):
+                The maximum time to wait for the `UnityEngine`, in seconds.
+
+        Returns:
+            socket (`socket.socket`):
+                The socket connected to the `UnityEngine`.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if self.socket_path is None:
+                    sock = socket.create_connection((self.host, self.port))
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    return sock
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(self.socket_path)
+                except OSError:
+                    sock.close()
+                    raise
+                return sock
+            except (ConnectionRefusedError, FileNotFoundError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(CONNECT_RETRIES_DELAY)
+
+    def _serve_process(self):
+        # The handlers installed by the engines of the parent process (e.g. to close them) are inherited by fork
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        self.serve()
+
+    def serve(self):
+        """Connect to the `UnityEngine` and answer its commands, until it is closed."""
+        connection = Connection(self.connect())
+        try:
+            while True:
+                try:
+                    message = connection.recv()
+                except ConnectionError:
+                    break
+                command = (
+                    decode_binary_frame(bytearray(message)) if is_binary_frame(message) else json.loads(bytes(message))
+                )
+                command_type = command.pop("type", None)
+                if command_type == "Close":
+                    break
+                if (
+                    command_type in ("Step", "Rollout")
+                    and self.fail_after_steps is not None
+                    and self.n_steps >= self.fail_after_steps
+                ):
+                    if self.failure == "crash":
+                        break
+                    continue  # Hang: keep reading the commands without answering them
+                response = self.run_command(command_type, command)
+                connection.send(response)
+        finally:
+            connection.close()
+
+    def run_command(self, command_type: str, kwargs: Dict[str, Any]) -> Union[bytes, List[Union[bytes, memoryview]]]:
+        """
+        Answer a command.
+
+        Args:
+            command_type (`str`):
+                The type of the command, e.g. `"Step"`.
+            kwargs (`Dict[str, Any]`):
+                The arguments of the command.
+
+        Returns:
+            response (`bytes` or `List[Union[bytes, memoryview]]`):
+                The message to send back.
+        """
+        handlers = {
+            "Handshake": self._handshake,
+            "Initialize": self._initialize,
+            "Unload": self._unload,
+            "Reset": self._reset,
+            "Step": self._step,
+            "Rollout": self._rollout,
+        }
+        if command_type not in handlers:
+            logger.warning(f"Unknown command: {command_type}")
+            return f"Unknown command: {command_type}".encode()
+
+        response = handlers[command_type](kwargs)
+        if isinstance(response, dict):
+            if "request_id" in kwargs and REQUEST_ID_FEATURE in self.protocol_features:
+                response["request_id"] = kwargs["request_id"]
+            return json.dumps(response).encode()
+        return response
+
+    def _handshake(self, kwargs: Dict[str, Any]) -> Dict:
+        requested_features = kwargs.get("protocol_features", [])
+        self.protocol_features = set(requested_features) & set(self.supported_protocol_features)
+        return {"protocol_features": sorted(self.protocol_features)}
+
+    def _initialize(self, kwargs: Dict[str, Any]) -> Dict:
+        if "glb" in kwargs:
+            glb = np.asarray(kwargs["glb"]).tobytes()
+        else:
+            glb = base64.b64decode(kwargs["b64bytes"])
+        gltf = read_glb_json(glb)
+        self.sensor_specs, self.n_maps, self.n_actors = get_sensor_specs(
+            gltf, maps=kwargs.get("maps"), n_show=kwargs.get("n_show", 1)
+        )
+        self._initialize_nodes(gltf)
+
+        shape = (self.n_maps, self.n_actors)
+        self._sensor_buffers = {
+            tag: np.zeros((*shape, *sensor_shape), dtype=dtype) for tag, sensor_shape, dtype in self.sensor_specs
+        }
+        self._reward_buffer = np.zeros((*shape, 1), dtype=np.float32)
+        self._done_buffer = np.zeros((*shape, 1), dtype=np.float32)
+        self._episode_steps = np.zeros(self.n_maps, dtype=np.int64)
+        self._compressor = SensorCompressor(
+            kwargs.get("sensor_compression") if COMPRESSION_FEATURE in self.protocol_features else None
+        )
+        self.n_scenes += 1
+        return {}
+
+    def _initialize_nodes(self, gltf: Dict[str, Any]):
+        """Read the config and the initial state of the nodes of the scene."""
+        self._config = {**gltf.get("extensions", {}).get("HF_config", {})}
+        nodes = gltf.get("nodes", [])
+        self._node_names = [node.get("name", "") for node in nodes]
+        self._node_states = np.zeros((len(nodes), STATE_SIZE), dtype=np.float32)
+        for index, node in enumerate(nodes):
+            self._node_states[index, 0:3] = node.get("translation", [0.0, 0.0, 0.0])
+            self._node_states[index, 3:7] = node.get("rotation", [0.0, 0.0, 0.0, 1.0])
+        self._actor_nodes = np.array(
+            [index for index, node in enumerate(nodes) if node.get("extras", {}).get("is_actor")], dtype=np.int64
+        )
+        self._node_encoder = NodeDeltaEncoder(self._config.get("node_delta_epsilon", DEFAULT_EPSILON))
+
+    def _unload(self, kwargs: Dict[str, Any]) -> Dict:
+        """Forget the scene and keep serving, as the Unity engine does for the scenes of an `EnginePool`."""
+        self.sensor_specs = []
+        self.n_maps = 0
+        self.n_actors = 0
+        self._sensor_buffers = {}
+        self._reward_buffer = None
+        self._done_buffer = None
+        self._episode_steps = None
+        self._initialize_nodes({})
+        return {}
+
+    def _reset(self, kwargs: Dict[str, Any]) -> Union[Dict, List[Union[bytes, memoryview]]]:
+        if RESET_OBSERVATIONS_FEATURE not in self.protocol_features:
+            kwargs = {}
+        # The maps at the given indices only, all of them if not specified
+        maps = kwargs.get("indices", slice(None))
+        if self._episode_steps is not None:
+            self._episode_steps[maps] = 0
+        if not kwargs.get("observe"):
+            return {}
+
+        # As the Unity engine, the observations are returned without the rewards, dones and nodes
+        self._fill_sensor_buffers(kwargs, maps)
+        buffers = {("actor_sensor_buffers", tag): buffer for tag, buffer in self._requested_buffers(kwargs).items()}
+        return self._event_response({**kwargs, "return_nodes": False}, buffers)
+
+    def _simulate_step(self, kwargs: Dict[str, Any]):
+        """Wait for the artificial compute time and fill the buffers with synthetic values."""
+        # Steps with frame_skip=0 only read the observations (e.g. after a reset), the simulation doesn't advance
+        advance = kwargs.get("frame_skip", 1) != 0
+        if advance and self.latency > 0:
+            time.sleep(self.latency)
+        self.n_steps += 1
+        if advance and len(self._actor_nodes):
+            velocities = self._rng.normal(scale=0.1, size=(len(self._actor_nodes), 3)).astype(np.float32)
+            self._node_states[self._actor_nodes, 7:10] = velocities
+            self._node_states[self._actor_nodes, 0:3] += velocities * kwargs.get("time_step", 0.02)
+        if self._episode_steps is None or self.n_maps == 0:
+            return
+
+        self._fill_sensor_buffers(kwargs)
+        self._rng.random(out=self._reward_buffer, dtype=np.float32)
+
+        self._done_buffer.fill(0.0)
+        if advance:
+            self._episode_steps += 1
+            if self.episode_length is not None:
+                done = self._episode_steps >= self.episode_length
+                self._done_buffer[done] = 1.0
+                self._episode_steps[done] = 0
+
+    def _fill_sensor_buffers(self, kwargs: Dict[str, Any], maps: Union[slice, List[int]] = slice(None)):
+        """Fill the buffers of the requested sensors of some maps with synthetic values."""
+        if self._episode_steps is None or self.n_maps == 0:
+            return
+        for buffer in self._requested_buffers(kwargs).values():
+            if buffer.dtype == np.uint8:
+                buffer[maps] = self.n_steps % 256
+            elif buffer.dtype == np.float32 and isinstance(maps, slice):
+                self._rng.random(out=buffer, dtype=np.float32)
+            else:
+                buffer[maps] = self._rng.random(buffer[maps].shape, dtype=np.float32)
+
+    def _requested_buffers(self, kwargs: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """The buffers of the sensors requested by a step, all of them if not specified."""
+        sensors = kwargs.get("sensors")
+        if sensors is None:
+            return self._sensor_buffers
+        return {tag: buffer for tag, buffer in self._sensor_buffers.items() if tag in sensors}
+
+    def _buffers(self, kwargs: Dict[str, Any]) -> Dict[Tuple[str, ...], np.ndarray]:
+        """The buffers of the current step, by path in the response."""
+        if self._episode_steps is None or self.n_maps == 0:
+            return {}
+        buffers = {("actor_sensor_buffers", tag): buffer for tag, buffer in self._requested_buffers(kwargs).items()}
+        buffers[("actor_reward_buffer",)] = self._reward_buffer
+        buffers[("actor_done_buffer",)] = self._done_buffer
+        return buffers
+
+    def _step(self, kwargs: Dict[str, Any]) -> Union[Dict, List[Union[bytes, memoryview]]]:
+        self._simulate_step(kwargs)
+        return self._event_response(kwargs, self._buffers(kwargs))
+
+    def _rollout(self, kwargs: Dict[str, Any]) -> Union[Dict, List[Union[bytes, memoryview]]]:
+        actions = kwargs.get("action")
+        if isinstance(actions, dict) and actions:
+            n_steps = len(next(iter(actions.values())))
+        else:
+            n_steps = kwargs.get("n_steps", 1)
+
+        stacked = {}
+        for t in range(n_steps):
+            self._simulate_step(kwargs)
+            for path, buffer in self._buffers(kwargs).items():
+                if path not in stacked:
+                    stacked[path] = np.empty((n_steps, *buffer.shape), dtype=buffer.dtype)
+                stacked[path][t] = buffer
+        # As the Unity engine, the stacked buffers of rollouts aren't compressed
+        return self._event_response(kwargs, stacked, compress=False)
+
+    def _event_response(
+        self, kwargs: Dict[str, Any], buffers: Dict[Tuple[str, ...], np.ndarray], compress: bool = True
+    ) -> Union[Dict, List[Union[bytes, memoryview]]]:
+        """Format the event data of a step, as a binary frame if negotiated and as Unity's JSON otherwise."""
+        data = {"nodes": {}, "frames": {}}
+        node_deltas = None
+        if kwargs.get("return_nodes", self._config.get("return_nodes", True)) and kwargs.get(
+            "node_deltas", self._config.get("node_deltas", False)
+        ):
+            node_deltas = self._node_encoder.encode(self._node_names, self._node_states)
+        if BINARY_RESPONSE_FEATURE in self.protocol_features:
+            if "request_id" in kwargs and REQUEST_ID_FEATURE in self.protocol_features:
+                data["request_id"] = kwargs["request_id"]
+            tensors = []
+            if node_deltas is not None:
+                if "names" in node_deltas:
+                    data[NODE_DELTAS] = {"names": node_deltas["names"]}
+                tensors.append(([NODE_DELTAS, "indices"], node_deltas["indices"]))
+                tensors.append(([NODE_DELTAS, "states"], node_deltas["states"]))
+            for path, buffer in buffers.items():
+                compressed = self._compressor.compress(path[-1], buffer) if compress and len(path) == 2 else None
+                tensors.append((list(path), buffer if compressed is None else compressed))
+            return encode_binary_frame_parts(data, tensors)
+
+        if node_deltas is not None:
+            # As Unity's JSON, the states are flattened
+            data[NODE_DELTAS] = {
+                **node_deltas,
+                "indices": node_deltas["indices"].tolist(),
+                "states": node_deltas["states"].ravel().tolist(),
+            }
+        for path, buffer in buffers.items():
+            json_buffer = {"type": "uint8" if buffer.dtype == np.uint8 else "float", "shape": list(buffer.shape)}
+            json_buffer["uintBuffer" if buffer.dtype == np.uint8 else "floatBuffer"] = buffer.ravel().tolist()
+            json_buffer["size"] = buffer.size
+            if len(path) == 2:
+                json_buffer["dtype"] = buffer.dtype.name
+            if len(path) == 1:
+                data[path[0]] = json_buffer
+            else:
+                data.setdefault(path[0], {})[path[1]] = json_buffer
+        return data
+
+
+def read_glb_json(glb: bytes) -> Dict[str, Any]:
+    """
+    Read the JSON chunk of a binary glTF file.
+
+    Args:
+        glb (`bytes`):
+            The binary glTF file.
+
+    Returns:
+        gltf (`Dict[str, Any]`):
+            The glTF document.
+    """
+    json_length, chunk_type = struct.unpack_from("<I4s", glb, 12)
+    if chunk_type != b"JSON":
+        raise ValueError("The first chunk of a binary glTF file should be JSON")
+    return json.loads(glb[20 : 20 + json_length])
+
+
+def get_sensor_specs(
+    gltf: Dict[str, Any], maps: Optional[List[str]] = None, n_show: int = 1
+) -> Tuple[List[SensorSpec], int, int]:
+    """
+    Get the sensors of the actors of a glTF scene, as the Unity engine finds them.
+
+    Args:
+        gltf (`Dict[str, Any]`):
+            The glTF document of the scene.
+        maps (`List[str]`, *optional*, defaults to `None`):
+            The names of the root nodes of the maps. The scene root is the single map if not specified.
+        n_show (`int`, *optional*, defaults to `1`):
+            The number of maps shown at the same time.
+
+    Returns:
+        sensor_specs (`List[Tuple[str, Tuple[int, ...], str]]`):
+            The tag, observation shape (for one actor) and dtype of each sensor of the actors.
+        n_maps (`int`):
+            The number of maps shown at the same time, 0 if the scene has no actor.
+        n_actors (`int`):
+            The maximum number of actors in a map.
+    """
+    nodes = gltf.get("nodes", [])
+    children = {index: node.get("children", []) for index, node in enumerate(nodes)}
+
+    def descendants(index: int) -> List[int]:
+        # The node itself and all its descendants, as Unity's Transform.IsChildOf
+        result, stack = [], [index]
+        while stack:
+            node_index = stack.pop()
+            result.append(node_index)
+            stack.extend(reversed(children[node_index]))
+        return result
+
+    actors = [index for index, node in enumerate(nodes) if node.get("extras", {}).get("is_actor")]
+    if not actors:
+        return [], 0, 0
+
+    if maps is not None:
+        node_indices = {node.get("name"): index for index, node in enumerate(nodes)}
+        map_roots = [node_indices[name] for name in maps if name in node_indices]
+    else:
+        scene = gltf.get("scenes", [{}])[gltf.get("scene", 0)]
+        map_roots = scene.get("nodes", [])[:1]
+        n_show = 1
+    actors_per_map = [[index for index in descendants(root) if index in actors] for root in map_roots]
+    n_actors = max(len(map_actors) for map_actors in actors_per_map)
+
+    # All the actors are assumed to have the same sensors as the first one
+    first_actor = next(map_actors[0] for map_actors in actors_per_map if map_actors)
+    extensions = gltf.get("extensions", {})
+    sensor_specs = []
+    for index in sorted(descendants(first_actor)):
+        node = nodes[index]
+        if "camera" in node:
+            camera = gltf["cameras"][node["camera"]]
+            tag = camera.get("extras", {}).get("sensor_tag", "CameraSensor")
+            width = camera.get("width", DEFAULT_CAMERA_SIZE)
+            height = camera.get("height", DEFAULT_CAMERA_SIZE)
+            sensor_specs.append((tag, (3, height, width), camera.get("extras", {}).get("sensor_dtype", "uint8")))
+        node_extensions = node.get("extensions", {})
+        if "HF_state_sensors" in node_extensions:
+            sensor = extensions["HF_state_sensors"]["objects"][node_extensions["HF_state_sensors"]["object_id"]]
+            size = sum(ALLOWED_STATE_SENSOR_PROPERTIES[p] for p in sensor.get("properties", ["position"]))
+            sensor_specs.append((sensor.get("sensor_tag", "StateSensor"), (size,), sensor.get("dtype", "float32")))
+        if "HF_raycast_sensors" in node_extensions:
+            sensor = extensions["HF_raycast_sensors"]["objects"][node_extensions["HF_raycast_sensors"]["object_id"]]
+            size = sensor.get("n_horizontal_rays", 1) * sensor.get("n_vertical_rays", 1)
+            sensor_specs.append((sensor.get("sensor_tag", "RaycastSensor"), (size,), sensor.get("dtype", "float32")))
+    return sensor_specs, n_show, n_actors
@@ -0,0 +1,185 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Node states returned as deltas by the engines, with the `node_deltas` option of the config.
+
+Instead of the full state of every node, the engine only returns the nodes whose state changed by more than
+`node_delta_epsilon` since it was last sent, under `"node_deltas"` in the event data:
+
+- `"indices"`: the int32 indices of the changed nodes,
+- `"states"`: their float32 states, of shape (n_changed, 13): position (3), rotation quaternion (4), velocity (3) and
+  angular velocity (3), zeros for the velocities of the nodes without a rigid body,
+- `"names"`: the names of the nodes the indices refer to, only sent with the first deltas after the scene is
+  initialized, which hold the state of all the nodes.
+
+The deltas are sent as raw tensors in binary frames and as JSON lists otherwise. `NodeStateTracker` keeps the state of
+all the nodes up to date from the deltas.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+NODE_DELTAS = "node_deltas"
+STATE_SIZE = 13
+DEFAULT_EPSILON = 1e-4
+
+POSITION = slice(0, 3)
+ROTATION = slice(3, 7)
+VELOCITY = slice(7, 10)
+ANGULAR_VELOCITY = slice(10, 13)
+
+
+class NodeStateTracker:
+    """
+    Keep the state of all the nodes of a scene up to date from the node deltas returned by the engine.
+
+    The states are kept in a single (n_nodes, 13) float32 array, see `states`, and views on their components.
+
+    Example:
+
+    ```python
+    scene.config.node_deltas = True
+    scene.show()
+    tracker = sm.NodeStateTracker()
+    for _ in range(100):
+        changed = tracker.update(scene.step())
+        print(tracker.positions[tracker.index("actor")])
+    ```
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.states = np.zeros((0, STATE_SIZE), dtype=np.float32)
+        self._indices: Dict[str, int] = {}
+
+    def update(self, event: Dict[str, Any]) -> np.ndarray:
+        """
+        Apply the node deltas of the event data of a step.
+
+        Args:
+            event (`Dict[str, Any]`):
+                The event data returned by the engine.
+
+        Returns:
+            indices (`np.ndarray`):
+                The indices of the nodes whose state changed.
+        """
+        deltas = event.get(NODE_DELTAS)
+        if deltas is None:
+            return np.zeros(0, dtype=np.int32)
+
+        if deltas.get("names") is not None:
+            # A new sequence of deltas, e.g. after the scene is initialized again
+            self.names = list(deltas["names"])
+            self._indices = {name: index for index, name in enumerate(self.names)}
+            self.states = np.zeros((len(self.names), STATE_SIZE), dtype=np.float32)
+        elif not self.names:
+            raise ValueError("The first node deltas after the scene is initialized should include the node names.")
+
+        indices = np.asarray(deltas["indices"], dtype=np.int32)
+        states = np.asarray(deltas["states"], dtype=np.float32).reshape(len(indices), STATE_SIZE)
+        self.states[indices] = states
+        return indices
+
+    def index(self, name: str) -> int:
+        """The index of a node, in `names` and `states`."""
+        return self._indices[name]
+
+    def state(self, name: str) -> Dict[str, np.ndarray]:
+        """
+        Get the state of a node.
+
+        Args:
+            name (`str`):
+                The name of the node.
+
+        Returns:
+            state (`Dict[str, np.ndarray]`):
+                The position, rotation, velocity and angular velocity of the node.
+        """
+        state = self.states[self.index(name)]
+        return {
+            "position": state[POSITION],
+            "rotation": state[ROTATION],
+            "velocity": state[VELOCITY],
+            "angular_velocity": state[ANGULAR_VELOCITY],
+        }
+
+    @property
+    def positions(self) -> np.ndarray:
+        """The (n_nodes, 3) positions of the nodes."""
+        return self.states[:, POSITION]
+
+    @property
+    def rotations(self) -> np.ndarray:
+        """The (n_nodes, 4) rotation quaternions of the nodes."""
+        return self.states[:, ROTATION]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        """The (n_nodes, 3) velocities of the nodes."""
+        return self.states[:, VELOCITY]
+
+    @property
+    def angular_velocities(self) -> np.ndarray:
+        """The (n_nodes, 3) angular velocities of the nodes."""
+        return self.states[:, ANGULAR_VELOCITY]
+
+
+class NodeDeltaEncoder:
+    """
+    Compute the node deltas as the engines do, e.g. for the mock engine.
+
+    Args:
+        epsilon (`float`, *optional*, defaults to `1e-4`):
+            The change in any component of the state of a node above which it is sent again.
+    """
+
+    def __init__(self, epsilon: float = DEFAULT_EPSILON):
+        self.epsilon = epsilon
+        self._sent_states: Optional[np.ndarray] = None
+
+    def encode(self, names: Sequence[str], states: np.ndarray) -> Dict[str, Any]:
+        """
+        Get the nodes whose state changed by more than epsilon since it was last sent.
+
+        Args:
+            names (`Sequence[str]`):
+                The names of the nodes.
+            states (`np.ndarray`):
+                The current (n_nodes, 13) states of the nodes.
+
+        Returns:
+            deltas (`Dict[str, Any]`):
+                The `"indices"` and `"states"` of the changed nodes, and the `"names"` of the nodes with the first
+                deltas.
+        """
+        deltas = {}
+        if self._sent_states is None:
+            deltas["names"] = list(names)
+            changed = np.arange(len(states), dtype=np.int32)
+            self._sent_states = np.zeros_like(states, dtype=np.float32)
+        else:
+            changed = np.flatnonzero(np.any(np.abs(states - self._sent_states) > self.epsilon, axis=1))
+            changed = changed.astype(np.int32)
+        deltas["indices"] = changed
+        deltas["states"] = np.ascontiguousarray(states[changed], dtype=np.float32)
+        self._sent_states[changed] = states[changed]
+        return deltas
+
+    def reset(self):
+        """Start a new sequence of deltas, sending the state of all the nodes again."""
+        self._sent_states = None
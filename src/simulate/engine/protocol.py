@@ -0,0 +1,316 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Binary tensor framing shared by the socket engines.
+
+A binary frame is sent inside the usual 4-bytes length-prefixed message and is laid out as:
+
+    b"SIMB" | header length (uint32, little-endian) | JSON header | padding | tensor payloads
+
+The JSON header holds the regular (non-tensor) data of the message under `"data"` and the description of each tensor
+under `"tensors"`: its `path` in the data dictionary, its `dtype`, its `shape`, and its `offset`/`nbytes` in the
+payload section. Payloads are raw little-endian buffers aligned on 8 bytes.
+
+Compressed tensors (see `simulate.engine.compression`) also hold their `compression` mode and the compressed size of
+each of their images in `chunks`.
+"""
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+if TYPE_CHECKING:
+    from .compression import FrameDecoder
+
+
+BINARY_FRAME_MAGIC = b"SIMB"
+BINARY_FRAME_ALIGNMENT = 8
+
+# Features which can be negotiated with the engine at initialization
+BINARY_RESPONSE_FEATURE = "binary_response"
+BINARY_ACTION_FEATURE = "binary_action"
+BINARY_SCENE_FEATURE = "binary_scene"
+REQUEST_ID_FEATURE = "request_id"
+COMPRESSION_FEATURE = "compression"
+RESET_OBSERVATIONS_FEATURE = "reset_observations"
+
+BINARY_DTYPES = {
+    "uint8": np.dtype("u1"),
+    "int32": np.dtype("<i4"),
+    "float16": np.dtype("<f2"),
+    "float32": np.dtype("<f4"),
+}
+
+
+class CompressedTensor(NamedTuple):
+    """
+    A tensor whose images were compressed separately, to be added to a binary frame.
+
+    Args:
+        dtype (`str`):
+            The name of the dtype of the uncompressed tensor, e.g. `"uint8"`.
+        shape (`Tuple[int, ...]`):
+            The shape of the uncompressed tensor.
+        compression (`str`):
+            The compression mode, e.g. `"zlib"`.
+        chunks (`List[bytes]`):
+            The compressed images, in C order.
+    """
+
+    dtype: str
+    shape: Tuple[int, ...]
+    compression: str
+    chunks: List[bytes]
+
+
+def _aligned(n: int) -> int:
+    return (n + BINARY_FRAME_ALIGNMENT - 1) // BINARY_FRAME_ALIGNMENT * BINARY_FRAME_ALIGNMENT
+
+
+def _dtype_name(dtype: np.dtype) -> str:
+    for name, binary_dtype in BINARY_DTYPES.items():
+        if binary_dtype == dtype.newbyteorder("<"):
+            return name
+    raise TypeError(f"Unsupported dtype {dtype} for binary framing, supported dtypes are {list(BINARY_DTYPES)}")
+
+
+def as_action_tensor(value: Any) -> np.ndarray:
+    """
+    Convert an action to a contiguous tensor of a dtype supported by the engines (int32 or float32).
+
+    Args:
+        value (`Any`):
+            The action, as a number, a (nested) list or a numpy array.
+
+    Returns:
+        tensor (`np.ndarray`):
+            The action as a contiguous int32 or float32 array.
+    """
+    array = np.asarray(value)
+    if array.dtype.kind in "biu":
+        return np.ascontiguousarray(array, dtype=BINARY_DTYPES["int32"])
+    return np.ascontiguousarray(array, dtype=BINARY_DTYPES["float32"])
+
+
+def to_json_serializable(value: Any) -> Any:
+    """
+    `default` hook for `json.dumps` converting numpy arrays and scalars to python lists and numbers.
+
+    Args:
+        value (`Any`):
+            The object which could not be serialized by `json.dumps`.
+
+    Returns:
+        value (`Any`):
+            A JSON serializable version of the object.
+    """
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def cast_sensor_values(
+    values: np.ndarray, dtype: str, quantization_range: Optional[Sequence[float]] = None
+) -> np.ndarray:
+    """
+    Cast the values of a sensor buffer received as JSON to the dtype of the sensor, as the engines do for the binary
+    frames: floats are quantized to uint8 over the quantization range, uint8 values are normalized to [0, 1] as floats.
+
+    Args:
+        values (`np.ndarray`):
+            The float32 or uint8 values of the buffer.
+        dtype (`str`):
+            The dtype of the sensor.
+        quantization_range (`Sequence[float]`, *optional*, defaults to `None`):
+            The (low, high) range mapped to [0, 255] when quantizing floats to uint8.
+
+    Returns:
+        values (`np.ndarray`):
+            The values in the dtype of the sensor.
+    """
+    if values.dtype == np.dtype(dtype):
+        return values
+    if dtype == "uint8":
+        low, high = quantization_range
+        return np.rint(np.clip((values - low) * (255 / (high - low)), 0, 255)).astype(np.uint8)
+    if values.dtype == np.uint8:
+        return (values / np.float32(255)).astype(dtype)
+    return values.astype(dtype)
+
+
+def is_binary_frame(frame: Union[bytes, bytearray, memoryview]) -> bool:
+    """
+    Check if a received message is a binary frame.
+
+    Args:
+        frame (`bytes`, `bytearray` or `memoryview`):
+            The message received from the socket (without the length prefix).
+
+    Returns:
+        is_binary (`bool`):
+            Whether the message starts with the binary frame magic.
+    """
+    return bytes(frame[: len(BINARY_FRAME_MAGIC)]) == BINARY_FRAME_MAGIC
+
+
+def encode_binary_frame_parts(
+    data: Dict[str, Any], tensors: Sequence[Tuple[Sequence[str], Union[np.ndarray, CompressedTensor]]]
+) -> List[Union[bytes, memoryview]]:
+    """
+    Encode a dictionary and a list of tensors in a binary frame, as a list of buffers to be sent one after the other.
+
+    Contiguous tensors of a supported dtype are not copied, which avoids copying large payloads (e.g. a glTF scene)
+    before sending them.
+
+    Args:
+        data (`Dict[str, Any]`):
+            The JSON serializable part of the message.
+        tensors (`Sequence[Tuple[Sequence[str], Union[np.ndarray, CompressedTensor]]]`):
+            The tensors to add to the message, as tuples of (path in the data dictionary, array or compressed tensor).
+
+    Returns:
+        parts (`List[Union[bytes, memoryview]]`):
+            The parts of the encoded frame (without the length prefix).
+    """
+    descriptions = []
+    payloads = []
+    offset = 0
+    for path, array in tensors:
+        if isinstance(array, CompressedTensor):
+            payload = b"".join(array.chunks)
+            descriptions.append(
+                {
+                    "path": list(path),
+                    "dtype": array.dtype,
+                    "shape": list(array.shape),
+                    "offset": offset,
+                    "nbytes": len(payload),
+                    "compression": array.compression,
+                    "chunks": [len(chunk) for chunk in array.chunks],
+                }
+            )
+            payloads.append(memoryview(payload))
+            offset = _aligned(offset + len(payload))
+            continue
+        array = np.asarray(array)
+        dtype_name = _dtype_name(array.dtype)
+        array = np.ascontiguousarray(array, dtype=BINARY_DTYPES[dtype_name])
+        descriptions.append(
+            {
+                "path": list(path),
+                "dtype": dtype_name,
+                "shape": list(array.shape),
+                "offset": offset,
+                "nbytes": array.nbytes,
+            }
+        )
+        payloads.append(memoryview(array.reshape(-1)).cast("B"))
+        offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps({"data": data, "tensors": descriptions}).encode()
+    header_end = len(BINARY_FRAME_MAGIC) + 4 + len(header)
+    payload_start = _aligned(header_end)
+    # Pad the header with spaces (valid JSON whitespace) so the payloads start on an aligned offset
+    header += b" " * (payload_start - header_end)
+
+    parts = [BINARY_FRAME_MAGIC + len(header).to_bytes(4, "little") + header]
+    for payload in payloads:
+        parts.append(payload)
+        padding = _aligned(payload.nbytes) - payload.nbytes
+        if padding:
+            parts.append(b"\0" * padding)
+    return parts
+
+
+def encode_binary_frame(data: Dict[str, Any], tensors: Sequence[Tuple[Sequence[str], np.ndarray]]) -> bytes:
+    """
+    Encode a dictionary and a list of tensors in a binary frame.
+
+    Args:
+        data (`Dict[str, Any]`):
+            The JSON serializable part of the message.
+        tensors (`Sequence[Tuple[Sequence[str], np.ndarray]]`):
+            The tensors to add to the message, as tuples of (path in the data dictionary, array).
+
+    Returns:
+        frame (`bytes`):
+            The encoded frame (without the length prefix).
+    """
+    return b"".join(encode_binary_frame_parts(data, tensors))
+
+
+def decode_binary_frame(
+    frame: Union[bytes, bytearray, memoryview], decoder: Optional["FrameDecoder"] = None
+) -> Dict[str, Any]:
+    """
+    Decode a binary frame. Tensors are returned as numpy arrays sharing the memory of the frame (no copy), except
+    compressed tensors which are decompressed by the decoder.
+
+    Args:
+        frame (`bytes`, `bytearray` or `memoryview`):
+            The message received from the socket (without the length prefix).
+        decoder (`FrameDecoder`, *optional*, defaults to `None`):
+            The decoder of the compressed tensors, which keeps the previous frames of the XOR delta compression.
+            Required if the frame holds compressed tensors.
+
+    Returns:
+        data (`Dict[str, Any]`):
+            The decoded message, with the tensors inserted as `np.ndarray` at their path.
+    """
+    if not is_binary_frame(frame):
+        raise ValueError("Not a binary frame")
+    header_start = len(BINARY_FRAME_MAGIC) + 4
+    header_length = int.from_bytes(frame[len(BINARY_FRAME_MAGIC) : header_start], "little")
+    payload_start = header_start + header_length
+    header = json.loads(bytes(frame[header_start:payload_start]))
+
+    data = header.get("data") or {}
+    compressed = []
+    for tensor in header.get("tensors", []):
+        if "compression" in tensor:
+            start = payload_start + tensor["offset"]
+            compressed.append((tensor, memoryview(frame)[start : start + tensor["nbytes"]]))
+            continue
+        dtype = BINARY_DTYPES[tensor["dtype"]]
+        shape = tensor["shape"]
+        array = np.frombuffer(
+            frame, dtype=dtype, count=tensor["nbytes"] // dtype.itemsize, offset=payload_start + tensor["offset"]
+        ).reshape(shape)
+        set_path_value(data, tensor["path"], array)
+
+    if compressed:
+        if decoder is None:
+            raise ValueError("The frame holds compressed tensors, a FrameDecoder is required to decode it")
+        for (tensor, _), array in zip(compressed, decoder.decode(compressed)):
+            set_path_value(data, tensor["path"], array)
+    return data
+
+
+def set_path_value(data: Dict[str, Any], path: Sequence[str], value: Any):
+    """
+    Set a value in a nested dictionary, creating the intermediate dictionaries if needed.
+
+    Args:
+        data (`Dict[str, Any]`):
+            The nested dictionary.
+        path (`Sequence[str]`):
+            The keys leading to the value.
+        value (`Any`):
+            The value to set.
+    """
+    for key in path[:-1]:
+        data = data.setdefault(key, {})
+    data[path[-1]] = value
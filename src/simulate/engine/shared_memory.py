@@ -0,0 +1,116 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Shared-memory observation ring for engines running on the same host."""
+import mmap
+import os
+import tempfile
+import uuid
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from ..utils import logging
+from .protocol import BINARY_DTYPES, set_path_value
+
+
+logger = logging.get_logger(__name__)
+
+SHARED_MEMORY_FEATURE = "shared_memory"
+
+
+def get_shared_memory_path() -> str:
+    """
+    Get a new path for a memory-mapped file, in RAM (`/dev/shm`) when available.
+
+    Returns:
+        path (`str`):
+            The path of the file to be created by the engine.
+    """
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"simulate-{uuid.uuid4().hex}.obs")
+
+
+class ObservationRing:
+    """
+    A ring of observation slots in a memory-mapped file written by the engine.
+
+    The engine writes the sensor, reward and done buffers of each step in the next slot of the ring and only sends
+    the index of the slot over the socket. Observations are returned as numpy views into the mapped file: a view
+    stays valid until the engine writes again in the same slot, i.e. for `n_slots - 1` steps.
+
+    Args:
+        path (`str`):
+            The path of the memory-mapped file created by the engine.
+        layout (`Dict`):
+            The layout of the ring sent by the engine: the number of slots (`"slots"`), the size of a slot in bytes
+            (`"slot_size"`) and the description of the tensors in each slot (`"tensors"`, with a `path`, `dtype`,
+            `shape` and `offset` in the slot for each tensor).
+    """
+
+    def __init__(self, path: str, layout: Dict[str, Any]):
+        self.path = path
+        self.n_slots = layout["slots"]
+        self.slot_size = layout["slot_size"]
+
+        with open(path, "r+b") as f:
+            self._mmap = mmap.mmap(f.fileno(), self.n_slots * self.slot_size)
+
+        self._slots: List[List[Tuple[List[str], np.ndarray]]] = []
+        for slot in range(self.n_slots):
+            tensors = []
+            for tensor in layout["tensors"]:
+                dtype = BINARY_DTYPES[tensor["dtype"]]
+                count = int(np.prod(tensor["shape"]))
+                array = np.frombuffer(
+                    self._mmap, dtype=dtype, count=count, offset=slot * self.slot_size + tensor["offset"]
+                ).reshape(tensor["shape"])
+                tensors.append((tensor["path"], array))
+            self._slots.append(tensors)
+
+    def read(self, slot: int, event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert the tensors of a slot of the ring in the event data received from the engine.
+
+        Args:
+            slot (`int`):
+                The index of the slot, as sent by the engine.
+            event (`Dict[str, Any]`):
+                The event data received from the engine.
+
+        Returns:
+            event (`Dict[str, Any]`):
+                The event data with the tensors of the slot added as views into the shared memory.
+        """
+        # When the step requested some of the sensors, the slot holds stale buffers for the others
+        sensors = event.pop("shared_memory_sensors", None)
+        for path, array in self._slots[slot]:
+            if sensors is not None and path[0] == "actor_sensor_buffers" and path[1] not in sensors:
+                continue
+            set_path_value(event, path, array)
+        return event
+
+    def close(self):
+        """Release the mapping and remove the file."""
+        self._slots = []
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Some observations are still referenced, the mapping is released when they are garbage collected
+            logger.warning("Observations from the shared memory are still in use, the mapping is left open.")
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"Could not remove shared memory file {self.path}: {e}")
@@ -0,0 +1,287 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Server sockets the socket engines listen on."""
+import os
+import selectors
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+from ..utils import logging
+
+
+if TYPE_CHECKING:
+    import subprocess
+
+
+logger = logging.get_logger(__name__)
+
+
+NUM_BIND_RETRIES = 20
+BIND_RETRIES_DELAY = 2.0
+
+TRANSPORTS = ["tcp", "unix"]
+
+ACCEPT_POLL_INTERVAL = 0.5  # Interval at which the process of the engine is checked while waiting for it, in seconds
+
+# Engines started from several threads (e.g. by `MultiProcessRLEnv`) look for a free port one at a time
+_free_port_lock = threading.Lock()
+
+
+class Transport:
+    """
+    Base class of the transports: a listening socket the engine connects to.
+    """
+
+    def __init__(self):
+        self.socket = None
+
+    @property
+    def address(self) -> str:
+        """A human readable address, for logging."""
+        raise NotImplementedError
+
+    def engine_args(self) -> List[str]:
+        """The command line arguments telling an engine executable where to connect."""
+        raise NotImplementedError
+
+    def listen(self) -> socket.socket:
+        """
+        Create the server socket and start listening.
+
+        Returns:
+            socket (`socket.socket`):
+                The listening socket.
+        """
+        raise NotImplementedError
+
+    def accept(
+        self, timeout: Optional[float] = None, proc: Optional["subprocess.Popen"] = None
+    ) -> Tuple[socket.socket, Any]:
+        """
+        Wait for the engine to connect.
+
+        Args:
+            timeout (`float`, *optional*, defaults to `None`):
+                The maximum time to wait for the engine, in seconds. Waits indefinitely if not specified.
+            proc (`subprocess.Popen`, *optional*, defaults to `None`):
+                The process of the engine, checked while waiting so that an engine which exits before connecting
+                doesn't keep us waiting.
+
+        Returns:
+            client (`socket.socket`):
+                The socket connected to the engine.
+            client_address (`Any`):
+                The address of the engine.
+        """
+        logger.info(f"Waiting for connection on {self.address}...")
+        if timeout is not None or proc is not None:
+            self._wait_for_connection(timeout, proc)
+        client, client_address = self.socket.accept()
+        logger.info(f"Connection from {client_address or self.address}")
+        return client, client_address
+
+    def _wait_for_connection(self, timeout: Optional[float], proc: Optional["subprocess.Popen"]):
+        """Wait until a connection can be accepted, raising if the deadline expires or the engine exits first."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.socket, selectors.EVENT_READ)
+            while True:
+                wait = ACCEPT_POLL_INTERVAL if proc is not None else None
+                if deadline is not None:
+                    remaining = max(0.0, deadline - time.monotonic())
+                    wait = remaining if wait is None else min(wait, remaining)
+                if selector.select(wait):
+                    return
+                if proc is not None and proc.poll() is not None:
+                    raise ConnectionError(f"The engine exited with code {proc.returncode} before connecting.")
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"The engine didn't connect to {self.address} within {timeout}s.")
+
+    def close(self):
+        """Close the server socket."""
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+
+class TcpTransport(Transport):
+    """
+    TCP transport.
+
+    Args:
+        host (`str`, *optional*, defaults to `"127.0.0.1"`):
+            The host to listen on.
+        port (`int`, *optional*, defaults to `55001`):
+            The port to listen on.
+        find_free_port (`bool`, *optional*, defaults to `False`):
+            Whether to look for the first port not in use, starting from `port`, when starting to listen.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 55001, find_free_port: bool = False):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.find_free_port = find_free_port
+
+    @staticmethod
+    def find_port_number(starting_port: int) -> int:
+        """
+        Find the first port not in use, e.g. to use a different port in each xdist worker.
+
+        Args:
+            starting_port (`int`):
+                The port to start from.
+
+        Returns:
+            port (`int`):
+                The first free port.
+        """
+        for port in range(starting_port, starting_port + 1024):
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                if s.connect_ex(("localhost", port)) != 0:
+                    return port
+        raise RuntimeError("Could not find a free port")
+
+    @property
+    def address(self) -> str:
+        return f"{self.host} {self.port}"
+
+    def engine_args(self) -> List[str]:
+        return ["port", str(self.port)]
+
+    def listen(self) -> socket.socket:
+        if self.find_free_port:
+            # Keep the port from being found free by another thread until we listen on it
+            with _free_port_lock:
+                self.port = self.find_port_number(self.port)
+                return self._listen()
+        return self._listen()
+
+    def _listen(self) -> socket.socket:
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        logger.info(f"Starting the server on {self.address}...")
+        for n in range(NUM_BIND_RETRIES + 1):
+            try:
+                self.socket.bind((self.host, self.port))
+                break
+            except OSError:
+                if n == NUM_BIND_RETRIES:
+                    self.close()
+                    raise OSError(f"Could not bind to port {self.port}")
+                logger.error(f"port {self.port} is still in use, trying again")
+                time.sleep(BIND_RETRIES_DELAY)
+        self.socket.listen()
+        return self.socket
+
+    def accept(
+        self, timeout: Optional[float] = None, proc: Optional["subprocess.Popen"] = None
+    ) -> Tuple[socket.socket, Any]:
+        client, client_address = super().accept(timeout=timeout, proc=proc)
+        # Don't delay the frames sent with several writes (e.g. large tensors) waiting for acknowledgements
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return client, client_address
+
+
+class UnixSocketTransport(Transport):
+    """
+    Unix domain socket transport, for engines running on the same host.
+
+    Skips the TCP stack and doesn't use any port, so many engines can run on the same node without port collisions.
+
+    Args:
+        path (`str`, *optional*, defaults to `None`):
+            The path of the socket file. If not specified, a new path is chosen in the temporary directory.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__()
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("Unix domain sockets are not available on this platform, use the tcp transport.")
+        self.path = path if path is not None else get_socket_path()
+
+    @property
+    def address(self) -> str:
+        return self.path
+
+    def engine_args(self) -> List[str]:
+        return ["socket_path", self.path]
+
+    def listen(self) -> socket.socket:
+        if os.path.exists(self.path):
+            # Stale socket file left by a previous run
+            os.remove(self.path)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        logger.info(f"Starting the server on {self.address}...")
+        self.socket.bind(self.path)
+        self.socket.listen()
+        return self.socket
+
+    def close(self):
+        super().close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def get_socket_path() -> str:
+    """
+    Get a new path for a Unix domain socket.
+
+    Returns:
+        path (`str`):
+            The path of the socket file.
+    """
+    # Socket paths are limited to ~100 characters, stay in the temporary directory with a short name
+    return os.path.join(tempfile.gettempdir(), f"simulate-{uuid.uuid4().hex[:16]}.sock")
+
+
+def create_transport(
+    transport: str = "tcp",
+    host: str = "127.0.0.1",
+    port: int = 55001,
+    socket_path: Optional[str] = None,
+    find_free_port: bool = False,
+) -> Transport:
+    """
+    Create the transport used by an engine.
+
+    Args:
+        transport (`str`, *optional*, defaults to `"tcp"`):
+            The transport to use, one of `"tcp"` or `"unix"`.
+        host (`str`, *optional*, defaults to `"127.0.0.1"`):
+            The host to listen on with the tcp transport.
+        port (`int`, *optional*, defaults to `55001`):
+            The port to listen on with the tcp transport.
+        socket_path (`str`, *optional*, defaults to `None`):
+            The path of the socket file with the unix transport. A new path is chosen if not specified.
+        find_free_port (`bool`, *optional*, defaults to `False`):
+            Whether to look for the first free port starting from `port` with the tcp transport.
+
+    Returns:
+        transport (`Transport`):
+            The transport.
+    """
+    if transport == "tcp":
+        return TcpTransport(host=host, port=port, find_free_port=find_free_port)
+    if transport == "unix":
+        return UnixSocketTransport(path=socket_path)
+    raise ValueError(f"Unknown transport {transport}, should be one of {TRANSPORTS}")
@@ -15,33 +15,53 @@
 # Lint as: python3
 import atexit
 import base64
+import collections
+import hashlib
 import json
 import os
-import signal
-import socket
+import shutil
 import subprocess
 import tarfile
-import time
+import tempfile
 from sys import platform
-from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
+import numpy as np
+from filelock import FileLock
 from huggingface_hub import hf_hub_download
 from huggingface_hub.constants import hf_cache_home
 
 from ..utils import logging
+from ..utils.signals import CloseOnSignal
+from .compression import FrameDecoder, normalize_sensor_compression
+from .connection import Connection
 from .engine import Engine
+from .protocol import (
+    BINARY_ACTION_FEATURE,
+    BINARY_RESPONSE_FEATURE,
+    BINARY_SCENE_FEATURE,
+    COMPRESSION_FEATURE,
+    REQUEST_ID_FEATURE,
+    RESET_OBSERVATIONS_FEATURE,
+    as_action_tensor,
+    decode_binary_frame,
+    encode_binary_frame_parts,
+    is_binary_frame,
+    to_json_serializable,
+)
+from .shared_memory import SHARED_MEMORY_FEATURE, ObservationRing, get_shared_memory_path
+from .transport import create_transport
 
 
 if TYPE_CHECKING:
     from ..assets.asset import Asset
     from ..scene import Scene
+    from .engine_pool import EnginePool
 
 
 logger = logging.get_logger(__name__)
 
 
-NUM_BIND_RETRIES = 20
-BIND_RETRIES_DELAY = 2.0
 SOCKET_TIME_OUT = 30.0  # Timeout in seconds
 
 UNITY_BUILD_REPO = "simulate-tests/unity-test"
@@ -68,6 +88,108 @@ default_cache_path = os.path.join(hf_cache_home, "unity")
 
 HUGGINGFACE_UNITY_CACHE = os.getenv("HUGGINGFACE_UNITY_CACHE", default_cache_path)
 
+# Written in the directory of an extracted build, with the path of the executable in the build
+UNITY_BUILD_METADATA = "simulate_build.json"
+
+# Checksums of the archives already hashed by this process, keyed by (path, size, modification time)
+_archive_checksums: Dict[Tuple[str, int, int], str] = {}
+
+
+def get_archive_checksum(path: str) -> str:
+    """
+    Compute the sha256 checksum of an archive, once per process.
+
+    Args:
+        path (`str`):
+            The path of the archive.
+
+    Returns:
+        checksum (`str`):
+            The hexadecimal checksum.
+    """
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _archive_checksums:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(chunk)
+        _archive_checksums[key] = sha256.hexdigest()
+    return _archive_checksums[key]
+
+
+def extract_unity_build(archive_path: str, cache_dir: str = HUGGINGFACE_UNITY_CACHE) -> str:
+    """
+    Extract a compressed Unity build in the cache, unless it is already extracted.
+
+    Each build is extracted in its own directory, named after the checksum of the archive. Concurrent processes (e.g.
+    the workers of a `MultiProcessRLEnv`) wait for the first one to extract the build under a file lock: the build is
+    extracted in a temporary directory which is then renamed, so that an interrupted extraction is never reused.
+
+    Args:
+        archive_path (`str`):
+            The path of the `.tar.gz` archive of the build.
+        cache_dir (`str`, *optional*, defaults to `HUGGINGFACE_UNITY_CACHE`):
+            The directory of the extracted builds.
+
+    Returns:
+        path (`str`):
+            The path to the Unity executable.
+    """
+    checksum = get_archive_checksum(archive_path)
+    build_dir = os.path.join(cache_dir, checksum[:16])
+    os.makedirs(cache_dir, exist_ok=True)
+
+    if not os.path.isdir(build_dir):
+        with FileLock(build_dir + ".lock"):
+            # Another process may have extracted the build while we were waiting for the lock
+            if not os.path.isdir(build_dir):
+                logger.info(f"Extracting the Unity build {archive_path} to {build_dir}...")
+                temp_dir = tempfile.mkdtemp(prefix=f".{checksum[:16]}-", dir=cache_dir)
+                try:
+                    with tarfile.open(archive_path) as archive:
+                        main_dir = os.path.commonpath(archive.getnames())
+                        archive.extractall(temp_dir)
+                    with open(os.path.join(temp_dir, UNITY_BUILD_METADATA), "w") as f:
+                        json.dump({"sha256": checksum, "executable": os.path.join(main_dir, UNITY_EXECUTABLE_PATH)}, f)
+                    os.rename(temp_dir, build_dir)
+                except BaseException:
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                    raise
+
+    with open(os.path.join(build_dir, UNITY_BUILD_METADATA)) as f:
+        executable = json.load(f)["executable"]
+    return os.path.join(build_dir, executable)
+
+
+def launch_executable(executable: str, args: List[str], headless: bool) -> subprocess.Popen:
+    """
+    Launch a Unity executable.
+
+    Args:
+        executable (`str`):
+            The path to the Unity executable.
+        args (`List[str]`):
+            The arguments telling the executable where to connect, e.g. `["port", "55001"]`.
+        headless (`bool`):
+            Whether to run the Unity executable in headless mode.
+
+    Returns:
+        process (`subprocess.Popen`):
+            The process of the executable.
+    """
+    # TODO: improve headless training check on a headless machine
+    if headless:
+        logger.info("launching env headless")
+        launch_command = [executable, "-batchmode", "-nographics", "--args", *args]
+    else:
+        launch_command = [executable, "--args", *args]
+    environ = os.environ.copy()
+    environ["PATH"] = "/usr/sbin:/sbin:" + environ["PATH"]
+
+    return subprocess.Popen(launch_command, env=environ)
+
 
 class UnityEngine(Engine):
     """
@@ -84,9 +206,45 @@ class UnityEngine(Engine):
         engine_host (`str`, *optional*, defaults to `"127.0.0.1"`):
             The host to connect to.
         engine_port (`int`, *optional*, defaults to `55001`):
-            The port to connect to.
+            The port to connect to. The first free port from this one is used.
+        engine_transport (`str`, *optional*, defaults to `"tcp"`):
+            The transport to the engine, one of `"tcp"` or `"unix"`. Unix domain sockets skip the TCP stack and
+            don't use any port, which is faster when the engine runs on the same host and allows to run many
+            engines without port collisions.
+        engine_socket_path (`str`, *optional*, defaults to `None`):
+            The path of the Unix domain socket with the `"unix"` transport.
+            If not specified, a new path is chosen for each engine.
         engine_headless (`bool`, *optional*, defaults to `False`):
             Whether to run the Unity executable in headless mode.
+        binary_protocol (`bool`, *optional*, defaults to `True`):
+            Whether to request binary tensor framing for the actions and for the sensor, reward and done buffers.
+            The framing is negotiated when the scene is shown, older builds keep using JSON.
+        shared_memory (`bool`, *optional*, defaults to `False`):
+            Whether to receive the sensor, reward and done buffers through a memory-mapped file shared with the
+            engine instead of the socket. Only available when the engine runs on the same host.
+            Observations are then returned as views into the shared memory, which are overwritten after
+            `shared_memory_slots` steps: copy them if they need to be kept longer.
+        shared_memory_slots (`int`, *optional*, defaults to `4`):
+            The number of observation slots in the shared memory ring.
+        pipeline_depth (`int`, *optional*, defaults to `1`):
+            The maximum number of commands sent with `run_command_async` (e.g. `step_send_async`) which can wait for
+            their response at the same time. Sending more commands receives the oldest response first, and keeps it
+            until it is requested with `get_response_async`. Deeper pipelines hide the round-trip latency when the
+            actions don't depend on the last observations (e.g. scripted or open-loop policies).
+            Requires an engine supporting request ids, falls back to `1` otherwise.
+        collect_stats (`bool`, *optional*, defaults to `False`):
+            Whether to record the time spent encoding, sending, receiving and decoding the commands and the size of
+            the messages, see `stats`.
+        sensor_compression (`str` or `Dict[str, str]`, *optional*, defaults to `None`):
+            The compression of the uint8 sensor buffers (camera images) sent by the engine, either a mode applied to
+            all of them or the mode of each sensor tag: `"zlib"`, `"lz4"`, `"png"` or `"xor_delta"` (see
+            `simulate.engine.compression`). Requires the binary protocol and is ignored with `shared_memory`.
+        decode_threads (`int`, *optional*, defaults to `0`):
+            The number of threads decompressing the images of the compressed sensors in parallel, they are
+            decompressed in the calling thread if `0`.
+        engine_pool (`EnginePool`, *optional*, defaults to `None`):
+            A pool of engines launched ahead of time. An engine is taken from the pool instead of launching a new one,
+            and goes back to the pool when the engine is closed. The other `engine_*` arguments are then ignored.
     """
 
     def __init__(
@@ -96,24 +254,71 @@ class UnityEngine(Engine):
         engine_exe: str = "",
         engine_host="127.0.0.1",
         engine_port: int = 55001,
+        engine_transport: str = "tcp",
+        engine_socket_path: Optional[str] = None,
         engine_headless: bool = False,
+        binary_protocol: bool = True,
+        shared_memory: bool = False,
+        shared_memory_slots: int = 4,
+        pipeline_depth: int = 1,
+        collect_stats: bool = False,
+        sensor_compression: Optional[Union[str, Dict[str, str]]] = None,
+        decode_threads: int = 0,
+        engine_pool: Optional["EnginePool"] = None,
     ):
-        super().__init__(scene=scene, auto_update=auto_update)
-
-        self._initialize_server(
-            engine_exe=engine_exe, engine_host=engine_host, engine_port=engine_port, engine_headless=engine_headless
-        )
+        super().__init__(scene=scene, auto_update=auto_update, collect_stats=collect_stats)
+        self.binary_protocol = binary_protocol
+        self.protocol_features = set()
+        self.sensor_compression = normalize_sensor_compression(sensor_compression)
+        self._frame_decoder = FrameDecoder(n_threads=decode_threads)
+        self.shared_memory = shared_memory
+        self.shared_memory_slots = shared_memory_slots
+        self._observation_ring = None
+
+        if pipeline_depth < 1:
+            raise ValueError(f"pipeline_depth should be at least 1, got {pipeline_depth}")
+        if shared_memory and pipeline_depth >= shared_memory_slots:
+            raise ValueError(
+                f"pipeline_depth ({pipeline_depth}) should be smaller than shared_memory_slots ({shared_memory_slots}), "
+                "otherwise observations waiting in the pipeline are overwritten."
+            )
+        self.pipeline_depth = pipeline_depth
+        self._next_request_id = 0
+        self._pending_requests = collections.deque()  # ids of the requests waiting for their response
+        self._received_responses = collections.deque()  # responses received before they are requested
+
+        # The last scene shown, to initialize the engine again when it is restarted
+        self._glb_bytes = None
+        self._show_kwargs: Dict[str, Any] = {}
+
+        self.engine_pool = engine_pool
+        self._pooled_engine = None
+        self._closed = False
+        self._server_kwargs = {
+            "engine_exe": engine_exe,
+            "engine_host": engine_host,
+            "engine_port": engine_port,
+            "engine_transport": engine_transport,
+            "engine_socket_path": engine_socket_path,
+            "engine_headless": engine_headless,
+        }
+        if engine_pool is not None:
+            self._acquire_engine(engine_pool)
+        else:
+            self._initialize_server(**self._server_kwargs)
 
         atexit.register(self._close)
-        signal.signal(signal.SIGTERM, self._close)
-        signal.signal(signal.SIGINT, self._close)
+        # Ctrl-C closes the engine before interrupting the program. Signal handlers can only be installed from the
+        # main thread, e.g. not by the startup threads of `MultiProcessRLEnv`, which installs its own
+        self._signal_handler = CloseOnSignal(self.close)
+        self._signal_handler.install()
 
         self._map_pool = False
 
     @staticmethod
     def _get_unity_from_hub() -> str:
         """
-        Download the Unity executable from Hugging Face Hub.
+        Download the Unity executable from Hugging Face Hub, and extract it unless it is already in the cache.
 
         Returns:
             path (`str`):
@@ -126,61 +331,32 @@ class UnityEngine(Engine):
             revision=None,
             repo_type="space",
         )
+        return extract_unity_build(unity_compressed)
 
-        # open file
-        archive = tarfile.open(unity_compressed)
-        main_dir = os.path.commonpath(archive.getnames())
-
-        archive.extractall(HUGGINGFACE_UNITY_CACHE)
-        archive.close()
-        return os.path.join(HUGGINGFACE_UNITY_CACHE, main_dir, UNITY_EXECUTABLE_PATH)
-
-    def _launch_executable(self, executable: str, port: str, headless: bool):
+    def _launch_executable(self, executable: str, args: List[str], headless: bool):
         """
         Launch the Unity executable.
 
         Args:
             executable (`str`):
                 The path to the Unity executable.
-            port (`str`):
-                The port to connect to.
+            args (`List[str]`):
+                The arguments telling the executable where to connect, e.g. `["port", "55001"]`.
             headless (`bool`):
                 Whether to run the Unity executable in headless mode.
         """
-        # TODO: improve headless training check on a headless machine
-        if headless:
-            logger.info("launching env headless")
-            launch_command = f"{executable} -batchmode -nographics --args port {port}".split(" ")
-        else:
-            launch_command = f"{executable} --args port {port}".split(" ")
-        environ = os.environ.copy()
-        environ["PATH"] = "/usr/sbin:/sbin:" + environ["PATH"]
-
-        self.proc = subprocess.Popen(launch_command, env=environ)
-
-    @staticmethod
-    def _find_port_number(starting_engine_port: int) -> int:
-        """
-        Use a different port in each xdist worker.
-
-        Args:
-            starting_engine_port (`int`):
-                The port to start from.
+        self.proc = launch_executable(executable=executable, args=args, headless=headless)
 
-        Returns:
-            port (`int`):
-                The next port to connect to.
-        """
-        port_tests = list(range(starting_engine_port, starting_engine_port + 1024))
-        for port in port_tests:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                if s.connect_ex(("localhost", port)) == 0:
-                    continue
-                else:
-                    return port
-        raise RuntimeError("Could not find a free port")
-
-    def _initialize_server(self, engine_exe: str, engine_host: str, engine_port: int, engine_headless: bool):
+    def _initialize_server(
+        self,
+        engine_exe: str,
+        engine_host: str,
+        engine_port: int,
+        engine_transport: str,
+        engine_socket_path: Optional[str],
+        engine_headless: bool,
+        connect_timeout: Optional[float] = None,
+    ):
         """
         Initialize the local server and launch the Unity executable and connect to it.
 
@@ -191,67 +367,96 @@ class UnityEngine(Engine):
                 The host to connect to.
             engine_port (`int`):
                 The port to connect to.
+            engine_transport (`str`):
+                The transport to the engine, `"tcp"` or `"unix"`.
+            engine_socket_path (`str`, *optional*):
+                The path of the Unix domain socket.
             engine_headless (`bool`):
                 Whether to run the Unity executable in headless mode.
+            connect_timeout (`float`, *optional*, defaults to `None`):
+                The maximum time to wait for the engine to connect, in seconds. Waits until the engine connects or
+                its executable exits if not specified.
         """
         # Initializing on our side
-        self.host = engine_host
-        self.port = self._find_port_number(engine_port)
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        logger.info(f"Starting the server. Waiting for connection on {self.host} {self.port}...")
-        try:
-            self.socket.bind((self.host, self.port))
-        except OSError:
-            for n in range(NUM_BIND_RETRIES):
-                time.sleep(BIND_RETRIES_DELAY)
-                try:
-                    self.socket.bind((self.host, self.port))
-                    break
-                except OSError:
-                    logger.error(f"port {self.port} is still in use, trying again")
-            raise logger.error(f"Could not bind to port {self.port}")
-
-        self.socket.listen()
+        self.proc = None
+        self.transport = create_transport(
+            engine_transport,
+            host=engine_host,
+            port=engine_port,
+            socket_path=engine_socket_path,
+            # The editor always connects to the default port
+            find_free_port=engine_exe is not None and engine_exe != "debug",
+        )
+        self.socket = self.transport.listen()
 
         # Starting the Unity executable
         logger.info(f"Starting Unity executable {engine_exe}...")
         if engine_exe is None or engine_exe == "debug":
             pass  # We run with the editor
         elif engine_exe:
-            self._launch_executable(executable=engine_exe, port=str(engine_port), headless=engine_headless)
+            self._launch_executable(executable=engine_exe, args=self.transport.engine_args(), headless=engine_headless)
         elif engine_exe == "":
             engine_exe = self._get_unity_from_hub()
-            self._launch_executable(executable=engine_exe, port=str(engine_port), headless=engine_headless)
+            self._launch_executable(executable=engine_exe, args=self.transport.engine_args(), headless=engine_headless)
         else:
             raise ValueError("engine_exe must be a string, None or empty")
 
-        # Connecting both
-        logger.info(f"Connecting to Unity executable on {self.host} {self.port}...")
-        self.client, self.client_address = self.socket.accept()
-        # self.client.setblocking(0)  # Set to non-blocking
+        # Connecting both, without waiting for an executable which exited
+        self.client, self.client_address = self.transport.accept(timeout=connect_timeout, proc=self.proc)
         self.client.settimeout(SOCKET_TIME_OUT)  # Set a timeout
-        logger.info(f"Connection from {self.client_address}")
+        self.connection = Connection(self.client)
 
-    def _get_response(self) -> str:
+    def _acquire_engine(self, engine_pool: "EnginePool"):
+        """
+        Take an engine already launched and connected from a pool.
+
+        Args:
+            engine_pool (`EnginePool`):
+                The pool of engines.
+        """
+        self._pooled_engine = engine_pool.acquire()
+        self.transport = self._pooled_engine.transport
+        self.proc = self._pooled_engine.proc
+        self.client = self._pooled_engine.client
+        self.client_address = self._pooled_engine.client_address
+        self.connection = self._pooled_engine.connection
+
+    def _get_response(self) -> memoryview:
         """
         Get response from socket.
 
         Returns:
-            response (`str`):
-                The response from the socket.
+            response (`memoryview`):
+                The response from the socket, valid until the next response is received.
         """
-        while True:
+        return self.connection.recv()
 
-            data_length = self.client.recv(4)
-            data_length = int.from_bytes(data_length, "little")
+    def _decode_response(self, response: memoryview) -> Union[Dict, str]:
+        """
+        Decode a response received from the socket.
 
-            if data_length:
-                response = ""  # TODO: string concatenation may be slow
-                while len(response) < data_length:
-                    response += self.client.recv(data_length - len(response)).decode()
+        Args:
+            response (`memoryview`):
+                The raw response, either a binary frame or a JSON document.
 
-                return response
+        Returns:
+            response (`Dict` or `str`):
+                The decoded response, or the response as a string if it could not be decoded.
+        """
+        if is_binary_frame(response):
+            # Tensors are decoded as views into the frame, take it out of the reused receive buffer
+            event = decode_binary_frame(bytearray(response), decoder=self._frame_decoder)
+        else:
+            text = str(response, "utf-8")
+            try:
+                event = json.loads(text)
+            except Exception as e:
+                logger.warning(f"Exception loading response json data: {e}")
+                return text
+
+        if self._observation_ring is not None and isinstance(event, dict) and "shared_memory_slot" in event:
+            event = self._observation_ring.read(event.pop("shared_memory_slot"), event)
+        return event
 
     def update_asset(self, root_node: "Asset"):
         # TODO update and make this API more consistent with all the
@@ -261,18 +466,174 @@ class UnityEngine(Engine):
     def update_all_assets(self):
         raise NotImplementedError()
 
+    def _negotiate_protocol_features(self):
+        """
+        Negotiate the protocol features with the engine, before the scene is sent.
+
+        Builds which don't know about the Handshake command answer with an error message and keep using JSON.
+        """
+        requested = [REQUEST_ID_FEATURE, RESET_OBSERVATIONS_FEATURE]
+        if self.binary_protocol:
+            requested += [BINARY_RESPONSE_FEATURE, BINARY_ACTION_FEATURE, BINARY_SCENE_FEATURE]
+        if self.shared_memory:
+            requested.append(SHARED_MEMORY_FEATURE)
+        if self.sensor_compression and self.binary_protocol:
+            requested.append(COMPRESSION_FEATURE)
+        response = self.run_command("Handshake", protocol_features=requested)
+        if isinstance(response, dict):
+            self.protocol_features = set(response.get("protocol_features", []))
+        else:
+            logger.info("The engine doesn't support protocol negotiation, falling back to JSON messages.")
+            self.protocol_features = set()
+
+        if self.pipeline_depth > 1 and REQUEST_ID_FEATURE not in self.protocol_features:
+            logger.warning("The engine doesn't support request ids, commands won't be pipelined.")
+            self.pipeline_depth = 1
+        if self.sensor_compression and COMPRESSION_FEATURE not in self.protocol_features:
+            logger.warning("The engine doesn't support sensor compression, sensors are sent uncompressed.")
+
+    def configure_sensor_compression(
+        self, sensor_compression: Optional[Union[str, Dict[str, str]]] = None, decode_threads: Optional[int] = None
+    ):
+        """
+        Configure the compression of the uint8 sensor buffers, before the scene is shown.
+
+        Args:
+            sensor_compression (`str` or `Dict[str, str]`, *optional*, defaults to `None`):
+                A compression mode applied to all the uint8 sensors, or the compression mode of each sensor tag.
+                The current compression is kept if not specified.
+            decode_threads (`int`, *optional*, defaults to `None`):
+                The number of threads decompressing the images. The current number is kept if not specified.
+        """
+        if sensor_compression is not None:
+            self.sensor_compression = normalize_sensor_compression(sensor_compression)
+        if decode_threads is not None and decode_threads != self._frame_decoder.n_threads:
+            self._frame_decoder.close()
+            self._frame_decoder = FrameDecoder(n_threads=decode_threads)
+
     def show(self, **kwargs: Any) -> Union[Dict, str]:
         """
-        Initialize the scene and show it in the Godot engine.
+        Initialize the scene and show it in the Unity engine.
+
+        The glTF scene is sent as a raw binary payload when the engine supports it, and base64 encoded in the JSON
+        message otherwise.
+
+        Returns:
+            response (`Dict` or `str`):
+                The response from the socket.
+        """
+        self._glb_bytes = self._scene.as_glb_bytes()
+        self._show_kwargs = dict(kwargs)
+        return self._initialize_scene(self._glb_bytes, **kwargs)
+
+    def _initialize_scene(self, bytes_data: bytes, **kwargs: Any) -> Union[Dict, str]:
+        """
+        Negotiate the protocol features and send the Initialize command with a glTF scene.
+
+        Args:
+            bytes_data (`bytes`):
+                The scene, as a GLB file.
 
         Returns:
             response (`Dict` or `str`):
                 The response from the socket.
         """
-        bytes_data = self._scene.as_glb_bytes()
-        b64_bytes = base64.b64encode(bytes_data).decode("ascii")
-        kwargs.update({"b64bytes": b64_bytes})
-        return self.run_command("Initialize", **kwargs)
+        self._negotiate_protocol_features()
+
+        tensors = []
+        if BINARY_SCENE_FEATURE in self.protocol_features:
+            tensors.append((["glb"], np.frombuffer(bytes_data, dtype=np.uint8)))
+        else:
+            kwargs.update({"b64bytes": base64.b64encode(bytes_data).decode("ascii")})
+        if SHARED_MEMORY_FEATURE in self.protocol_features:
+            kwargs.update({"shared_memory": {"path": get_shared_memory_path(), "slots": self.shared_memory_slots}})
+        elif COMPRESSION_FEATURE in self.protocol_features:
+            kwargs.update({"sensor_compression": self.sensor_compression})
+        # The engine starts a new sequence of XOR deltas
+        self._frame_decoder.reset()
+        response = self.run_command("Initialize", tensors=tensors, **kwargs)
+
+        if self.shared_memory:
+            layout = response.get("shared_memory") if isinstance(response, dict) else None
+            self._initialize_shared_memory(kwargs.get("shared_memory", {}).get("path"), layout)
+        return response
+
+    def is_alive(self) -> bool:
+        """Whether the process of the engine is still running, always `True` with the editor."""
+        return self.proc is None or self.proc.poll() is None
+
+    def poll_response(self, timeout: float = 0.0) -> bool:
+        """
+        Wait for the response of the oldest command in flight to start arriving.
+
+        Args:
+            timeout (`float`, *optional*, defaults to `0.0`):
+                The maximum time to wait, in seconds.
+
+        Returns:
+            ready (`bool`):
+                Whether a response can be received without waiting for the engine.
+        """
+        if self.response_received():
+            return True
+        return self.connection.poll(timeout)
+
+    def response_received(self) -> bool:
+        """Whether the response of the oldest command in flight was already received, e.g. while pipelining."""
+        return bool(self._received_responses)
+
+    def restart(self) -> Union[Dict, str]:
+        """
+        Relaunch the engine after it crashed or stopped answering, and initialize it again with the last scene shown.
+
+        The scene is sent again as it was last exported, without exporting it again. The commands in flight are
+        dropped, as well as the state of the simulation. The new engine has `SOCKET_TIME_OUT` seconds to connect,
+        including the editor.
+
+        Returns:
+            response (`Dict` or `str`):
+                The response of the new engine to the Initialize command.
+        """
+        if self._closed:
+            raise RuntimeError("The engine was closed, it can't be restarted.")
+        if self._glb_bytes is None:
+            raise RuntimeError("The scene was never shown, there is nothing to restart.")
+        logger.warning("Restarting the engine...")
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+        self.connection.close()
+        if self._observation_ring is not None:
+            self._observation_ring.close()
+            self._observation_ring = None
+        self._pending_requests.clear()
+        self._received_responses.clear()
+
+        if self._pooled_engine is not None:
+            # The pool replaces the engine by a new process
+            pooled_engine, self._pooled_engine = self._pooled_engine, None
+            pooled_engine.connection = None
+            self.engine_pool.release(pooled_engine, reusable=False)
+            self._acquire_engine(self.engine_pool)
+        else:
+            self.transport.close()
+            self._initialize_server(**self._server_kwargs, connect_timeout=SOCKET_TIME_OUT)
+        return self._initialize_scene(self._glb_bytes, **self._show_kwargs)
+
+    def _initialize_shared_memory(self, path: str, layout: Optional[Dict]):
+        """
+        Map the observation ring created by the engine.
+
+        Args:
+            path (`str`):
+                The path of the memory-mapped file.
+            layout (`Dict`, *optional*):
+                The layout of the ring, as sent by the engine in response to the Initialize command.
+        """
+        if SHARED_MEMORY_FEATURE not in self.protocol_features or layout is None:
+            logger.warning("The engine doesn't support shared memory observations, falling back to the socket.")
+            return
+        self._observation_ring = ObservationRing(path, layout)
 
     def step(self, action: Optional[Dict] = None, **kwargs: Any) -> Union[Dict, str]:
         """Step the environment with the given action.
@@ -291,6 +652,23 @@ class UnityEngine(Engine):
             kwargs.update({"action": action})
         return self.run_command("Step", **kwargs)
 
+    def rollout(self, action: Optional[Dict] = None, **kwargs: Any) -> Union[Dict, str]:
+        """Apply a sequence of actions back to back in a single round-trip.
+
+        Args:
+            action (`Dict`, *optional*, defaults to `None`):
+                The actions to take in the environment, with a leading time dimension: keys are action tags and values
+                are tensors of shape (n_steps, n_maps, n_actors, action_size). Without actions, the number of steps is
+                given by the `n_steps` keyword argument.
+
+        Returns:
+            response (`Dict` or `str`):
+                The response from the socket, the buffers of the steps are stacked along a leading time dimension.
+        """
+        if action is not None:
+            kwargs.update({"action": action})
+        return self.run_command("Rollout", **kwargs)
+
     def step_send_async(self, **kwargs: Any):
         """Send the Step command asynchronously."""
         self.run_command_async("Step", **kwargs)
@@ -299,15 +677,77 @@ class UnityEngine(Engine):
         """Receive the response from the Step command asynchronously."""
         return self.get_response_async()
 
-    def reset(self) -> Union[Dict, str]:
+    def reset(self, indices: Optional[List[int]] = None, observe: bool = False, **kwargs: Any) -> Union[Dict, str]:
         """
         Reset the environment.
 
+        Args:
+            indices (`List[int]`, *optional*, defaults to `None`):
+                The indices of the maps to reset, among the maps shown. The whole scene is reset if not specified.
+            observe (`bool`, *optional*, defaults to `False`):
+                Whether to return the observations of the actors after the reset in the same response, rendered
+                without simulating. Builds which don't support it are stepped with `frame_skip=0` instead.
+            kwargs:
+                The keyword arguments of the observations, e.g. `sensors`.
+
         Returns:
             response (`Dict` or `str`):
-                The response from the socket.
+                The response from the socket, with the observations of the reset maps if `observe` is set.
+        """
+        reset_kwargs = self._get_reset_kwargs(indices, observe, kwargs)
+        if reset_kwargs is not None:
+            return self.run_command("Reset", **reset_kwargs)
+        self.run_command("Reset")
+        return self.step(frame_skip=0, return_frames=True, **kwargs)
+
+    def _get_reset_kwargs(
+        self, indices: Optional[List[int]], observe: bool, kwargs: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
         """
-        return self.run_command("Reset")
+        Get the keyword arguments of the Reset command.
+
+        Returns:
+            reset_kwargs (`Dict[str, Any]`, *optional*):
+                The keyword arguments of the Reset command, or `None` if the engine needs a step without simulation
+                after the reset to return the observations.
+        """
+        if RESET_OBSERVATIONS_FEATURE not in self.protocol_features:
+            if indices is not None:
+                raise NotImplementedError("This build of the engine can't reset maps separately.")
+            return None if observe else {}
+        reset_kwargs = dict(kwargs) if observe else {}
+        if indices is not None:
+            reset_kwargs["indices"] = [int(index) for index in indices]
+        if observe:
+            reset_kwargs["observe"] = True
+        return reset_kwargs
+
+    def _encode_command(
+        self, command: str, tensors: Optional[List[Tuple[List[str], np.ndarray]]] = None, **kwargs: Any
+    ) -> List[Union[bytes, memoryview]]:
+        """
+        Encode a command as a message.
+        Actions are sent as binary tensors if the engine supports it, and as JSON lists otherwise.
+
+        Args:
+            command (`str`):
+                The command to encode.
+            tensors (`List[Tuple[List[str], np.ndarray]]`, *optional*, defaults to `None`):
+                Additional tensors sent as raw binary payloads, as tuples of (path in the kwargs, array).
+                Only for engines which negotiated binary framing.
+
+        Returns:
+            message (`List[Union[bytes, memoryview]]`):
+                The parts of the message to send to the socket.
+        """
+        tensors = list(tensors) if tensors else []
+        action = kwargs.get("action")
+        if isinstance(action, dict) and BINARY_ACTION_FEATURE in self.protocol_features:
+            kwargs.pop("action")
+            tensors += [(["action", key], as_action_tensor(value)) for key, value in action.items()]
+        if tensors:
+            return encode_binary_frame_parts({"type": command, **kwargs}, tensors)
+        return [json.dumps({"type": command, **kwargs}, default=to_json_serializable).encode()]
 
     def run_command(self, command: str, wait_for_response: bool = True, **kwargs: Any) -> Union[Dict, str]:
         """
@@ -323,57 +763,125 @@ class UnityEngine(Engine):
             response (`Dict` or `str`):
                 The response from the socket.
         """
-        message = json.dumps({"type": command, **kwargs})
-        message_bytes = len(message).to_bytes(4, "little") + bytes(message.encode())
-        self.client.sendall(message_bytes)
         if wait_for_response:
-            response = self._get_response()
-            try:
-                return json.loads(response)
-            except Exception as e:
-                logger.warning(f"Exception loading response json data: {e}")
-                return response
+            # Receive the responses of the commands in flight first, they are kept until requested
+            while self._pending_requests:
+                self._received_responses.append(self._receive_pending_response())
+            self.run_command_async(command, **kwargs)
+            return self._receive_pending_response()
+        self._send_command(command, **kwargs)
+
+    def _send_command(self, command: str, **kwargs: Any):
+        """Encode a command and send it to the socket, recording the timings if stats are collected."""
+        with self._stats.timer("encode"):
+            message = self._encode_command(command, **kwargs)
+        with self._stats.timer("send"):
+            self.connection.send(message)
+        if self._stats.enabled:
+            self._stats.record("bytes_sent", sum(memoryview(part).nbytes for part in message))
 
     def run_command_async(self, command: str, **kwargs: Any):
         """
         Encode command and send the bytes to the socket asynchronously.
+        Up to `pipeline_depth` commands can wait for their response at the same time.
 
         Args:
             command (`str`):
                 The command to send to the socket.
         """
-        message = json.dumps({"type": command, **kwargs})
-        message_bytes = len(message).to_bytes(4, "little") + bytes(message.encode())
-        self.client.sendall(message_bytes)
+        if len(self._pending_requests) >= self.pipeline_depth:
+            # Make room in the pipeline, the response is kept until it is requested
+            self._received_responses.append(self._receive_pending_response())
+
+        request_id = None
+        if REQUEST_ID_FEATURE in self.protocol_features:
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            kwargs.update({"request_id": request_id})
+        self._send_command(command, **kwargs)
+        self._pending_requests.append(request_id)
 
     def get_response_async(self) -> Union[Dict, str]:
         """
         Get response from socket asynchronously.
+        Responses are returned in the order the commands were sent.
 
         Returns:
             response (`Dict` or `str`):
                 The response from the socket.
         """
-        response = self._get_response()
-        try:
-            return json.loads(response)
-        except Exception as e:
-            logger.warning(f"Exception loading response json data: {e}")
-            return response
+        if self._received_responses:
+            return self._received_responses.popleft()
+        return self._receive_pending_response()
+
+    def _receive_pending_response(self) -> Union[Dict, str]:
+        """
+        Receive the response of the oldest command in flight, and check its request id.
+
+        Returns:
+            response (`Dict` or `str`):
+                The response from the socket.
+        """
+        expected_id = self._pending_requests.popleft() if self._pending_requests else None
+        # The receive time includes waiting for the engine to execute the command
+        with self._stats.timer("receive"):
+            response = self._get_response()
+        if self._stats.enabled:
+            self._stats.record("bytes_received", response.nbytes)
+        with self._stats.timer("decode"):
+            response = self._decode_response(response)
+        if isinstance(response, dict) and "request_id" in response:
+            request_id = response.pop("request_id")
+            if expected_id is not None and request_id != expected_id:
+                raise RuntimeError(f"Received the response to request {request_id}, expected request {expected_id}.")
+        return response
 
     def _close(self):
         self.close()
 
     def close(self):
-        """Close the socket."""
+        """Close the socket, or unload the scene and give the engine back to its pool."""
+        if self._closed:
+            return
+        self._closed = True
+        self._signal_handler.uninstall()
+
+        if self.engine_pool is not None:
+            if self._pooled_engine is not None:
+                self._release_to_pool()
+            return
+
         try:
             self.run_command("Close", wait_for_response=False)
         except Exception as e:
             logger.error(f"Exception sending close message: {e}")
 
-        # self.client.shutdown(socket.SHUT_RDWR)
-        self.client.close()
-        self.socket.close()
+        self.connection.close()
+        self._release()
+
+    def _release_to_pool(self):
+        """Unload the scene, so that the engine of the pool can be reused by the next scene."""
+        try:
+            # Builds which don't know about the Unload command answer with an error message, they are replaced
+            reusable = isinstance(self.run_command("Unload"), dict)
+        except Exception as e:
+            logger.error(f"Exception unloading the scene: {e}")
+            reusable = False
+
+        pooled_engine, self._pooled_engine = self._pooled_engine, None
+        self._release()
+        self.engine_pool.release(pooled_engine, reusable=reusable)
+
+    def _release(self):
+        """Release the resources of the engine, once the connection is closed."""
+        if self.engine_pool is None:
+            # The transport of a pooled engine is kept for the next scene
+            self.transport.close()
+        self._frame_decoder.close()
+
+        if self._observation_ring is not None:
+            self._observation_ring.close()
+            self._observation_ring = None
 
         try:
             atexit.unregister(self._close)
@@ -1,3 +1,4 @@
+from .async_rl_env import AsyncRLEnv
 from .multi_proc_rl_env import MultiProcessRLEnv
 from .parallel_rl_env import ParallelRLEnv
 from .rl_env import RLEnv
@@ -0,0 +1,206 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Layout of the actions sent to the engines, compiled once from the action spaces of an environment."""
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from simulate.assets.sensors import spaces
+
+
+class ActionLayout:
+    """
+    The layout of the actions of an environment, compiled once from its action tags and action spaces: the shape and
+    dtype of the tensor sent to the engine for each action tag, and its offset in a flat action holding all of them.
+
+    The actions of a step are then checked and converted with a few numpy calls per action tag, whatever the number
+    of maps and actors. An action is either:
+
+    - a dict keyed by action tag, with a number, a (nested) list or an array holding the values of each actor,
+    - the value of the single action tag, if there is only one,
+    - a flat array of shape (n_maps * n_actors_per_map, size) holding the values of all the action tags at their
+      `offsets`, if there are several.
+
+    Unless the actions are trusted, the values of the discrete action tags are checked to be integers in the range of
+    their space (from its `start`, if any) before they are cast to int32, which would silently truncate them.
+
+    Args:
+        action_tags (`List[str]`):
+            The action tags of the actors.
+        action_space (`spaces.Space`):
+            The action space of an actor, a `spaces.Dict` keyed by action tag if there are several action tags.
+        n_maps (`int`, *optional*, defaults to `1`):
+            The number of maps stepped together.
+        n_actors_per_map (`int`, *optional*, defaults to `1`):
+            The number of actors in each map.
+        trusted (`bool`, *optional*, defaults to `False`):
+            Whether to trust the actions to have the expected tags, sizes and values and skip checking them, e.g. for
+            actions sampled by a policy with the same layout.
+    """
+
+    def __init__(
+        self,
+        action_tags: List[str],
+        action_space: spaces.Space,
+        n_maps: int = 1,
+        n_actors_per_map: int = 1,
+        trusted: bool = False,
+    ):
+        if isinstance(action_space, spaces.Dict):
+            action_spaces = action_space.spaces
+        elif len(action_tags) == 1:
+            action_spaces = {action_tags[0]: action_space}
+        else:
+            raise ValueError(f"The action space should be a Dict space with the action tags {action_tags}.")
+
+        self.tags = list(action_tags)
+        self.trusted = trusted
+        self.shapes: Dict[str, tuple] = {}
+        self.dtypes: Dict[str, np.dtype] = {}
+        self.offsets: Dict[str, int] = {}
+        # The range of the values of the discrete action tags, [low, high)
+        self._lows: Dict[str, np.ndarray] = {}
+        self._highs: Dict[str, np.ndarray] = {}
+
+        offset = 0
+        for tag in self.tags:
+            space = action_spaces[tag]
+            # Discrete spaces of recent gym versions start at `start`
+            low = np.asarray(getattr(space, "start", 0))
+            if isinstance(space, spaces.Discrete):
+                size, high = 1, low + space.n
+            elif isinstance(space, spaces.MultiDiscrete):
+                size, high = len(space.nvec), low + np.asarray(space.nvec)
+            elif isinstance(space, spaces.MultiBinary):
+                size, high = int(np.prod(space.n)), np.asarray(2)
+            elif isinstance(space, spaces.Box):
+                size, high = int(np.prod(space.shape)), None
+            else:
+                raise TypeError(f"Unsupported action space {space} for the action tag {tag}.")
+
+            # The engines read the actions as int32 or float32 tensors, see `as_action_tensor`
+            self.dtypes[tag] = np.dtype(np.int32 if high is not None else np.float32)
+            if high is not None:
+                self._lows[tag] = low
+                self._highs[tag] = high
+            self.shapes[tag] = (n_maps, n_actors_per_map, size)
+            self.offsets[tag] = offset
+            offset += size
+
+        self.n_actors = n_maps * n_actors_per_map
+        self.size = offset
+        self._tag_set = frozenset(self.tags)
+
+    def pack(self, action: Union[Dict, List, np.ndarray, int, float]) -> Dict[str, np.ndarray]:
+        """
+        Convert an action to the tensors sent to the engine.
+
+        Args:
+            action (`Dict` or `List` or `np.ndarray` or `int` or `float`):
+                The action of all the actors, see the class documentation.
+
+        Returns:
+            action (`Dict[str, np.ndarray]`):
+                The (n_maps, n_actors_per_map, action_size) tensor of each action tag.
+        """
+        if isinstance(action, dict):
+            if not self.trusted and not self._tag_set.issuperset(action.keys()):
+                unknown = [key for key in action if key not in self._tag_set]
+                raise ValueError(f"Action tag {unknown[0]} not found in action tags: {self.tags}.")
+            return {tag: self._pack_tag(tag, value) for tag, value in action.items()}
+        if len(self.tags) == 1:
+            return {self.tags[0]: self._pack_tag(self.tags[0], action)}
+
+        # A flat action holding all the action tags
+        action = np.asarray(action)
+        if not self.trusted and action.size != self.n_actors * self.size:
+            raise ValueError(
+                f"Action must be a dict with keys {self.tags} or an array of shape "
+                f"({self.n_actors}, {self.size}) holding all the action tags, got an array of shape {action.shape}."
+            )
+        action = action.reshape((self.n_actors, self.size))
+        return {
+            tag: self._pack_tag(tag, action[:, self.offsets[tag] : self.offsets[tag] + self.shapes[tag][-1]])
+            for tag in self.tags
+        }
+
+    def pack_sequence(self, actions: Union[Dict, List, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Convert a sequence of actions applied one step after the other (e.g. by a rollout) to the tensors sent to the
+        engine. The actions are checked as in `pack`.
+
+        Args:
+            actions (`Dict` or `List` or `np.ndarray`):
+                The actions of all the actors at each step, with a leading time dimension: a dict keyed by action tag,
+                or the values of the single action tag if there is only one.
+
+        Returns:
+            actions (`Dict[str, np.ndarray]`):
+                The (n_steps, n_maps, n_actors_per_map, action_size) tensor of each action tag.
+        """
+        if not isinstance(actions, dict):
+            if len(self.tags) != 1:
+                raise ValueError(
+                    f"The actions must be a dict with keys {self.tags} when there are several action tags."
+                )
+            actions = {self.tags[0]: actions}
+        elif not self.trusted and not self._tag_set.issuperset(actions.keys()):
+            unknown = [key for key in actions if key not in self._tag_set]
+            raise ValueError(f"Action tag {unknown[0]} not found in action tags: {self.tags}.")
+
+        packed = {}
+        for tag, value in actions.items():
+            if np.ndim(value) == 0:
+                raise ValueError(f"The actions of tag {tag} should have a leading time dimension.")
+            packed[tag] = self._pack_tag(tag, value, n_steps=len(value))
+        return packed
+
+    def _pack_tag(self, tag: str, value: Any, n_steps: Optional[int] = None) -> np.ndarray:
+        """
+        Convert the values of an action tag to its tensor, checking them unless the actions are trusted. The tensor
+        has a leading time dimension of size `n_steps`, if specified.
+        """
+        shape = self.shapes[tag] if n_steps is None else (n_steps, *self.shapes[tag])
+        if self.trusted:
+            return np.asarray(value, dtype=self.dtypes[tag]).reshape(shape)
+
+        array = np.asarray(value)
+        if array.size != np.prod(shape):
+            dims = (
+                "n_maps, n_actors_per_map, action_size"
+                if n_steps is None
+                else "n_steps, n_maps, n_actors_per_map, action_size"
+            )
+            raise ValueError(
+                f"The action of tag {tag} should hold {np.prod(shape)} values, of shape ({dims}) = {shape}, "
+                f"got an action of shape {np.shape(value)}."
+            )
+        array = array.reshape(shape)
+        if tag in self._highs:
+            self._check_discrete(tag, array)
+        return array.astype(self.dtypes[tag], copy=False)
+
+    def _check_discrete(self, tag: str, array: np.ndarray):
+        """Check the values of a discrete action tag before they are cast to integers, which would truncate them."""
+        if array.dtype.kind == "f":
+            # e.g. a flat action holding discrete and continuous action tags
+            if not np.all(np.mod(array, 1) == 0):
+                raise ValueError(f"The action of tag {tag} should hold integers, got non-integral values.")
+        elif array.dtype.kind not in "iub":
+            raise ValueError(f"The action of tag {tag} should hold integers, got values of dtype {array.dtype}.")
+        low, high = self._lows[tag], self._highs[tag]
+        if np.any(array < low) or np.any(array >= high):
+            raise ValueError(f"The action of tag {tag} has values out of its discrete action space [{low}, {high}).")
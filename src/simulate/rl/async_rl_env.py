@@ -0,0 +1,144 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from simulate.engine.async_engine import AsyncUnityEngine
+from simulate.engine.unity_engine import UnityEngine
+from simulate.rl.rl_env import RLEnv
+from simulate.scene import Scene
+
+
+class AsyncRLEnv(RLEnv):
+    """
+    An awaitable version of `RLEnv` for the Unity engine, built on asyncio.
+
+    `step`, `reset` and `close` are coroutines, so a single event loop can drive many simulations and overlap their
+    I/O without threads, e.g. `await asyncio.gather(*(env.step(action) for env in envs))`.
+
+    Args:
+        scene (`Scene`):
+            The Simulate scene to be wrapped, using the Unity engine.
+        time_step (`float`, *optional*, defaults to `1/30.0`):
+            The physics timestep of the environment.
+        frame_skip (`int`, *optional*, defaults to `4`):
+            The number of times an action is repeated in the backend simulation before the next observation is returned.
+        collect_stats (`bool`, *optional*, defaults to `False`):
+            Whether to record the timings of each phase of the steps and the size of the messages, see `stats`.
+        sensor_compression (`str` or `Dict[str, str]`, *optional*, defaults to `None`):
+            The compression of the camera sensors sent by the engine, see `RLEnv`.
+        decode_threads (`int`, *optional*, defaults to `None`):
+            The number of threads decompressing the camera images of the actors in parallel, see `RLEnv`.
+        trust_actions (`bool`, *optional*, defaults to `False`):
+            Whether to skip checking the tags, sizes and values of the actions, see `RLEnv`.
+    """
+
+    def __init__(
+        self,
+        scene: Scene,
+        time_step: Optional[float] = 1 / 30.0,
+        frame_skip: Optional[int] = 4,
+        collect_stats: bool = False,
+        sensor_compression: Optional[Union[str, Dict[str, str]]] = None,
+        decode_threads: Optional[int] = None,
+        trust_actions: bool = False,
+    ):
+        if not isinstance(scene.engine, UnityEngine):
+            raise ValueError(f"AsyncRLEnv requires a scene using the Unity engine, got {scene.engine}.")
+        # Checked before the scene is shown
+        engine = AsyncUnityEngine(scene.engine)
+        super().__init__(
+            scene,
+            time_step=time_step,
+            frame_skip=frame_skip,
+            collect_stats=collect_stats,
+            sensor_compression=sensor_compression,
+            decode_threads=decode_threads,
+            trust_actions=trust_actions,
+        )
+        self.engine = engine
+
+    async def step(
+        self, action: Union[Dict, List, np.ndarray], sensors: Optional[List[str]] = None
+    ) -> Tuple[Dict, np.ndarray, np.ndarray, Dict]:
+        """
+        The step function for the environment, follows the API from OpenAI Gym.
+
+        Args:
+            action (`Dict` or `List` or `ndarray`):
+                The action to be taken by the environment.
+            sensors (`List[str]`, *optional*, defaults to `None`):
+                The tags of the sensors to observe at this step, all the sensors if None.
+
+        Returns:
+            observation (`Dict`):
+                A dictionary of observations from the environment.
+            reward (`float`):
+                The reward for the action.
+            done (`bool`):
+                Whether the episode has ended.
+            info (`Dict`):
+                A dictionary of additional information.
+        """
+        with self._stats.timer("step"):
+            await self.step_send_async(action=action, sensors=sensors)
+            return await self.step_recv_async()
+
+    async def step_send_async(self, action: Union[Dict, List, np.ndarray], sensors: Optional[List[str]] = None):
+        """
+        Send the action to the engine without waiting for the observations.
+
+        Args:
+            action (`Dict` or `List` or `ndarray`): The action to be executed in the environment.
+            sensors (`List[str]`, *optional*, defaults to `None`): The tags of the sensors to observe at this step.
+        """
+        with self._stats.timer("format_action"):
+            action = self._format_action(action)
+            sensor_kwargs = self._format_sensors(sensors)
+        await self.engine.step_send_async(action=action, **sensor_kwargs)
+
+    async def step_recv_async(self) -> Tuple[Dict, np.ndarray, np.ndarray, Dict]:
+        """
+        Wait for the response of the engine to the last action sent.
+
+        Returns:
+            observation (`Dict`):
+                A dictionary of observations from the environment.
+            reward (`float`):
+                The reward for the action.
+            done (`bool`):
+                Whether the episode has ended.
+            info (`Dict`):
+                A dictionary of additional information.
+        """
+        event = await self.engine.step_recv_async()
+        with self._stats.timer("process_event"):
+            return self._process_step_event(event)
+
+    async def reset(self) -> Dict:
+        """
+        Resets the actors and the scene of the environment.
+
+        Returns:
+            obs (`Dict`): the observation of the environment after reset.
+        """
+        event = await self.engine.reset(observe=True)
+        return self._process_reset_event(event)
+
+    async def close(self):
+        """Close the scene."""
+        await self.engine.close()
@@ -12,11 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import selectors
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
 
 import numpy as np
 
+from simulate.engine.unity_engine import SOCKET_TIME_OUT
+from simulate.rl.step_buffers import StepBuffers
+from simulate.rl.vec_env import VecEnv, VecEnvIndices
+from simulate.utils import logging
+from simulate.utils.signals import CloseOnSignal
+from simulate.utils.stats import DEFAULT_WINDOW_SIZE, StepStats
+
 
 try:
     import gym
@@ -27,15 +38,10 @@ except ImportError:
             pass
 
 
-try:
-    from stable_baselines3.common.vec_env.base_vec_env import VecEnv, VecEnvIndices
-except ImportError:
-
-    class VecEnv:
-        pass  # Dummy class if SB3 is not installed
+logger = logging.get_logger(__name__)
 
-    class VecEnvIndices:
-        pass  # Dummy class if SB3 is not installed
+# Key of the info of the sub-environments which were reset because their engine was restarted
+ENGINE_RESTARTED = "engine_restarted"
 
 
 class MultiProcessRLEnv(VecEnv):
@@ -45,36 +51,105 @@ class MultiProcessRLEnv(VecEnv):
     Uses functionality from the VecEnv in stable baselines 3. For more information on VecEnv, see the source
     https://stable-baselines3.readthedocs.io/en/master/guide/vec_envs.html
 
+    The engines are supervised: while waiting for a step, the process of each engine is checked every
+    `heartbeat_interval` seconds, and an engine which crashed, closed its connection or didn't answer before the
+    `step_timeout` deadline is relaunched and shown its scene again. Its sub-environments are then reset, and returned
+    as done with `info["engine_restarted"] = True`. Engines are never restarted once the environment is closed, and
+    stepping a closed environment raises a `RuntimeError`.
+
     Args:
         env_fn (`Callable`): a generator function that returns a RLEnv / ParallelRLEnv for generating instances
             of the desired environment.
         n_parallel (`int`): the number of executable instances to create.
         starting_port (`int`): initial communication port for spawned executables.
+        concurrent_startup (`bool`, *optional*, defaults to `True`): whether to call `env_fn` for all the
+            environments at the same time, from separate threads. The executables then start, connect and load their
+            scene concurrently, and the scene of each environment is exported while the other executables start.
+            Set it to `False` if `env_fn` can't be called from several threads at once.
+        restart_engines (`bool`, *optional*, defaults to `True`): whether to restart the engines which fail, instead
+            of raising the error.
+        step_timeout (`float`, *optional*, defaults to `30.0`): the time given to all the engines to answer a step, in
+            seconds. Engines which don't answer in time are considered hung. No deadline if `None`.
+        heartbeat_interval (`float`, *optional*, defaults to `1.0`): the interval at which the processes of the
+            engines are checked while waiting for a step, in seconds.
+        receive_threads (`int`, *optional*, defaults to `None`): the number of threads receiving and decoding the
+            responses of the engines as soon as they arrive, while waiting for the other engines. Defaults to one
+            thread per engine (up to the number of CPUs), the responses are decoded in the calling thread if `0`.
+        reuse_buffers (`bool`, *optional*, defaults to `False`): whether to write the observations, rewards and dones
+            of all the engines into arrays allocated once for all the steps, see `StepBuffers`, instead of
+            concatenating them at each step. The data of each engine is written into its slice as soon as it is
+            decoded. The arrays returned by `step` are then overwritten by the next step, unless `copy_buffers` is set.
+        copy_buffers (`bool`, *optional*, defaults to `False`): whether `step` returns copies of the reused buffers,
+            with `reuse_buffers`.
+        collect_stats (`bool`, *optional*, defaults to `False`): whether to record the timings of each phase of the
+            steps in all the environments, see `stats`.
     """
 
-    def __init__(self, env_fn: Callable, n_parallel: int, starting_port: int = 55001):
+    def __init__(
+        self,
+        env_fn: Callable,
+        n_parallel: int,
+        starting_port: int = 55001,
+        concurrent_startup: bool = True,
+        restart_engines: bool = True,
+        step_timeout: Optional[float] = SOCKET_TIME_OUT,
+        heartbeat_interval: float = 1.0,
+        receive_threads: Optional[int] = None,
+        reuse_buffers: bool = False,
+        copy_buffers: bool = False,
+        collect_stats: bool = False,
+    ):
         self.n_parallel = n_parallel
-        self.envs = []
-        observation_space = None
-        action_space = None
+        self.restart_engines = restart_engines
+        self.step_timeout = step_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.n_restarts = 0
+        self._send_errors: Dict[int, Exception] = {}
+        self._step_sensors: Optional[List[str]] = None  # the tags of the sensors observed at the current step
+        self._step_deadline: Optional[float] = None
+        if receive_threads is None:
+            receive_threads = min(n_parallel, os.cpu_count() or 1)
+        self._receive_executor = (
+            ThreadPoolExecutor(receive_threads, thread_name_prefix="simulate-receive") if receive_threads else None
+        )
+        self._stats = StepStats(enabled=collect_stats)
 
         # create the environments
-        for i in range(n_parallel):
-            env = env_fn(starting_port + i)
-            self.n_show = env.n_show
-            observation_space = env.observation_space
-            action_space = env.action_space
-            self.envs.append(env)
+        self.envs = self._create_envs(env_fn, [starting_port + i for i in range(n_parallel)], concurrent_startup)
+        self.n_show = self.envs[-1].n_show
+        observation_space = self.envs[-1].observation_space
+        action_space = self.envs[-1].action_space
 
         num_envs = self.n_show * self.n_parallel
         super().__init__(num_envs, observation_space, action_space)
 
-    def step(self, actions: Optional[Union[list, np.array]] = None) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
+        # The sub-environments of each engine are consecutive in the outputs
+        self._n_envs_per_engine = self.n_show * self.envs[-1].n_actors_per_map
+        self._buffers = (
+            StepBuffers(observation_space, self._n_envs_per_engine * n_parallel, copy=copy_buffers)
+            if reuse_buffers
+            else None
+        )
+
+        # Ctrl-C closes all the engines before interrupting the program, including the engines started from the
+        # startup threads, which couldn't install their signal handlers
+        self._closed = False
+        self._signal_handler = CloseOnSignal(self.close)
+        self._signal_handler.install()
+
+        if collect_stats:
+            self.enable_stats()
+
+    def step(
+        self, actions: Optional[Union[list, np.array]] = None, sensors: Optional[List[str]] = None
+    ) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
         """
         The step function for the environment, follows the API from OpenAI Gym.
 
         Args:
             actions (`Dict` or `List`): TODO verify, a dict with actuator tags as keys and as values a Tensor of shape (n_show, n_actors, n_actions)
+            sensors (`List[str]`, *optional*, defaults to `None`): The tags of the sensors to observe at this step,
+                all the sensors if None.
 
         Returns:
             all_observation (`Dict`): TODO
@@ -82,22 +157,138 @@ class MultiProcessRLEnv(VecEnv):
             all_done (`bool`): TODO
             all_info: TODO
         """
+        with self._stats.timer("step"):
+            self._step_send(actions, sensors=sensors)
+            return self._step_recv()
+
+    def step_async(self, actions: Optional[Union[list, np.ndarray]], sensors: Optional[List[str]] = None) -> None:
+        """
+        Send the actions of a step to all the engines without waiting for the observations, see `step_wait`.
+        The engines simulate the step while the learner carries on, e.g. with a gradient update.
+
+        Args:
+            actions (`List` or `np.ndarray`): the actions of all the sub-environments.
+            sensors (`List[str]`, *optional*, defaults to `None`): The tags of the sensors to observe at this step,
+                all the sensors if None.
+        """
+        self._step_send(actions, sensors=sensors)
+
+    def step_wait(self) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
+        """
+        Wait for the step sent with `step_async`.
+
+        Returns:
+            all_observation (`Dict`): the observations of all the sub-environments, by sensor tag.
+            all_reward (`np.ndarray`): the rewards of all the sub-environments.
+            all_done (`np.ndarray`): whether the episode of each sub-environment is done.
+            all_info (`List[Dict]`): the info of each sub-environment.
+        """
+        return self._step_recv()
+
+    def _step_send(self, actions: Optional[Union[list, np.array]] = None, sensors: Optional[List[str]] = None):
+        """Send the actions of a step to all the engines."""
+        self._check_open()
         if isinstance(actions, list):
             actions = np.array(actions)
+        if isinstance(sensors, str):
+            sensors = [sensors]
 
+        self._send_errors = {}
+        self._step_sensors = list(sensors) if sensors is not None else None
         for i in range(self.n_parallel):
-            # TODO comment what is going on here
+            # Each engine receives the actions of its own sub-environments
             action = actions[i * self.n_show : (i + 1) * self.n_show] if actions is not None else None
-            self.envs[i].step_send_async(action)
+            try:
+                self.envs[i].step_send_async(action, sensors=sensors)
+            except OSError as e:
+                self._send_errors[i] = e
+        # The engines step in parallel, they all have the same deadline
+        self._step_deadline = time.monotonic() + self.step_timeout if self.step_timeout is not None else None
+
+    def _step_recv(self) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
+        """
+        Receive the step of all the engines, restarting the engines which failed.
+
+        The responses are received and decoded in the order the engines answer, on the receive threads, so that the
+        engines which are done are decoded while waiting for the slower ones.
+        """
+        self._check_open()
+        results: List[Optional[Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]]] = [None] * self.n_parallel
+        errors = dict(self._send_errors)
+        futures = {}
+
+        def receive(index: int):
+            if self._receive_executor is not None:
+                futures[index] = self._receive_executor.submit(self._receive_step, index)
+                return
+            try:
+                results[index] = self._receive_step(index)
+            except OSError as e:
+                errors[index] = e
+
+        with selectors.DefaultSelector() as selector:
+            for i in range(self.n_parallel):
+                if i in errors:
+                    continue
+                engine = self.envs[i].scene.engine
+                if engine.response_received():
+                    receive(i)
+                else:
+                    selector.register(engine.connection.socket, selectors.EVENT_READ, i)
+
+            while selector.get_map():
+                timeout = self.heartbeat_interval
+                if self._step_deadline is not None:
+                    timeout = max(0.0, min(timeout, self._step_deadline - time.monotonic()))
+                events = selector.select(timeout)
+                for key, _ in events:
+                    selector.unregister(key.fileobj)
+                    receive(key.data)
+                if events:
+                    continue
+
+                # Heartbeat: check the engines still waited for
+                timed_out = self._step_deadline is not None and time.monotonic() >= self._step_deadline
+                for key in list(selector.get_map().values()):
+                    engine = self.envs[key.data].scene.engine
+                    if not engine.is_alive():
+                        errors[key.data] = ConnectionError(
+                            f"The engine of environment {key.data} exited with code {engine.proc.returncode}."
+                        )
+                    elif timed_out:
+                        errors[key.data] = TimeoutError(
+                            f"The engine of environment {key.data} didn't answer within {self.step_timeout}s."
+                        )
+                    else:
+                        continue
+                    selector.unregister(key.fileobj)
+
+        for i, future in futures.items():
+            try:
+                results[i] = future.result()
+            except OSError as e:
+                errors[i] = e
+        for i, error in errors.items():
+            # Connection errors, socket timeouts and engines which are dead or hung
+            obs, reward, done, info = self._restart_engine(i, error)
+            # The restarted engine observed all its sensors, the step only the requested ones
+            if self._step_sensors is not None:
+                obs = {tag: obs[tag] for tag in self._step_sensors}
+            results[i] = obs, reward, done, info
+            if self._buffers is not None:
+                self._buffers.write(i * self._n_envs_per_engine, *results[i][:3])
+
+        if self._buffers is not None:
+            # The steps were already written into the buffers
+            all_info = [info for result in results for info in result[3]]
+            tags = self._step_sensors if self._step_sensors is not None else results[0][0].keys()
+            return (*self._buffers.outputs(tags), all_info)
 
         all_obs = []
         all_reward = []
         all_done = []
         all_info = []
-
-        for i in range(self.n_parallel):
-            obs, reward, done, info = self.envs[i].step_recv_async()
-
+        for obs, reward, done, info in results:
             all_obs.append(obs)
             all_reward.extend(reward)
             all_done.extend(done)
@@ -109,6 +300,70 @@ class MultiProcessRLEnv(VecEnv):
 
         return all_obs, all_reward, all_done, all_info
 
+    def _receive_step(self, index: int) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
+        """Receive the step of an engine, and write it into its slice of the buffers when they are reused."""
+        result = self.envs[index].step_recv_async()
+        if self._buffers is not None:
+            self._buffers.write(index * self._n_envs_per_engine, *result[:3])
+        return result
+
+    @staticmethod
+    def _create_envs(env_fn: Callable, ports: List[int], concurrent_startup: bool) -> List[Any]:
+        """
+        Create the environments, one per port.
+
+        Args:
+            env_fn (`Callable`): the function creating an environment from its port.
+            ports (`List[int]`): the port of each environment.
+            concurrent_startup (`bool`): whether to create the environments concurrently.
+
+        Returns:
+            envs (`List`): the environments.
+        """
+        if not concurrent_startup or len(ports) == 1:
+            return [env_fn(port) for port in ports]
+
+        # Launching, connecting and showing the scenes mostly wait for the executables, without holding the GIL
+        with ThreadPoolExecutor(len(ports), thread_name_prefix="simulate-startup") as executor:
+            futures = [executor.submit(env_fn, port) for port in ports]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            # Don't leave the executables which did start running
+            for future in futures:
+                if future.exception() is None:
+                    future.result().scene.close()
+            raise errors[0]
+        return [future.result() for future in futures]
+
+    def _restart_engine(self, index: int, error: Exception) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
+        """
+        Restart the engine of an environment which failed, and reset its sub-environments.
+
+        Args:
+            index (`int`): the index of the environment.
+            error (`Exception`): the error of the engine.
+
+        Returns:
+            obs (`Dict`): the observations after the reset.
+            reward (`np.ndarray`): zero rewards.
+            done (`np.ndarray`): all the sub-environments are done.
+            info (`List[Dict]`): the info of the sub-environments, flagged with `"engine_restarted"`.
+        """
+        if self._closed:
+            # The connections of a closed environment fail on purpose (e.g. closed by Ctrl-C during a step)
+            raise RuntimeError("The environment was closed, its engines can't be restarted.") from error
+        if not self.restart_engines:
+            raise error
+        logger.warning(f"The engine of environment {index} failed ({error}), restarting it.")
+        env = self.envs[index]
+        obs = env.restart()
+        self.n_restarts += 1
+
+        n_envs = env.n_show * env.n_actors_per_map
+        reward = np.zeros(n_envs, dtype=np.float32)
+        done = np.ones(n_envs, dtype=np.float32)
+        return obs, reward, done, [{ENGINE_RESTARTED: True} for _ in range(n_envs)]
+
     @staticmethod
     def _combine_obs(obs):
         out = defaultdict(list)
@@ -123,47 +378,202 @@ class MultiProcessRLEnv(VecEnv):
 
         return np_out
 
-    def reset(self):
+    def reset(self, indices: VecEnvIndices = None):
+        """
+        Reset all the sub-environments, or only some of them.
+
+        Args:
+            indices (`VecEnvIndices`, *optional*, defaults to `None`): the indices of the sub-environments to reset,
+                the other ones carry on with their episode. Only the engines running them are reset. All of them are
+                reset if not specified.
+
+        Returns:
+            all_observation (`Dict`): the observations after the reset, of the reset sub-environments only (in
+                ascending order) if `indices` is specified.
+        """
+        self._check_open()
+        if indices is not None:
+            return self._reset_indices(indices)
+
         # we aren't performing this async as this happens rarely as the env auto resets
         all_obs = []
         for i in range(self.n_parallel):
-            obs = self.envs[i].reset()
+            try:
+                obs = self.envs[i].reset()
+            except OSError as e:
+                obs = self._restart_engine(i, e)[0]
+            if self._buffers is not None:
+                self._buffers.write(i * self._n_envs_per_engine, obs)
             all_obs.append(obs)
+        if self._buffers is not None:
+            return self._buffers.outputs(all_obs[0].keys())[0]
         all_obs = self._combine_obs(all_obs)
 
         return all_obs
 
+    def _reset_indices(self, indices: VecEnvIndices) -> Dict:
+        """Reset some sub-environments, with a single reset of the maps of each engine running them."""
+        all_obs = []
+        for i, env_indices in sorted(self._get_env_indices(sorted(set(self._get_indices(indices)))).items()):
+            maps = [index - i * self.n_show for index in env_indices]
+            try:
+                obs = self.envs[i].reset(indices=maps)
+            except OSError as e:
+                # The restarted engine reset all its maps
+                obs = self._restart_engine(i, e)[0]
+                obs = {
+                    key: value.reshape((self.n_show, -1, *value.shape[1:]))[maps].reshape((-1, *value.shape[1:]))
+                    for key, value in obs.items()
+                }
+            all_obs.append(obs)
+        return self._combine_obs(all_obs)
+
+    def enable_stats(self, enabled: bool = True, window_size: int = DEFAULT_WINDOW_SIZE):
+        """
+        Start or stop recording the timings of each phase of the steps, in all the environments and their engines.
+
+        Args:
+            enabled (`bool`, *optional*, defaults to `True`):
+                Whether to record them.
+            window_size (`int`, *optional*, defaults to `1000`):
+                The number of values kept per phase to compute the percentiles.
+        """
+        self._stats.enabled = enabled
+        if window_size != self._stats.window_size:
+            self._stats.window_size = window_size
+            self._stats.reset()
+        for env in self.envs:
+            env.enable_stats(enabled, window_size=window_size)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the recorded timings (in seconds) and message sizes (in bytes) by phase, over all the environments.
+        `step` is the time of the vectorized step, the other phases are recorded in each environment, see
+        `RLEnv.stats`.
+
+        Returns:
+            stats (`Dict[str, Dict[str, float]]`):
+                For each phase, the number of recorded values and the mean, p50, p95, p99 and max of the last ones.
+        """
+        return {
+            **StepStats.merge(env.scene.engine._stats for env in self.envs),
+            **StepStats.merge(env._stats for env in self.envs),
+            **self._stats.summary(),
+        }
+
+    def _check_open(self):
+        """Raise if the environment was closed, instead of treating its closed connections as failed engines."""
+        if self._closed:
+            raise RuntimeError("The environment is closed.")
+
     def close(self):
+        """Close all the environments and their engines."""
+        if self._closed:
+            return
+        self._closed = True
+        self._signal_handler.uninstall()
+        if self._receive_executor is not None:
+            self._receive_executor.shutdown(wait=False)
+            self._receive_executor = None
         for env in self.envs:
             env.scene.close()
 
     def env_is_wrapped(self, wrapper_class: Type[gym.Wrapper], indices: VecEnvIndices = None) -> List[bool]:
         return [False] * self.n_show * self.n_parallel
 
-    # required abstract methods
+    def _get_env_indices(self, indices: VecEnvIndices) -> Dict[int, List[int]]:
+        """
+        Group the indices of sub-environments by environment (and engine).
 
-    def step_async(self, actions: np.ndarray) -> None:
-        raise NotImplementedError()
+        Args:
+            indices (`VecEnvIndices`): the indices of the sub-environments, all of them if None.
 
-    def seed(self, seed: Optional[int] = None):  # -> List[Union[None, int]]:
-        # this should be done when the env is initialized
-        return
-        # raise NotImplementedError()
+        Returns:
+            env_indices (`Dict[int, List[int]]`): the indices of the requested sub-environments of each environment.
+        """
+        env_indices = defaultdict(list)
+        for index in self._get_indices(indices):
+            env_indices[index // self.n_show].append(index)
+        return env_indices
+
+    def _get_local_indices(self, indices: VecEnvIndices) -> Dict[int, List[int]]:
+        """
+        Get the indices of the requested sub-environments within each environment, e.g. the maps of a
+        `ParallelRLEnv`.
+
+        Args:
+            indices (`VecEnvIndices`): the indices of the sub-environments, all of them if None.
+
+        Returns:
+            local_indices (`Dict[int, List[int]]`): the indices of the requested sub-environments in each environment.
+        """
+        return {
+            env_index: [index - env_index * self.n_show for index in sub_indices]
+            for env_index, sub_indices in self._get_env_indices(indices).items()
+        }
 
     def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
-        raise NotImplementedError()
+        """
+        Get an attribute of the sub-environments, from the environment (e.g. `ParallelRLEnv`) running each of them.
+
+        Args:
+            attr_name (`str`): the name of the attribute.
+            indices (`VecEnvIndices`, *optional*, defaults to `None`): the indices of the sub-environments, all of
+                them if None.
+
+        Returns:
+            values (`List[Any]`): the value of the attribute for each sub-environment.
+        """
+        return [getattr(self.envs[index // self.n_show], attr_name) for index in self._get_indices(indices)]
 
     def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
-        raise NotImplementedError()
+        """
+        Set an attribute of the environments running the given sub-environments, with their `set_attr`. The maps of
+        a `ParallelRLEnv` share its attributes, so all of them have to be selected.
+
+        Args:
+            attr_name (`str`): the name of the attribute.
+            value (`Any`): the new value.
+            indices (`VecEnvIndices`, *optional*, defaults to `None`): the indices of the sub-environments, all of
+                them if None.
+        """
+        for env_index, local_indices in self._get_local_indices(indices).items():
+            self.envs[env_index].set_attr(attr_name, value, indices=local_indices)
 
     def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> List[Any]:
-        raise NotImplementedError()
+        """
+        Call a method of the environments running the given sub-environments, with their `env_method`. The maps of a
+        `ParallelRLEnv` share the environment, so all of them have to be selected.
 
-    def get_images(self) -> Sequence[np.ndarray]:
-        raise NotImplementedError()
+        Args:
+            method_name (`str`): the name of the method.
+            method_args: the positional arguments of the method.
+            indices (`VecEnvIndices`, *optional*, defaults to `None`): the indices of the sub-environments, all of
+                them if None.
+            method_kwargs: the keyword arguments of the method.
 
-    def step_send(self):
-        raise NotImplementedError()
+        Returns:
+            results (`List[Any]`): the result of the call for each sub-environment, in the order of `indices`.
+        """
+        results = {}
+        for env_index, local_indices in self._get_local_indices(indices).items():
+            env_results = self.envs[env_index].env_method(
+                method_name, *method_args, indices=local_indices, **method_kwargs
+            )
+            for local_index, result in zip(local_indices, env_results):
+                results[env_index * self.n_show + local_index] = result
+        return [results[index] for index in self._get_indices(indices)]
 
-    def step_wait(self):
+    # required abstract methods
+
+    def seed(self, seed: Optional[int] = None):  # -> List[Union[None, int]]:
+        # this should be done when the env is initialized
+        return
+        # raise NotImplementedError()
+
+    def get_images(self) -> Sequence[np.ndarray]:
         raise NotImplementedError()
+
+    def step_send(self, actions: Optional[Union[list, np.ndarray]], sensors: Optional[List[str]] = None) -> None:
+        """Alias of `step_async`."""
+        self.step_async(actions, sensors=sensors)
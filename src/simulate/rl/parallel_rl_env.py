@@ -14,6 +14,7 @@
 
 
 # Lint as: python3
+import os
 from collections import defaultdict
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
 
@@ -29,24 +30,15 @@ except ImportError:
             pass
 
 
-try:
-    from stable_baselines3.common.vec_env.base_vec_env import VecEnv, VecEnvIndices, VecEnvStepReturn
-except ImportError:
-
-    class VecEnv:
-        pass  # Dummy class if SB3 is not installed
-
-    class VecEnvIndices:
-        pass  # Dummy class if SB3 is not installed
-
-    class VecEnvStepReturn:
-        pass  # Dummy class if SB3 is not installed
-
-
 import simulate as sm
 
 # Lint as: python3
+from simulate.engine.protocol import cast_sensor_values
+from simulate.rl.action_layout import ActionLayout
+from simulate.rl.step_buffers import StepBuffers
+from simulate.rl.vec_env import VecEnv, VecEnvIndices, VecEnvStepReturn
 from simulate.scene import Scene
+from simulate.utils.stats import DEFAULT_WINDOW_SIZE, StepStats
 
 
 class ParallelRLEnv(VecEnv):
@@ -62,6 +54,23 @@ class ParallelRLEnv(VecEnv):
             the number of executable instances to create.
         starting_port (`int`, *optional*, defaults to `55001`):
             initial communication port for spawned executables.
+        collect_stats (`bool`, *optional*, defaults to `False`):
+            Whether to record the timings of each phase of the steps and the size of the messages, see `stats`.
+        sensor_compression (`str` or `Dict[str, str]`, *optional*, defaults to `None`):
+            The compression of the camera sensors sent by the engine, either a mode applied to all of them or the
+            mode of each sensor tag: `"zlib"`, `"lz4"`, `"png"` or `"xor_delta"`.
+        decode_threads (`int`, *optional*, defaults to `None`):
+            The number of threads decompressing the camera images of the maps in parallel. Defaults to one thread
+            per shown map (up to the number of CPUs) with `sensor_compression`, and to `0` (no thread) otherwise.
+        reuse_buffers (`bool`, *optional*, defaults to `False`):
+            Whether to write the observations, rewards and dones into arrays allocated once for all the steps, see
+            `StepBuffers`. The arrays returned by `step` are then overwritten by the next step, unless `copy_buffers`
+            is set.
+        copy_buffers (`bool`, *optional*, defaults to `False`):
+            Whether `step` returns copies of the reused buffers, with `reuse_buffers`.
+        trust_actions (`bool`, *optional*, defaults to `False`):
+            Whether to skip checking the tags, sizes and values of the actions, which are then only converted to the
+            tensors sent to the engine, see `ActionLayout`.
     """
 
     def __init__(
@@ -71,8 +80,17 @@ class ParallelRLEnv(VecEnv):
         n_show: Optional[int] = 1,
         time_step: Optional[float] = 1 / 30.0,
         frame_skip: Optional[int] = 4,
+        collect_stats: bool = False,
+        sensor_compression: Optional[Union[str, Dict[str, str]]] = None,
+        decode_threads: Optional[int] = None,
+        reuse_buffers: bool = False,
+        copy_buffers: bool = False,
+        trust_actions: bool = False,
         **engine_kwargs,
     ):
+        self._stats = StepStats(enabled=collect_stats)
+        if decode_threads is None:
+            decode_threads = min(n_show, os.cpu_count() or 1) if sensor_compression is not None else 0
 
         if not hasattr(map_fn, "__call__"):
             raise ValueError("map_fn must be callable for multi-map RL Env")
@@ -83,7 +101,14 @@ class ParallelRLEnv(VecEnv):
             return_frames=False,
             return_nodes=False,
         )
-        self.scene = Scene(engine="unity", config=scene_config, **engine_kwargs)
+        self.scene = Scene(
+            engine="unity",
+            config=scene_config,
+            collect_stats=collect_stats,
+            sensor_compression=sensor_compression,
+            decode_threads=decode_threads,
+            **engine_kwargs,
+        )
         self.scene += sm.LightSun(name="sun", position=[0, 20, 0], intensity=0.9)
         self.map_roots = []
         for i in range(n_maps):
@@ -106,8 +131,21 @@ class ParallelRLEnv(VecEnv):
         self.action_space = self.scene.actors[0].action_space
         self.observation_space = self.scene.actors[0].observation_space
         self.action_tags = self.scene.actors[0].action_tags
+        self.sensor_tags = self.scene.actors[0].sensor_tags
+        self._action_layout = ActionLayout(
+            self.action_tags,
+            self.action_space,
+            n_maps=n_show,
+            n_actors_per_map=self.n_actors_per_map,
+            trusted=trust_actions,
+        )
 
         super().__init__(n_show, self.observation_space, self.action_space)
+        self._buffers = (
+            StepBuffers(self.observation_space, n_show * self.n_actors_per_map, copy=copy_buffers)
+            if reuse_buffers
+            else None
+        )
 
         # Don't return simulation data, since minimal/faster data will be returned by agent sensors
         self.scene.config.time_step = time_step
@@ -122,7 +160,9 @@ class ParallelRLEnv(VecEnv):
             n_show=n_show,
         )
 
-    def step(self, action: Union[Dict, List, np.ndarray]) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
+    def step(
+        self, action: Union[Dict, List, np.ndarray], sensors: Optional[List[str]] = None
+    ) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
         """
         The step function for the environment, follows the API from OpenAI Gym.
 
@@ -130,6 +170,9 @@ class ParallelRLEnv(VecEnv):
         Args:
             action (`Dict` or `List`):
                 a dict or list of actions for each actuator.
+            sensors (`List[str]`, *optional*, defaults to `None`):
+                the tags of the sensors to observe at this step, all the sensors if None. The other sensors are
+                neither rendered nor sent by the engine.
 
         Returns:
             all_observation (`List[Dict]`):
@@ -142,55 +185,56 @@ class ParallelRLEnv(VecEnv):
                 a list of dict of additional information.
         """
 
-        self.step_send_async(action=action)
-        return self.step_recv_async()
+        with self._stats.timer("step"):
+            self.step_send_async(action=action, sensors=sensors)
+            return self.step_recv_async()
 
-    def step_send_async(self, action: Union[Dict, List, np.ndarray]):
+    def step_send_async(self, action: Union[Dict, List, np.ndarray], sensors: Optional[List[str]] = None):
         """
         Send a step to the environment asynchronously.
 
         Args:
             action (`Dict` or `List` or `np.ndarray`):
                 A dict or list of actions for each actuator.
+            sensors (`List[str]`, *optional*, defaults to `None`):
+                The tags of the sensors to observe at this step, all the sensors if None.
         """
-        if not isinstance(action, dict):
-            if len(self.action_tags) != 1:
-                raise ValueError(
-                    f"Action must be a dict with keys {self.action_tags} when there are multiple action tags."
-                )
-            action = {self.action_tags[0]: action}
-
-        # Check that the keys are in the action tags
-        # Add maps/actor dimension to action if single map/actor
-        for key, value in action.items():
-            if key not in self.action_tags:
-                raise ValueError(f"Action tag {key} not found in action tags: {self.action_tags}.")
-            if isinstance(value, (int, float)):
-                # A single value for the action – we add the map/actor/action-list dimensions
-                if self.n_show == 1 and self.n_actors == 1:
-                    action[key] = [[[value]]]
-                else:
-                    raise ValueError(
-                        f"All actions must be list (maps) of list (actors) of list of floats/int (action). "
-                        f"if the number of maps or actors is greater than 1 (in our case n_show: {self.n_show} "
-                        f"and n_actors {self.n_actors})."
-                    )
-            elif isinstance(value, (list, tuple)) and len(value) > 0 and isinstance(value[0], (int, float)):
-                # A list value for the action – we add the map/actor dimensions
-                if self.n_show == 1 and self.n_actors == 1:
-                    action[key] = [[value]]
-                else:
-                    raise ValueError(
-                        f"All actions must be list (maps) of list (actors) of list of floats/int (action). "
-                        f"if the number of maps or actors is greater than 1 (in our case n_show: {self.n_show} "
-                        f"and n_actors {self.n_actors})."
-                    )
-            elif isinstance(value, np.ndarray) and len(value) > 0 and isinstance(value[0], (np.int64, np.float32)):
-                # actions are a number array
-                value = value.reshape((self.n_show, self.n_actors_per_map, -1))
-                action[key] = value.tolist()
-
-        self.scene.engine.step_send_async(action=action)
+        with self._stats.timer("format_action"):
+            action = self._format_action(action)
+            sensor_kwargs = self._format_sensors(sensors)
+        self.scene.engine.step_send_async(action=action, **sensor_kwargs)
+
+    def _format_sensors(self, sensors: Optional[List[str]]) -> Dict:
+        """
+        Check the tags of the sensors requested for a step.
+
+        Args:
+            sensors (`List[str]`, *optional*): The tags of the sensors to observe, all the sensors if None.
+
+        Returns:
+            kwargs (`Dict`): The keyword arguments selecting the sensors in the engine.
+        """
+        if sensors is None:
+            return {}
+        if isinstance(sensors, str):
+            sensors = [sensors]
+        for tag in sensors:
+            if tag not in self.sensor_tags:
+                raise ValueError(f"Sensor tag {tag} not found in sensor tags: {self.sensor_tags}.")
+        return {"sensors": list(sensors)}
+
+    def _format_action(self, action: Union[Dict, List, np.ndarray]) -> Dict:
+        """
+        Format an action as a dictionary of (n_show, n_actors_per_map, action_size) arrays, as expected by the engine,
+        see `ActionLayout`.
+
+        Args:
+            action (`Dict` or `List` or `np.ndarray`): A dict or list of actions for each actuator.
+
+        Returns:
+            action (`Dict`): The formatted action, keyed by action tag.
+        """
+        return self._action_layout.pack(action)
 
     def step_recv_async(self) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
         """
@@ -208,36 +252,106 @@ class ParallelRLEnv(VecEnv):
         """
         event = self.scene.engine.step_recv_async()
 
-        # Extract observations, reward, and done from event data
-        # TODO nathan thinks we should make this for 1 agent, have a separate one for multiple agents.
-        obs = self._extract_sensor_obs(event["actor_sensor_buffers"])
-        reward = self._convert_to_numpy(event["actor_reward_buffer"]).flatten()
-        done = self._convert_to_numpy(event["actor_done_buffer"]).flatten()
-
-        obs = self._squeeze_actor_dimension(obs)
+        with self._stats.timer("process_event"):
+            # Extract observations, reward, and done from event data
+            # TODO nathan thinks we should make this for 1 agent, have a separate one for multiple agents.
+            obs = self._extract_sensor_obs(event.get("actor_sensor_buffers", {}))
+            reward = self._convert_to_numpy(event["actor_reward_buffer"])
+            done = self._convert_to_numpy(event["actor_done_buffer"])
+
+            if self._buffers is not None:
+                self._buffers.write(0, obs, reward, done)
+                obs, reward, done = self._buffers.outputs(obs.keys())
+            else:
+                obs = self._squeeze_actor_dimension(obs)
+                reward = reward.flatten()
+                done = done.flatten()
 
         return obs, reward, done, [{}] * len(done)
 
+    def rollout(
+        self, actions: Union[Dict, np.ndarray], sensors: Optional[List[str]] = None
+    ) -> Tuple[Dict, np.ndarray, np.ndarray, List[Dict]]:
+        """
+        Apply a sequence of actions back to back in a single round-trip with the engine.
+
+        Args:
+            actions (`Dict` or `ndarray`):
+                The actions to be executed, with a leading time dimension, e.g. an array of shape
+                (n_steps, n_show * n_actors_per_map, action_size) or a dict of such arrays keyed by action tag. A dict
+                is required if there are several action tags.
+            sensors (`List[str]`, *optional*, defaults to `None`):
+                The tags of the sensors to observe at each step, all the sensors if None.
+
+        Returns:
+            obs (`Dict`):
+                A dict of observations for each sensor, of shape (n_steps, n_show * n_actors_per_map, ...).
+            reward (`ndarray`):
+                The rewards of each step, of shape (n_steps, n_show * n_actors_per_map).
+            done (`ndarray`):
+                Whether the episodes are done at each step, of shape (n_steps, n_show * n_actors_per_map).
+            info (`List[Dict]`):
+                A dict of additional information for each environment.
+        """
+        # The actions are checked as in `step`, see `ActionLayout.pack_sequence`
+        event = self.scene.rollout(self._action_layout.pack_sequence(actions), **self._format_sensors(sensors))
+
+        obs = self._extract_sensor_obs(event.get("actor_sensor_buffers", {}))
+        reward = self._convert_to_numpy(event["actor_reward_buffer"])
+        done = self._convert_to_numpy(event["actor_done_buffer"])
+        n_steps = len(reward)
+
+        for k, v in obs.items():
+            obs[k] = v.reshape((n_steps, self.n_show * self.n_actors_per_map, *v.shape[3:]))
+        reward = reward.reshape((n_steps, -1))
+        done = done.reshape((n_steps, -1))
+        return obs, reward, done, [{}] * done.shape[1]
+
     def _squeeze_actor_dimension(self, obs: Dict) -> Dict:
         for k, v in obs.items():
             obs[k] = obs[k].reshape((self.n_show * self.n_actors_per_map, *obs[k].shape[2:]))
         return obs
 
-    def reset(self) -> Dict:
+    def reset(self, indices: VecEnvIndices = None) -> Dict:
         """
-        Resets the actors and the scene of the environment.
+        Resets the actors and the scene of the environment, or only some of its maps.
+
+        The engine returns the observations after the reset in the same round-trip.
+
+        Args:
+            indices (`VecEnvIndices`, *optional*, defaults to `None`):
+                The indices of the sub-environments (maps) to reset, the other maps carry on with their episode.
+                All of them are reset if not specified.
 
         Returns:
-            obs (`Dict`): the observation of the environment after reset.
+            obs (`Dict`): the observation of the environment after reset, or of the reset sub-environments only (in
+                ascending order) if `indices` is specified.
         """
-        self.scene.reset()
-
-        # To extract observations, we do a "fake" step (no actual simulation with frame_skip=0)
-        event = self.scene.step(return_frames=True, frame_skip=0)
-        obs = self._extract_sensor_obs(event["actor_sensor_buffers"])
+        if indices is not None:
+            indices = sorted(set(self._get_indices(indices)))
+            event = self.scene.reset(indices=indices, observe=True)
+            obs = self._extract_sensor_obs(event.get("actor_sensor_buffers", {}))
+            # The (n_show, n_actors_per_map, ...) observations of the reset maps only
+            return {key: value[indices].reshape((-1, *value.shape[2:])) for key, value in obs.items()}
+
+        event = self.scene.reset(observe=True)
+        obs = self._extract_sensor_obs(event.get("actor_sensor_buffers", {}))
+        if self._buffers is not None:
+            self._buffers.write(0, obs)
+            return self._buffers.outputs(obs.keys())[0]
         obs = self._squeeze_actor_dimension(obs)
         return obs
 
+    def restart(self) -> Dict:
+        """
+        Relaunch the engine after it crashed or stopped answering, show the scene again and reset it.
+
+        Returns:
+            obs (`Dict`): the observation of the environment after the restart.
+        """
+        self.scene.engine.restart()
+        return self.reset()
+
     @staticmethod
     def _combine_obs(obs) -> Dict:
         """
@@ -262,26 +376,33 @@ class ParallelRLEnv(VecEnv):
         return np_out
 
     @staticmethod
-    def _convert_to_numpy(event_data: Dict) -> np.ndarray:
+    def _convert_to_numpy(event_data: Union[Dict, np.ndarray]) -> np.ndarray:
         """
         Converts the event data to a numpy array.
 
         Args:
-            event_data (`Dict`):
+            event_data (`Dict` or `np.ndarray`):
                 The event data.
 
         Returns:
             data (`np.ndarray`):
                 The event data as a numpy array.
         """
+        if isinstance(event_data, np.ndarray):
+            # Buffers received through binary framing are already decoded
+            return event_data
         if event_data["type"] == "uint8":
             shape = event_data["shape"]
-            return np.array(event_data["uintBuffer"], dtype=np.uint8).reshape(shape)
+            array = np.array(event_data["uintBuffer"], dtype=np.uint8).reshape(shape)
         elif event_data["type"] == "float":
             shape = event_data["shape"]
-            return np.array(event_data["floatBuffer"], dtype=np.float32).reshape(shape)
+            array = np.array(event_data["floatBuffer"], dtype=np.float32).reshape(shape)
         else:
             raise TypeError
+        if "dtype" in event_data:
+            # The JSON buffers hold the raw values, the binary frames the values in the dtype of the sensor
+            array = cast_sensor_values(array, event_data["dtype"], event_data.get("quantizationRange"))
+        return array
 
     def _extract_sensor_obs(self, sim_event_data: Dict) -> Dict:
         """
@@ -296,6 +417,33 @@ class ParallelRLEnv(VecEnv):
             sensor_obs[sensor_tag] = self._convert_to_numpy(sensor_data)
         return sensor_obs
 
+    def enable_stats(self, enabled: bool = True, window_size: int = DEFAULT_WINDOW_SIZE):
+        """
+        Start or stop recording the timings of each phase of the steps, in the environment and in the engine.
+
+        Args:
+            enabled (`bool`, *optional*, defaults to `True`):
+                Whether to record them.
+            window_size (`int`, *optional*, defaults to `1000`):
+                The number of values kept per phase to compute the percentiles.
+        """
+        self._stats.enabled = enabled
+        if window_size != self._stats.window_size:
+            self._stats.window_size = window_size
+            self._stats.reset()
+        self.scene.engine.enable_stats(enabled, window_size=window_size)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the recorded timings (in seconds) and message sizes (in bytes) of the steps, by phase, see
+        `RLEnv.stats`.
+
+        Returns:
+            stats (`Dict[str, Dict[str, float]]`):
+                For each phase, the number of recorded values and the mean, p50, p95, p99 and max of the last ones.
+        """
+        return {**self.scene.engine.stats(), **self._stats.summary()}
+
     def close(self):
         """Close the environment."""
         self.scene.close()
@@ -323,30 +471,123 @@ class ParallelRLEnv(VecEnv):
         """Check if the environment is wrapped."""
         return [False] * self.n_agents * self.n_parallel
 
-    # required abstract methods
+    def step_async(self, actions: Union[Dict, List, np.ndarray], sensors: Optional[List[str]] = None) -> None:
+        """
+        Send the actions of a step without waiting for the observations, see `step_wait`.
+        The engine simulates the step while the learner carries on, e.g. with a gradient update.
 
-    def step_async(self, actions: np.ndarray) -> None:
-        raise NotImplementedError()
+        Args:
+            actions (`Dict` or `List` or `np.ndarray`):
+                A dict or list of actions for each actuator.
+            sensors (`List[str]`, *optional*, defaults to `None`):
+                The tags of the sensors to observe at this step, all the sensors if None.
+        """
+        self.step_send_async(action=actions, sensors=sensors)
+
+    def step_wait(self) -> VecEnvStepReturn:
+        """
+        Wait for the step sent with `step_async`.
+
+        Returns:
+            obs (`Dict`):
+                A dict of observations for each sensor.
+            reward (`np.ndarray`):
+                The rewards of the sub-environments.
+            done (`np.ndarray`):
+                Whether the episode of each sub-environment is done.
+            info (`List[Dict]`):
+                A dict of additional information for each sub-environment.
+        """
+        return self.step_recv_async()
 
     def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
-        raise NotImplementedError()
+        """
+        Get an attribute of the sub-environments. The sub-environments are the maps of this environment, they share
+        its attributes.
+
+        Args:
+            attr_name (`str`):
+                The name of the attribute.
+            indices (`VecEnvIndices`, *optional*, defaults to `None`):
+                The indices of the sub-environments, all of them if None.
+
+        Returns:
+            values (`List[Any]`):
+                The value of the attribute for each sub-environment.
+        """
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
+        """
+        Set an attribute of the environment, shared by all its sub-environments.
+
+        The sub-environments can't have different values: setting the attribute of some of them only raises a
+        `NotImplementedError`.
+
+        Args:
+            attr_name (`str`):
+                The name of the attribute.
+            value (`Any`):
+                The new value.
+            indices (`VecEnvIndices`, *optional*, defaults to `None`):
+                The indices of the sub-environments, all of them if None.
+        """
+        if self._check_all_indices(indices, "set_attr"):
+            setattr(self, attr_name, value)
 
     def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> List[Any]:
-        raise NotImplementedError()
+        """
+        Call a method of the environment once, on behalf of all its sub-environments.
+
+        The method applies to all the maps at once, calling it for some of them only raises a `NotImplementedError`.
+        To reset some maps, use `reset(indices=...)`.
+
+        Args:
+            method_name (`str`):
+                The name of the method.
+            method_args:
+                The positional arguments of the method.
+            indices (`VecEnvIndices`, *optional*, defaults to `None`):
+                The indices of the sub-environments, all of them if None.
+            method_kwargs:
+                The keyword arguments of the method.
+
+        Returns:
+            results (`List[Any]`):
+                The result of the call, for each sub-environment.
+        """
+        if not self._check_all_indices(indices, "env_method"):
+            return []
+        return [getattr(self, method_name)(*method_args, **method_kwargs)] * len(list(self._get_indices(indices)))
+
+    def _check_all_indices(self, indices: VecEnvIndices, method_name: str) -> bool:
+        """
+        Check that a call applying to the whole environment is made for all its sub-environments, or for none.
+
+        Returns:
+            selected (`bool`):
+                Whether the sub-environments are selected, `False` if `indices` is empty.
+        """
+        indices = set(self._get_indices(indices))
+        if not indices:
+            return False
+        if indices != set(range(self.num_envs)):
+            raise NotImplementedError(
+                f"The maps of a ParallelRLEnv share the environment, `{method_name}` can't apply to the sub-environments "
+                f"{sorted(indices)} only, out of {self.num_envs}."
+            )
+        return True
+
+    # required abstract methods
 
     def seed(self, seed: Optional[int] = None):  # -> List[Union[None, int]]:
         # this should be done when the env is initialized
         return
         # raise NotImplementedError()
 
-    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
-        raise NotImplementedError()
-
-    def step_send(self) -> Any:
-        raise NotImplementedError()
-
-    def step_wait(self) -> VecEnvStepReturn:
-        raise NotImplementedError()
+    def step_send(self, actions: Union[Dict, List, np.ndarray], sensors: Optional[List[str]] = None) -> None:
+        """Alias of `step_async`."""
+        self.step_async(actions, sensors=sensors)
 
     def get_images(self) -> Sequence[np.ndarray]:
         raise NotImplementedError()
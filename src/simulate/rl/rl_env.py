@@ -17,7 +17,10 @@ from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
+from simulate.engine.protocol import cast_sensor_values
+from simulate.rl.action_layout import ActionLayout
 from simulate.scene import Scene
+from simulate.utils.stats import DEFAULT_WINDOW_SIZE, StepStats
 
 
 class RLEnv:
@@ -31,6 +34,18 @@ class RLEnv:
             The physics timestep of the environment.
         frame_skip (`int`, *optional*, defaults to `4`):
             The number of times an action is repeated in the backend simulation before the next observation is returned.
+        collect_stats (`bool`, *optional*, defaults to `False`):
+            Whether to record the timings of each phase of the steps and the size of the messages, see `stats`.
+        sensor_compression (`str` or `Dict[str, str]`, *optional*, defaults to `None`):
+            The compression of the camera sensors sent by the engine, either a mode applied to all of them or the
+            mode of each sensor tag: `"zlib"`, `"lz4"`, `"png"` or `"xor_delta"`. The engine's setting is kept if not
+            specified.
+        decode_threads (`int`, *optional*, defaults to `None`):
+            The number of threads decompressing the camera images of the actors in parallel. The engine's setting is
+            kept if not specified.
+        trust_actions (`bool`, *optional*, defaults to `False`):
+            Whether to skip checking the tags, sizes and values of the actions, which are then only converted to the
+            tensors sent to the engine, see `ActionLayout`.
     """
 
     metadata = {}
@@ -40,9 +55,18 @@ class RLEnv:
         scene: Scene,
         time_step: Optional[float] = 1 / 30.0,
         frame_skip: Optional[int] = 4,
+        collect_stats: bool = False,
+        sensor_compression: Optional[Union[str, Dict[str, str]]] = None,
+        decode_threads: Optional[int] = None,
+        trust_actions: bool = False,
     ):
 
         self.scene = scene
+        self._stats = StepStats(enabled=collect_stats)
+        if collect_stats:
+            self.scene.engine.enable_stats()
+        if sensor_compression is not None or decode_threads is not None:
+            self.scene.engine.configure_sensor_compression(sensor_compression, decode_threads=decode_threads)
 
         # copy the environment name for easy gym integration
         self.name = scene.name
@@ -63,6 +87,10 @@ class RLEnv:
         self.action_space = self.scene.actors[0].action_space
         self.observation_space = self.scene.actors[0].observation_space
         self.action_tags = self.scene.actors[0].action_tags
+        self.sensor_tags = self.scene.actors[0].sensor_tags
+        self._action_layout = ActionLayout(
+            self.action_tags, self.action_space, n_actors_per_map=self.n_actors, trusted=trust_actions
+        )
 
         # converge internal simulation settings
         self.scene.config.time_step = time_step
@@ -79,7 +107,9 @@ class RLEnv:
             n_show=1,
         )
 
-    def step(self, action: Union[Dict, List, np.ndarray]) -> Tuple[Dict, np.ndarray, np.ndarray, Dict]:
+    def step(
+        self, action: Union[Dict, List, np.ndarray], sensors: Optional[List[str]] = None
+    ) -> Tuple[Dict, np.ndarray, np.ndarray, Dict]:
         """
         The step function for the environment, follows the API from OpenAI Gym.
 
@@ -87,10 +117,13 @@ class RLEnv:
         Args:
             action (`Dict` or `List`):
                 The action to be taken by the environment.
+            sensors (`List[str]`, *optional*, defaults to `None`):
+                The tags of the sensors to observe at this step, all the sensors if None. The other sensors are
+                neither rendered nor sent by the engine, e.g. to observe an expensive camera every few steps only.
 
         Returns:
             observation (`Dict`):
-                A dictionary of observations from the environment.
+                A dictionary of observations from the environment, for the requested sensors.
             reward (`float`):
                 The reward for the action.
             done (`bool`):
@@ -98,64 +131,56 @@ class RLEnv:
             info (`Dict`):
                 A dictionary of additional information.
         """
-        self.step_send_async(action=action)
+        with self._stats.timer("step"):
+            self.step_send_async(action=action, sensors=sensors)
 
-        # receive and return event data from the engine
-        return self.step_recv_async()
+            # receive and return event data from the engine
+            return self.step_recv_async()
 
-    def step_send_async(self, action: Union[Dict, List, np.ndarray]):
+    def step_send_async(self, action: Union[Dict, List, np.ndarray], sensors: Optional[List[str]] = None):
         """
         Send action for execution asynchronously.
 
         Args:
             action (`Dict` or `List` or `ndarray`): The action to be executed in the environment.
+            sensors (`List[str]`, *optional*, defaults to `None`): The tags of the sensors to observe at this step.
+        """
+        with self._stats.timer("format_action"):
+            action = self._format_action(action)
+            sensor_kwargs = self._format_sensors(sensors)
+        self.scene.engine.step_send_async(action=action, **sensor_kwargs)
+
+    def _format_sensors(self, sensors: Optional[List[str]]) -> Dict:
+        """
+        Check the tags of the sensors requested for a step.
+
+        Args:
+            sensors (`List[str]`, *optional*): The tags of the sensors to observe, all the sensors if None.
+
+        Returns:
+            kwargs (`Dict`): The keyword arguments selecting the sensors in the engine.
+        """
+        if sensors is None:
+            return {}
+        if isinstance(sensors, str):
+            sensors = [sensors]
+        for tag in sensors:
+            if tag not in self.sensor_tags:
+                raise ValueError(f"Sensor tag {tag} not found in sensor tags: {self.sensor_tags}.")
+        return {"sensors": list(sensors)}
+
+    def _format_action(self, action: Union[Dict, List, np.ndarray]) -> Dict:
+        """
+        Format an action as a dictionary of (n_maps, n_actors, action_size) arrays, as expected by the engine, see
+        `ActionLayout`.
+
+        Args:
+            action (`Dict` or `List` or `ndarray`): The action to be executed in the environment.
+
+        Returns:
+            action (`Dict`): The formatted action, keyed by action tag.
         """
-        if not isinstance(action, dict):
-            if len(self.action_tags) != 1:
-                raise ValueError(
-                    f"Action must be a dict with keys {self.action_tags} when there are multiple action tags."
-                )
-            if type(action) == np.ndarray:
-                action = action.tolist()
-            if type(action) == np.int64:
-                action = int(action)
-            if type(action) == np.float:
-                action = float(action)
-            action = {self.action_tags[0]: action}
-
-        # Check that the keys are in the action tags
-        # Add maps/actor dimension to action if single map/actor
-        for key, value in action.items():
-            if key not in self.action_tags:
-                raise ValueError(f"Action tag {key} not found in action tags: {self.action_tags}.")
-
-            # if passing direct values to step(), make a list of lists for the user
-            if isinstance(value, (int, float)):
-                # A single value for the action – we add the map/actor/action-list dimensions
-                if self.n_actors == 1:
-                    action[key] = [[[value]]]
-                else:
-                    raise ValueError(
-                        f"All actions must be list (actors) of list/np.ndarray of floats/int (action). "
-                        f"if the number of actors is greater than 1 (in this case n_actors {self.n_actors})."
-                    )
-
-            # if passing in a list, verify it includes numeric data and wrap once
-            elif isinstance(value, (list, tuple)) and len(value) > 0 and isinstance(value[0], (int, float)):
-                # A list value for the action – we add the map/actor dimensions
-                if self.n_actors == 1:
-                    action[key] = [[value]]
-                else:
-                    raise ValueError(
-                        f"All actions must be list (actors) of list/np.ndarray of floats/int (action). "
-                        f"if the number of actors is greater than 1 (in this case n_actors {self.n_actors})."
-                    )
-            elif isinstance(value, np.ndarray) and len(value) > 0 and isinstance(value[0], (np.int64, np.float32)):
-                # actions are a number array
-                value = value.reshape((1, self.n_actors, -1))
-                action[key] = value.tolist()
-
-        self.scene.engine.step_send_async(action=action)
+        return self._action_layout.pack(action)
 
     def step_recv_async(self) -> Tuple[Dict, np.ndarray, np.ndarray, Dict]:
         """
@@ -172,9 +197,28 @@ class RLEnv:
                 A dictionary of additional information.
         """
         event = self.scene.engine.step_recv_async()
+        with self._stats.timer("process_event"):
+            return self._process_step_event(event)
 
+    def _process_step_event(self, event: Dict) -> Tuple[Dict, np.ndarray, np.ndarray, Dict]:
+        """
+        Extract the observation, reward and done from the event data of a step.
+
+        Args:
+            event (`Dict`): The event data received from the engine.
+
+        Returns:
+            observation (`Dict`):
+                A dictionary containing the observation from the environment.
+            reward (`float`):
+                The reward for the action.
+            done (`bool`):
+                Whether the episode has ended.
+            info (`Dict`):
+                A dictionary of additional information.
+        """
         # Extract observations, reward, and done from event data
-        obs = self._extract_sensor_obs(event["actor_sensor_buffers"])
+        obs = self._extract_sensor_obs(event.get("actor_sensor_buffers", {}))
         reward = self._convert_to_numpy(event["actor_reward_buffer"]).flatten()
         done = self._convert_to_numpy(event["actor_done_buffer"]).flatten()
 
@@ -202,6 +246,45 @@ class RLEnv:
                 obs[k] = obs[k].reshape(obs[k].shape[2:])
         return obs
 
+    def rollout(
+        self, actions: Union[Dict, np.ndarray], sensors: Optional[List[str]] = None
+    ) -> Tuple[Dict, np.ndarray, np.ndarray, Dict]:
+        """
+        Apply a sequence of actions back to back in a single round-trip with the engine.
+
+        Episodes ending during the rollout are reset by the engine, as in `step`.
+
+        Args:
+            actions (`Dict` or `ndarray`):
+                The actions to be executed, with a leading time dimension, e.g. an array of shape
+                (n_steps, n_actors, action_size) or a dict of such arrays keyed by action tag. A dict is required if
+                there are several action tags.
+            sensors (`List[str]`, *optional*, defaults to `None`):
+                The tags of the sensors to observe at each step, all the sensors if None.
+
+        Returns:
+            observation (`Dict`):
+                A dictionary of observations from the environment, stacked along a leading time dimension.
+            reward (`ndarray`):
+                The rewards of each step, of shape (n_steps, n_actors).
+            done (`ndarray`):
+                Whether the episode has ended at each step, of shape (n_steps, n_actors).
+            info (`Dict`):
+                A dictionary of additional information.
+        """
+        # The actions are checked as in `step`, see `ActionLayout.pack_sequence`
+        event = self.scene.rollout(self._action_layout.pack_sequence(actions), **self._format_sensors(sensors))
+        obs = self._extract_sensor_obs(event.get("actor_sensor_buffers", {}))
+        reward = self._convert_to_numpy(event["actor_reward_buffer"])
+        done = self._convert_to_numpy(event["actor_done_buffer"])
+        n_steps = len(reward)
+
+        # Buffers are (n_steps, n_maps, n_actors, ...), remove the map (and single actor) dimensions
+        actor_shape = (self.n_actors,) if self.n_actors > 1 else ()
+        for k, v in obs.items():
+            obs[k] = v.reshape((n_steps, *actor_shape, *v.shape[3:]))
+        return obs, reward.reshape((n_steps, -1)), done.reshape((n_steps, -1)), {}
+
     def reset(self) -> Dict:
         """
         Resets the actors and the scene of the environment.
@@ -209,33 +292,50 @@ class RLEnv:
         Returns:
             obs (`Dict`): the observation of the environment after reset.
         """
-        self.scene.reset()
+        # The engine returns the observations after the reset in the same round-trip
+        event = self.scene.reset(observe=True)
+        return self._process_reset_event(event)
+
+    def _process_reset_event(self, event: Dict) -> Dict:
+        """
+        Extract the observation from the event data of a reset.
+
+        Args:
+            event (`Dict`): The event data received from the engine.
 
-        # To extract observations, we do a "fake" step (no actual simulation with frame_skip=0)
-        event = self.scene.step(return_frames=True, frame_skip=0)
-        obs = self._extract_sensor_obs(event["actor_sensor_buffers"])
+        Returns:
+            obs (`Dict`): the observation of the environment after reset.
+        """
+        obs = self._extract_sensor_obs(event.get("actor_sensor_buffers", {}))
         obs = self._squeeze_actor_dimension(obs)
         return obs
 
     @staticmethod
-    def _convert_to_numpy(event_data: Dict) -> np.ndarray:
+    def _convert_to_numpy(event_data: Union[Dict, np.ndarray]) -> np.ndarray:
         """
         Convert the event data to numpy array.
 
         Args:
-            event_data (`Dict`): The event data to be converted.
+            event_data (`Dict` or `np.ndarray`): The event data to be converted.
 
         Returns:
             event_data (`ndarray`): The converted event data.
         """
+        if isinstance(event_data, np.ndarray):
+            # Buffers received through binary framing are already decoded
+            return event_data
         if event_data["type"] == "uint8":
             shape = event_data["shape"]
-            return np.array(event_data["uintBuffer"], dtype=np.uint8).reshape(shape)
+            array = np.array(event_data["uintBuffer"], dtype=np.uint8).reshape(shape)
         elif event_data["type"] == "float":
             shape = event_data["shape"]
-            return np.array(event_data["floatBuffer"], dtype=np.float32).reshape(shape)
+            array = np.array(event_data["floatBuffer"], dtype=np.float32).reshape(shape)
         else:
             raise TypeError
+        if "dtype" in event_data:
+            # The JSON buffers hold the raw values, the binary frames the values in the dtype of the sensor
+            array = cast_sensor_values(array, event_data["dtype"], event_data.get("quantizationRange"))
+        return array
 
     def _extract_sensor_obs(self, sim_event_data: Dict) -> Dict:
         """
@@ -252,6 +352,34 @@ class RLEnv:
             sensor_obs[sensor_tag] = self._convert_to_numpy(sensor_data)
         return sensor_obs
 
+    def enable_stats(self, enabled: bool = True, window_size: int = DEFAULT_WINDOW_SIZE):
+        """
+        Start or stop recording the timings of each phase of the steps, in the environment and in the engine.
+
+        Args:
+            enabled (`bool`, *optional*, defaults to `True`):
+                Whether to record them.
+            window_size (`int`, *optional*, defaults to `1000`):
+                The number of values kept per phase to compute the percentiles.
+        """
+        self._stats.enabled = enabled
+        if window_size != self._stats.window_size:
+            self._stats.window_size = window_size
+            self._stats.reset()
+        self.scene.engine.enable_stats(enabled, window_size=window_size)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the recorded timings (in seconds) and message sizes (in bytes) of the steps, by phase:
+        `format_action`, `encode`, `send`, `receive` (including the time spent by the engine), `decode`,
+        `process_event`, `step` (the whole step), `bytes_sent` and `bytes_received`.
+
+        Returns:
+            stats (`Dict[str, Dict[str, float]]`):
+                For each phase, the number of recorded values and the mean, p50, p95, p99 and max of the last ones.
+        """
+        return {**self.scene.engine.stats(), **self._stats.summary()}
+
     def close(self):
         """Close the scene."""
         self.scene.close()
@@ -0,0 +1,101 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Observation, reward and done arrays of a vector environment, allocated once and reused at every step."""
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from simulate.assets.sensors import spaces
+
+
+class StepBuffers:
+    """
+    The output arrays of all the sub-environments of a vector environment, allocated once from the observation space
+    and written in place at each step.
+
+    The data decoded from each engine is copied into the slice of its sub-environments, instead of building new
+    arrays and concatenating them at every step. The arrays returned by `outputs` are the buffers themselves, which
+    the next step overwrites, unless `copy` is set.
+
+    Args:
+        observation_space (`spaces.Dict`):
+            The observation space of a sub-environment, giving the shape and dtype of each sensor.
+        n_envs (`int`):
+            The number of sub-environments.
+        copy (`bool`, *optional*, defaults to `False`):
+            Whether `outputs` returns copies of the buffers, which the caller can keep across steps.
+    """
+
+    def __init__(self, observation_space: spaces.Dict, n_envs: int, copy: bool = False):
+        self.n_envs = n_envs
+        self.copy = copy
+        self.obs = {
+            tag: np.zeros((n_envs, *space.shape), dtype=space.dtype) for tag, space in observation_space.spaces.items()
+        }
+        self.reward = np.zeros(n_envs, dtype=np.float32)
+        self.done = np.zeros(n_envs, dtype=np.float32)
+
+    def write(
+        self,
+        start: int,
+        obs: Dict[str, np.ndarray],
+        reward: Optional[np.ndarray] = None,
+        done: Optional[np.ndarray] = None,
+    ):
+        """
+        Copy the step of some consecutive sub-environments into their slice of the buffers.
+
+        Args:
+            start (`int`):
+                The index of the first sub-environment.
+            obs (`Dict[str, np.ndarray]`):
+                The observations of the sub-environments by sensor tag, with the sub-environments first, in any shape
+                holding the same values (e.g. (n_show, n_actors_per_map, ...)).
+            reward (`np.ndarray`, *optional*, defaults to `None`):
+                The rewards of the sub-environments, in any shape. Left as is if `None`, e.g. after a reset.
+            done (`np.ndarray`, *optional*, defaults to `None`):
+                Whether the episodes of the sub-environments are done, in any shape. Left as is if `None`.
+        """
+        for tag, value in obs.items():
+            buffer = self.obs[tag]
+            value = np.reshape(value, (-1, *buffer.shape[1:]))
+            np.copyto(buffer[start : start + len(value)], value, casting="unsafe")
+        if reward is not None:
+            reward = np.reshape(reward, -1)
+            self.reward[start : start + len(reward)] = reward
+        if done is not None:
+            done = np.reshape(done, -1)
+            self.done[start : start + len(done)] = done
+
+    def outputs(self, tags: Iterable[str]) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+        """
+        Get the observations, rewards and dones of all the sub-environments.
+
+        Args:
+            tags (`Iterable[str]`):
+                The tags of the sensors observed at this step.
+
+        Returns:
+            obs (`Dict[str, np.ndarray]`):
+                The observations of all the sub-environments, by sensor tag.
+            reward (`np.ndarray`):
+                The rewards of all the sub-environments.
+            done (`np.ndarray`):
+                Whether the episode of each sub-environment is done.
+        """
+        if self.copy:
+            return {tag: self.obs[tag].copy() for tag in tags}, self.reward.copy(), self.done.copy()
+        return {tag: self.obs[tag] for tag in tags}, self.reward, self.done
@@ -0,0 +1,53 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Base class of the vector environments, from stable baselines 3 if it is installed."""
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+
+try:
+    from stable_baselines3.common.vec_env.base_vec_env import VecEnv, VecEnvIndices, VecEnvStepReturn
+except ImportError:
+    VecEnvIndices = Union[None, int, Iterable[int]]
+    VecEnvStepReturn = Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray, List[Dict]]
+
+    class VecEnv:
+        """
+        Minimal stand-in for the `VecEnv` of stable baselines 3 when it isn't installed, so that the vector
+        environments can still be used on their own.
+
+        Args:
+            num_envs (`int`):
+                The number of sub-environments.
+            observation_space (`spaces.Space`):
+                The observation space of a sub-environment.
+            action_space (`spaces.Space`):
+                The action space of a sub-environment.
+        """
+
+        def __init__(self, num_envs: int, observation_space: Any, action_space: Any):
+            self.num_envs = num_envs
+            self.observation_space = observation_space
+            self.action_space = action_space
+
+        def _get_indices(self, indices: VecEnvIndices) -> Iterable[int]:
+            """Convert the indices of sub-environments to an iterable of indices, all of them if `None`."""
+            if indices is None:
+                indices = range(self.num_envs)
+            elif isinstance(indices, int):
+                indices = [indices]
+            return indices
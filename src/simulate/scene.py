@@ -92,9 +92,9 @@ class Scene(Asset):
         if engine == "unity":
             self.engine = UnityEngine(self, **kwargs)
         elif engine == "godot":
-            self.engine = GodotEngine(self)
+            self.engine = GodotEngine(self, **kwargs)
         elif engine == "blender":
-            self.engine = BlenderEngine(self)
+            self.engine = BlenderEngine(self, **kwargs)
         elif engine == "pyvista":
             self.engine = PyVistaEngine(self, **kwargs)
         elif engine == "notebook":
@@ -256,6 +256,7 @@ class Scene(Asset):
         frame_skip: Optional[int] = None,
         return_nodes: Optional[bool] = None,
         return_frames: Optional[bool] = None,
+        sensors: Optional[List[str]] = None,
         **engine_kwargs: Any,
     ) -> Union[Dict, str]:
         """Step the Scene.
@@ -273,6 +274,9 @@ class Scene(Asset):
                 If True, the nodes of the scene are returned. If None, the return_nodes of the config is used.
             return_frames (`bool`, *optional*, defaults to `None`):
                 If True, the frames of the scene are returned. If None, the return_frames of the config is used.
+            sensors (`List[str]`, *optional*, defaults to `None`):
+                The tags of the sensors to observe at this step, all the sensors if None. The other sensors are
+                neither rendered nor sent by the engine.
 
         TODO: What does the step return?
         Returns:
@@ -292,11 +296,69 @@ class Scene(Asset):
             engine_kwargs.update({"return_nodes": return_nodes})
         if return_frames is not None:
             engine_kwargs.update({"return_frames": return_frames})
+        if sensors is not None:
+            engine_kwargs.update({"sensors": list(sensors)})
         return self.engine.step(action=action, **engine_kwargs)
 
-    def reset(self) -> Any:
-        """Reset the Scene"""
-        return self.engine.reset()
+    def rollout(
+        self,
+        actions: Dict[str, Any],
+        time_step: Optional[float] = None,
+        frame_skip: Optional[int] = None,
+        return_nodes: Optional[bool] = None,
+        return_frames: Optional[bool] = None,
+        sensors: Optional[List[str]] = None,
+        **engine_kwargs: Any,
+    ) -> Union[Dict, str]:
+        """Step the Scene several times in a single round-trip with the engine.
+
+        Args:
+            actions (`Dict[str, List[Any]]`):
+                The sequence of actions to apply to the actors in the scene, one step after the other.
+                Keys are actuator_id and values are actions to apply as tensors of shapes
+                (n_steps, n_maps, n_actors, action_space...)
+            time_step (`float`, *optional*, defaults to `None`):
+                The time step to apply to the scene. If None, the time_step of the config is used.
+            frame_skip (`int`, *optional*, defaults to `None`):
+                The number of frames to skip at each step. If None, the frame_skip of the config is used.
+            return_nodes (`bool`, *optional*, defaults to `None`):
+                If True, the nodes of the scene after the last step are returned. If None, the return_nodes of the
+                config is used.
+            return_frames (`bool`, *optional*, defaults to `None`):
+                If True, the frames of the scene after the last step are returned. If None, the return_frames of the
+                config is used.
+            sensors (`List[str]`, *optional*, defaults to `None`):
+                The tags of the sensors to observe at each step, all the sensors if None.
+
+        Returns:
+            event_data: Dict of simulation data from the scene, the buffers of the steps are stacked along a leading
+                time dimension.
+        """
+        if not self._is_shown:
+            raise ValueError("The scene should be shown before stepping it (call scene.show()).")
+        if not hasattr(self.engine, "rollout"):
+            raise NotImplementedError(f"Rollouts are not supported by the {self.engine} engine.")
+        if time_step is not None:
+            engine_kwargs.update({"time_step": time_step})
+        if frame_skip is not None:
+            engine_kwargs.update({"frame_skip": frame_skip})
+        if return_nodes is not None:
+            engine_kwargs.update({"return_nodes": return_nodes})
+        if return_frames is not None:
+            engine_kwargs.update({"return_frames": return_frames})
+        if sensors is not None:
+            engine_kwargs.update({"sensors": list(sensors)})
+        return self.engine.rollout(action=actions, **engine_kwargs)
+
+    def reset(self, **engine_kwargs: Any) -> Any:
+        """Reset the Scene
+
+        Args:
+            engine_kwargs:
+                Additional keyword arguments of the engine, e.g. `indices` and `observe` for the Unity engine, see
+                `UnityEngine.reset`.
+        """
+        return self.engine.reset(**engine_kwargs)
 
     def close(self):
         self.engine.close()
@@ -12,4 +12,5 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .imports import is_fastwfc_available, is_vhacd_available
+from .imports import is_fastwfc_available, is_lz4_available, is_pil_available, is_vhacd_available
+from .stats import StepStats
@@ -18,6 +18,8 @@ import importlib.util
 
 _vhacd_available = importlib.util.find_spec("simulate._vhacd") is not None
 _fastwfc_available = importlib.util.find_spec("simulate._fastwfc") is not None
+_lz4_available = importlib.util.find_spec("lz4") is not None
+_pil_available = importlib.util.find_spec("PIL") is not None
 
 
 def is_vhacd_available():
@@ -26,3 +28,11 @@ def is_vhacd_available():
 
 def is_fastwfc_available():
     return _fastwfc_available
+
+
+def is_lz4_available():
+    return _lz4_available
+
+
+def is_pil_available():
+    return _pil_available
@@ -0,0 +1,74 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Signal handlers closing the engines before interrupting the program."""
+import signal
+import threading
+from typing import Any, Callable, Dict
+
+
+CLOSE_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+class CloseOnSignal:
+    """
+    A handler of SIGINT and SIGTERM which closes some resources (e.g. the engines of a scene) and then calls the
+    handler installed before it, so that the program is still interrupted: Ctrl-C raises `KeyboardInterrupt` and
+    SIGTERM exits, unless another handler was installed.
+
+    Args:
+        close (`Callable[[], None]`):
+            The function closing the resources, called once per signal.
+    """
+
+    def __init__(self, close: Callable[[], None]):
+        self.close = close
+        self._previous_handlers: Dict[int, Any] = {}
+
+    def install(self) -> bool:
+        """
+        Install the handler of SIGINT and SIGTERM, only possible from the main thread.
+
+        Returns:
+            installed (`bool`):
+                Whether the handler was installed.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        for signum in CLOSE_SIGNALS:
+            self._previous_handlers[signum] = signal.signal(signum, self)
+        return True
+
+    def uninstall(self):
+        """Restore the previous handlers, unless another handler was installed in the meantime."""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for signum, previous in self._previous_handlers.items():
+            if signal.getsignal(signum) is self:
+                signal.signal(signum, previous)
+        self._previous_handlers = {}
+
+    def __call__(self, signum: int, frame: Any):
+        self.close()
+        previous = self._previous_handlers.get(signum, signal.SIG_DFL)
+        if callable(previous):
+            # e.g. `signal.default_int_handler`, which raises `KeyboardInterrupt`
+            previous(signum, frame)
+        elif previous == signal.SIG_IGN:
+            return
+        elif signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        else:
+            raise SystemExit(128 + signum)
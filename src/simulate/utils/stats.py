@@ -0,0 +1,188 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+""" Rolling histograms of per-step timings and payload sizes."""
+import contextlib
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+
+DEFAULT_WINDOW_SIZE = 1000
+PERCENTILES = (50, 95, 99)
+
+# Returned by `StepStats.timer` when disabled, so a disabled timer costs a single attribute check
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class RollingHistogram:
+    """
+    The last values recorded for a metric, kept in a fixed size ring buffer.
+
+    Args:
+        window_size (`int`, *optional*, defaults to `1000`):
+            The number of values kept to compute the percentiles.
+    """
+
+    def __init__(self, window_size: int = DEFAULT_WINDOW_SIZE):
+        self._values = np.zeros(window_size, dtype=np.float64)
+        self.count = 0
+
+    def add(self, value: float):
+        """Record a value, replacing the oldest one once the window is full."""
+        self._values[self.count % len(self._values)] = value
+        self.count += 1
+
+    @property
+    def values(self) -> np.ndarray:
+        """The values in the window, in no particular order."""
+        return self._values[: min(self.count, len(self._values))]
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Summarize the values in the window.
+
+        Returns:
+            summary (`Dict[str, float]`):
+                The total number of recorded values, and the mean, percentiles and max of the values in the window.
+        """
+        return summarize(self.values, self.count)
+
+
+class _Timer:
+    """Context manager recording the time spent in its block."""
+
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats: "StepStats", name: str):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+
+
+class StepStats:
+    """
+    Opt-in instrumentation of the phases of a step: rolling histograms of timings (in seconds) and payload sizes
+    (in bytes), keyed by phase name.
+
+    When disabled, recording is a no-op and `timer` returns a shared null context manager, so the instrumentation can
+    stay in the hot path.
+
+    Args:
+        enabled (`bool`, *optional*, defaults to `False`):
+            Whether to record the values.
+        window_size (`int`, *optional*, defaults to `1000`):
+            The number of values kept per phase to compute the percentiles.
+    """
+
+    def __init__(self, enabled: bool = False, window_size: int = DEFAULT_WINDOW_SIZE):
+        self.enabled = enabled
+        self.window_size = window_size
+        self.histograms: Dict[str, RollingHistogram] = {}
+
+    def record(self, name: str, value: float):
+        """
+        Record a value of a phase.
+
+        Args:
+            name (`str`):
+                The name of the phase, e.g. `"encode"` or `"bytes_sent"`.
+            value (`float`):
+                The value to record.
+        """
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingHistogram(self.window_size)
+        histogram.add(value)
+
+    def timer(self, name: str):
+        """
+        Context manager recording the time spent in its block, e.g. `with stats.timer("encode"): ...`.
+
+        Args:
+            name (`str`):
+                The name of the phase.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the recorded phases.
+
+        Returns:
+            summary (`Dict[str, Dict[str, float]]`):
+                For each phase, the number of recorded values and the mean, p50, p95, p99 and max of the window.
+        """
+        return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def reset(self):
+        """Forget the recorded values."""
+        self.histograms = {}
+
+    @staticmethod
+    def merge(stats: Iterable["StepStats"]) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the phases recorded by several instances together, e.g. by the environments of a vectorized
+        environment.
+
+        Args:
+            stats (`Iterable[StepStats]`):
+                The instances to merge.
+
+        Returns:
+            summary (`Dict[str, Dict[str, float]]`):
+                The summary of each phase over all the instances.
+        """
+        values, counts = {}, {}
+        for step_stats in stats:
+            for name, histogram in step_stats.histograms.items():
+                values.setdefault(name, []).append(histogram.values)
+                counts[name] = counts.get(name, 0) + histogram.count
+        return {name: summarize(np.concatenate(values[name]), counts[name]) for name in values}
+
+
+def summarize(values: np.ndarray, count: Optional[int] = None) -> Dict[str, float]:
+    """
+    Summarize values with their mean, percentiles and max.
+
+    Args:
+        values (`np.ndarray`):
+            The values to summarize.
+        count (`int`, *optional*, defaults to `None`):
+            The total number of recorded values, if more than the values kept. Defaults to the number of values.
+
+    Returns:
+        summary (`Dict[str, float]`):
+            The count, mean, p50, p95, p99 and max of the values.
+    """
+    summary = {"count": len(values) if count is None else count}
+    if len(values) == 0:
+        return summary
+    summary["mean"] = float(np.mean(values))
+    for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{percentile}"] = float(value)
+    summary["max"] = float(np.max(values))
+    return summary
@@ -38,6 +38,30 @@ class ObservationsTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             _ = sm.StateSensor(None, None, properties=["position", "distance", "position,x"])
 
+    def test_sensor_dtypes(self):
+        raycast_sensor = sm.RaycastSensor(n_horizontal_rays=4, dtype="float16")
+        self.assertEqual(raycast_sensor.observation_space.dtype, np.float16)
+
+        # Raycast observations are normalized distances, quantized over [0, 1] by default
+        raycast_sensor = sm.RaycastSensor(n_horizontal_rays=4, dtype="uint8")
+        self.assertEqual(raycast_sensor.quantization_range, [0.0, 1.0])
+        self.assertEqual(raycast_sensor.observation_space.dtype, np.uint8)
+
+        camera = sm.Camera(height=8, width=8, dtype="float32")
+        self.assertEqual(camera.observation_space.dtype, np.float32)
+        self.assertEqual(camera.observation_space.high.max(), 1.0)
+
+        with self.assertRaises(ValueError):
+            _ = sm.StateSensor(properties=["position"], dtype="uint8")
+        with self.assertRaises(ValueError):
+            _ = sm.StateSensor(properties=["position"], dtype="int64")
+        with self.assertRaises(ValueError):
+            _ = sm.RaycastSensor(dtype="uint8", quantization_range=[1.0, 0.0])
+
+    def test_dequantize(self):
+        observation = np.array([0, 51, 255], dtype=np.uint8)
+        np.testing.assert_allclose(sm.dequantize(observation, [-1.0, 4.0]), [-1.0, 0.0, 4.0], atol=1e-6)
+
     def test_obj_position(self):
         obj = sm.StateSensor()
         self.assertAlmostEqual(obj._position[0], 0)
@@ -0,0 +1,128 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import unittest
+import zlib
+
+import numpy as np
+
+import simulate as sm
+from simulate.engine.compression import FrameDecoder, SensorCompressor, compress_image, normalize_sensor_compression
+from simulate.engine.mock_engine import MockEngineServer
+from simulate.engine.protocol import decode_binary_frame, encode_binary_frame
+from simulate.engine.transport import TcpTransport
+from simulate.utils import is_lz4_available, is_pil_available
+
+
+def encode_cameras(compressor, camera):
+    compressed = compressor.compress("CameraSensor", camera)
+    return encode_binary_frame({"nodes": {}}, [(["actor_sensor_buffers", "CameraSensor"], compressed)])
+
+
+class CompressionTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def _check_round_trip(self, mode, n_threads=0):
+        compressor = SensorCompressor(mode)
+        decoder = FrameDecoder(n_threads=n_threads)
+        for _ in range(3):
+            camera = self.rng.integers(0, 256, size=(4, 2, 3, 6, 8), dtype=np.uint8)
+            event = decode_binary_frame(encode_cameras(compressor, camera), decoder=decoder)
+            np.testing.assert_array_equal(event["actor_sensor_buffers"]["CameraSensor"], camera)
+        decoder.close()
+
+    def test_zlib(self):
+        self._check_round_trip("zlib")
+
+    @unittest.skipUnless(is_lz4_available(), "requires lz4")
+    def test_lz4(self):
+        self._check_round_trip("lz4")
+
+    @unittest.skipUnless(is_pil_available(), "requires Pillow")
+    def test_png(self):
+        self._check_round_trip("png")
+
+    def test_xor_delta(self):
+        self._check_round_trip("xor_delta")
+
+    def test_thread_pool(self):
+        self._check_round_trip("xor_delta", n_threads=4)
+
+    def test_raw_deflate(self):
+        # The engines write raw DEFLATE streams, without the zlib header
+        image = np.arange(3 * 4 * 4, dtype=np.uint8).reshape(3, 4, 4)
+        self.assertEqual(zlib.decompress(compress_image("zlib", image), -15), image.tobytes())
+
+    def test_xor_delta_state(self):
+        compressor = SensorCompressor({"CameraSensor": "xor_delta"})
+        camera = self.rng.integers(0, 256, size=(2, 1, 3, 16, 16), dtype=np.uint8)
+        first = encode_cameras(compressor, camera)
+        # An unchanged image is sent as an all-zeros delta
+        second = encode_cameras(compressor, camera)
+        self.assertLess(len(second), len(first) // 4)
+
+        decoder = FrameDecoder()
+        decode_binary_frame(first, decoder=decoder)
+        observation = decode_binary_frame(second, decoder=decoder)["actor_sensor_buffers"]["CameraSensor"]
+        # The decoder keeps its own copy of the previous images
+        observation[:] = 0
+        np.testing.assert_array_equal(
+            decode_binary_frame(encode_cameras(compressor, camera), decoder=decoder)["actor_sensor_buffers"][
+                "CameraSensor"
+            ],
+            camera,
+        )
+
+        # After a reset, a delta against the previous images can't be decoded anymore
+        decoder.reset()
+        self.assertFalse(
+            np.array_equal(
+                decode_binary_frame(second, decoder=decoder)["actor_sensor_buffers"]["CameraSensor"], camera
+            )
+        )
+
+    def test_uncompressed_sensors(self):
+        compressor = SensorCompressor({"CameraSensor": "zlib"})
+        self.assertIsNone(compressor.compress("OtherCamera", np.zeros((1, 1, 3, 2, 2), dtype=np.uint8)))
+        self.assertIsNone(compressor.compress("CameraSensor", np.zeros((1, 1, 3), dtype=np.float32)))
+
+    def test_decoder_required(self):
+        frame = encode_cameras(SensorCompressor("zlib"), np.zeros((1, 1, 3, 2, 2), dtype=np.uint8))
+        with self.assertRaises(ValueError):
+            decode_binary_frame(frame)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            normalize_sensor_compression({"CameraSensor": "jpeg"})
+        self.assertEqual(normalize_sensor_compression("zlib"), {"*": "zlib"})
+
+
+class CompressedEnvTest(unittest.TestCase):
+    def test_rl_env(self):
+        port = TcpTransport.find_port_number(57101)
+        server = MockEngineServer(port=port, seed=0).start()
+        scene = sm.Scene(engine="unity", engine_exe=None, engine_port=port)
+        root = sm.Box(name="map_0")
+        root += sm.EgocentricCameraActor(name="actor", camera_width=32, camera_height=24)
+        scene += root
+        env = sm.RLEnv(scene, sensor_compression="xor_delta", decode_threads=2)
+
+        obs = env.reset()
+        self.assertEqual(obs["CameraSensor"].shape, (3, 24, 32))
+        for _ in range(3):
+            obs, reward, done, info = env.step(env.action_space.sample())
+            # The mock engine fills the camera images with the step count
+            np.testing.assert_array_equal(obs["CameraSensor"], server.n_steps % 256)
+        env.close()
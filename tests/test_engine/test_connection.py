@@ -0,0 +1,96 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import asyncio
+import socket
+import threading
+import time
+import unittest
+
+from simulate.engine.connection import AsyncConnection, Connection
+
+
+class ConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.server_socket, self.engine_socket = socket.socketpair()
+        self.connection = Connection(self.server_socket, initial_buffer_size=16)
+
+    def tearDown(self):
+        self.connection.close()
+        self.engine_socket.close()
+
+    def test_send(self):
+        self.connection.send(b"hello")
+        self.assertEqual(self.engine_socket.recv(9), b"\x05\x00\x00\x00hello")
+        self.assertEqual(self.connection.bytes_sent, 9)
+        self.assertEqual(self.connection.messages_sent, 1)
+
+    def test_send_parts(self):
+        self.connection.send([b"he", memoryview(b"llo")])
+        self.assertEqual(self.engine_socket.recv(9), b"\x05\x00\x00\x00hello")
+
+    def test_recv_partial_reads(self):
+        message = bytes(range(256)) * 4
+
+        def send_in_pieces():
+            data = b"\x00\x00\x00\x00" + len(message).to_bytes(4, "little") + message
+            # Split the length prefix and the message in small chunks
+            for i in range(0, len(data), 3):
+                self.engine_socket.sendall(data[i : i + 3])
+                time.sleep(0.001)
+
+        thread = threading.Thread(target=send_in_pieces)
+        thread.start()
+        received = self.connection.recv()
+        thread.join()
+
+        # Empty messages are skipped and the buffer grows to fit the message
+        self.assertIsInstance(received, memoryview)
+        self.assertEqual(bytes(received), message)
+        self.assertEqual(self.connection.bytes_received, 8 + len(message))
+        self.assertEqual(self.connection.messages_received, 1)
+
+    def test_recv_copy(self):
+        self.engine_socket.sendall(b"\x03\x00\x00\x00abc\x03\x00\x00\x00def")
+        first = self.connection.recv(copy=True)
+        second = self.connection.recv()
+        self.assertEqual(first, b"abc")
+        self.assertEqual(bytes(second), b"def")
+
+    def test_connection_closed(self):
+        self.engine_socket.sendall(b"\x05\x00")
+        self.engine_socket.close()
+        with self.assertRaises(ConnectionError):
+            self.connection.recv()
+
+
+class AsyncConnectionTest(unittest.TestCase):
+    def test_send_recv(self):
+        server_socket, engine_socket = socket.socketpair()
+
+        async def exchange():
+            connection = await AsyncConnection.from_socket(server_socket)
+            await connection.send([b"he", b"llo"])
+            engine_socket.sendall(b"\x00\x00\x00\x00\x03\x00\x00\x00abc")
+            response = await connection.recv()
+            await connection.close()
+            return connection, response
+
+        connection, response = asyncio.run(exchange())
+        self.assertEqual(engine_socket.recv(9), b"\x05\x00\x00\x00hello")
+        self.assertEqual(response, b"abc")
+        self.assertEqual(connection.bytes_sent, 9)
+        self.assertEqual(connection.bytes_received, 11)
+        self.assertEqual(connection.messages_received, 1)
+        engine_socket.close()
@@ -0,0 +1,121 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+import simulate as sm
+from simulate.engine.engine_pool import PooledEngine
+from simulate.engine.mock_engine import MockEngineServer
+from simulate.engine.transport import TcpTransport
+
+
+def make_scene(pool):
+    scene = sm.Scene(engine="unity", engine_pool=pool)
+    root = sm.Box(name="map_0")
+    root += sm.EgocentricCameraActor(name="actor", camera_width=8, camera_height=6)
+    scene += root
+    return scene
+
+
+class EnginePoolTest(unittest.TestCase):
+    def setUp(self):
+        port = TcpTransport.find_port_number(57301)
+        # The engines started separately connect to consecutive ports
+        self.servers = [MockEngineServer(port=port + index, seed=index).start() for index in range(2)]
+        self.pool = sm.EnginePool(n_engines=2, engine_exe=None, engine_port=port)
+
+    def tearDown(self):
+        self.pool.close()
+        for server in self.servers:
+            server.join(timeout=5)
+            self.assertFalse(server._runner.is_alive())
+
+    def test_reuse(self):
+        for _ in range(5):
+            scene = make_scene(self.pool)
+            scene.show()
+            event = scene.step()
+            self.assertEqual(event["actor_sensor_buffers"]["CameraSensor"].shape, (1, 1, 3, 6, 8))
+            scene.close()
+
+        # The engines unloaded the scenes and stayed connected
+        self.assertEqual(sum(server.n_scenes for server in self.servers), 5)
+        self.assertTrue(all(server._runner.is_alive() for server in self.servers))
+
+    def test_concurrent_scenes(self):
+        scenes = [make_scene(self.pool) for _ in range(2)]
+        for scene in scenes:
+            scene.show()
+        self.assertEqual([server.n_scenes for server in self.servers], [1, 1])
+
+        # All the engines are in use
+        with self.assertRaises(TimeoutError):
+            self.pool.acquire(timeout=0.1)
+        scenes[0].close()
+        # Closing twice doesn't release the engine twice
+        scenes[0].close()
+
+        scene = make_scene(self.pool)
+        scene.show()
+        self.assertEqual(self.servers[0].n_scenes, 2)
+        scene.close()
+        scenes[1].close()
+
+
+class EnginePoolConnectTest(unittest.TestCase):
+    def setUp(self):
+        self.port = TcpTransport.find_port_number(57351)
+        self.servers = [MockEngineServer(port=self.port)]
+
+    def tearDown(self):
+        for server in self.servers:
+            server.join(timeout=5)
+            self.assertFalse(server._runner.is_alive())
+
+    def test_connect_timeout(self):
+        # The second engine never connects
+        self.servers[0].start()
+        start = time.monotonic()
+        with self.assertRaises(ConnectionError):
+            sm.EnginePool(n_engines=2, engine_exe=None, engine_port=self.port, connect_timeout=0.2)
+        self.assertLess(time.monotonic() - start, 5.0)
+
+    def test_replace_failed_engine(self):
+        # The second engine connects after the first attempt timed out, to the slot launched in its place
+        self.servers[0].start()
+        self.servers.append(MockEngineServer(port=self.port + 1))
+        threading.Timer(0.3, self.servers[1].start).start()
+        with sm.EnginePool(n_engines=2, engine_exe=None, engine_port=self.port, connect_timeout=0.2) as pool:
+            scenes = [make_scene(pool) for _ in range(2)]
+            for scene in scenes:
+                scene.show()
+            self.assertEqual([server.n_scenes for server in self.servers], [1, 1])
+            for scene in scenes:
+                scene.close()
+
+    def test_exited_process(self):
+        self.servers = []
+        transport = TcpTransport(port=self.port)
+        transport.listen()
+        engine = PooledEngine(0, transport, proc=subprocess.Popen([sys.executable, "-c", "pass"]))
+        # The exited process is noticed without waiting for the timeout
+        start = time.monotonic()
+        with self.assertRaises(ConnectionError):
+            engine.connect(timeout=30.0)
+        self.assertLess(time.monotonic() - start, 5.0)
+        engine.close()
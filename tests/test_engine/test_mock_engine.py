@@ -0,0 +1,149 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import unittest
+
+import numpy as np
+
+import simulate as sm
+from simulate.engine.mock_engine import MockEngineServer, get_sensor_specs, read_glb_json
+from simulate.engine.transport import TcpTransport
+
+
+def create_map(index):
+    root = sm.Box(name=f"map_{index}", position=[0, 0, 10 * index])
+    actor = sm.EgocentricCameraActor(name=f"actor_{index}", camera_width=32, camera_height=24)
+    actor += sm.StateSensor(target_entity=root, properties=["position", "rotation"])
+    actor += sm.RaycastSensor(n_horizontal_rays=5, n_vertical_rays=2)
+    root += actor
+    return root
+
+
+class MockEngineTest(unittest.TestCase):
+    def _start_server(self, **kwargs):
+        port = TcpTransport.find_port_number(57001)
+        MockEngineServer(port=port, seed=0, **kwargs).start()
+        return port
+
+    def test_sensor_specs(self):
+        scene = sm.Scene()
+        scene += [create_map(0), create_map(1)]
+
+        specs, n_maps, n_actors = get_sensor_specs(
+            read_glb_json(scene.as_glb_bytes()), maps=["map_0", "map_1"], n_show=3
+        )
+        self.assertEqual(n_maps, 3)
+        self.assertEqual(n_actors, 1)
+        self.assertEqual(
+            sorted(specs),
+            [
+                ("CameraSensor", (3, 24, 32), "uint8"),
+                ("RaycastSensor", (10,), "float32"),
+                ("StateSensor", (6,), "float32"),
+            ],
+        )
+
+    def test_no_actors(self):
+        scene = sm.Scene()
+        scene += sm.Box()
+        self.assertEqual(get_sensor_specs(read_glb_json(scene.as_glb_bytes())), ([], 0, 0))
+
+    def _check_env(self, **server_kwargs):
+        port = self._start_server(episode_length=3, **server_kwargs)
+        scene = sm.Scene(engine="unity", engine_exe=None, engine_port=port)
+        scene += create_map(0)
+        env = sm.RLEnv(scene)
+
+        obs = env.reset()
+        self.assertEqual(obs["CameraSensor"].shape, (3, 24, 32))
+        self.assertEqual(obs["CameraSensor"].dtype, np.uint8)
+        self.assertEqual(obs["StateSensor"].shape, (6,))
+
+        dones = []
+        for _ in range(6):
+            obs, reward, done, info = env.step(env.action_space.sample())
+            self.assertEqual(obs["RaycastSensor"].shape, (10,))
+            self.assertEqual(reward.shape, (1,))
+            dones.append(done[0])
+        self.assertEqual(dones, [0, 0, 1, 0, 0, 1])
+
+        obs, reward, done, info = env.rollout(np.zeros(4, dtype=np.int64))
+        self.assertEqual(obs["StateSensor"].shape, (4, 6))
+        self.assertEqual(reward.shape, (4, 1))
+        env.close()
+
+    def test_rl_env(self):
+        self._check_env()
+
+    def test_rl_env_json(self):
+        self._check_env(protocol_features=[])
+
+    def _check_sensor_selection(self, **server_kwargs):
+        port = self._start_server(**server_kwargs)
+        scene = sm.Scene(engine="unity", engine_exe=None, engine_port=port)
+        scene += create_map(0)
+        env = sm.RLEnv(scene)
+
+        obs, reward, done, info = env.step(env.action_space.sample(), sensors=["RaycastSensor"])
+        self.assertEqual(list(obs), ["RaycastSensor"])
+        self.assertEqual(reward.shape, (1,))
+        obs, reward, done, info = env.step(env.action_space.sample())
+        self.assertEqual(sorted(obs), ["CameraSensor", "RaycastSensor", "StateSensor"])
+
+        obs, reward, done, info = env.rollout(np.zeros(3, dtype=np.int64), sensors=["StateSensor"])
+        self.assertEqual(list(obs), ["StateSensor"])
+        self.assertEqual(obs["StateSensor"].shape, (3, 6))
+
+        with self.assertRaises(ValueError):
+            env.step(env.action_space.sample(), sensors=["DepthSensor"])
+        env.close()
+
+    def test_sensor_selection(self):
+        self._check_sensor_selection()
+
+    def test_sensor_selection_json(self):
+        self._check_sensor_selection(protocol_features=[])
+
+    def _check_sensor_dtypes(self, **server_kwargs):
+        port = self._start_server(**server_kwargs)
+        scene = sm.Scene(engine="unity", engine_exe=None, engine_port=port)
+        root = sm.Box(name="map_0")
+        actor = sm.EgocentricCameraActor(name="actor", camera_width=32, camera_height=24, camera_dtype="float16")
+        actor += sm.StateSensor(target_entity=root, properties=["position"], dtype="uint8", quantization_range=[-5, 5])
+        actor += sm.RaycastSensor(n_horizontal_rays=5, n_vertical_rays=2, dtype="float16")
+        root += actor
+        scene += root
+        env = sm.RLEnv(scene)
+
+        obs, reward, done, info = env.step(env.action_space.sample())
+        for tag in ("CameraSensor", "StateSensor", "RaycastSensor"):
+            self.assertEqual(obs[tag].dtype, env.observation_space[tag].dtype)
+            self.assertEqual(obs[tag].shape, env.observation_space[tag].shape)
+        self.assertEqual(obs["RaycastSensor"].dtype, np.float16)
+        self.assertEqual(obs["StateSensor"].dtype, np.uint8)
+        env.close()
+
+    def test_sensor_dtypes(self):
+        self._check_sensor_dtypes()
+
+    def test_sensor_dtypes_json(self):
+        self._check_sensor_dtypes(protocol_features=[])
+
+    def test_parallel_rl_env(self):
+        port = self._start_server()
+        env = sm.ParallelRLEnv(create_map, n_maps=2, n_show=2, engine_exe=None, engine_port=port)
+        obs, reward, done, info = env.step(np.zeros(2, dtype=np.int64))
+        self.assertEqual(obs["CameraSensor"].shape, (2, 3, 24, 32))
+        self.assertEqual(reward.shape, (2,))
+        env.close()
@@ -0,0 +1,85 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import unittest
+
+import numpy as np
+
+import simulate as sm
+from simulate.engine.mock_engine import MockEngineServer
+from simulate.engine.node_deltas import STATE_SIZE, NodeDeltaEncoder
+from simulate.engine.transport import TcpTransport
+
+
+class NodeDeltasTest(unittest.TestCase):
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        names = [f"node_{i}" for i in range(100)]
+        states = rng.random((100, STATE_SIZE), dtype=np.float32)
+        encoder = NodeDeltaEncoder(epsilon=1e-3)
+        tracker = sm.NodeStateTracker()
+
+        # The first deltas hold the names and the state of all the nodes
+        deltas = encoder.encode(names, states)
+        self.assertEqual(deltas["names"], names)
+        self.assertEqual(len(tracker.update({"node_deltas": deltas})), 100)
+
+        for _ in range(3):
+            moved = rng.choice(100, size=5, replace=False)
+            states[moved, :3] += 0.1
+            # Changes below the epsilon aren't sent
+            states[:, 7:] += 1e-4
+            deltas = encoder.encode(names, states)
+            self.assertNotIn("names", deltas)
+            np.testing.assert_array_equal(tracker.update({"node_deltas": deltas}), np.sort(moved))
+            np.testing.assert_allclose(tracker.positions, states[:, :3])
+
+        self.assertEqual(tracker.index("node_3"), 3)
+        np.testing.assert_array_equal(tracker.state("node_3")["rotation"], tracker.states[3, 3:7])
+
+    def test_json_deltas(self):
+        # The JSON fallback sends the states flattened
+        tracker = sm.NodeStateTracker()
+        tracker.update({"node_deltas": {"names": ["a", "b"], "indices": [1], "states": list(range(STATE_SIZE))}})
+        np.testing.assert_array_equal(tracker.states[0], 0)
+        np.testing.assert_array_equal(tracker.states[1], np.arange(STATE_SIZE))
+
+    def test_missing_names(self):
+        with self.assertRaises(ValueError):
+            sm.NodeStateTracker().update({"node_deltas": {"indices": [], "states": []}})
+
+    def _check_scene(self, **server_kwargs):
+        port = TcpTransport.find_port_number(57201)
+        MockEngineServer(port=port, seed=0, **server_kwargs).start()
+        scene = sm.Scene(engine="unity", engine_exe=None, engine_port=port)
+        scene.config.node_deltas = True
+        scene += [sm.Box(name=f"static_{i}") for i in range(20)]
+        scene += sm.EgocentricCameraActor(name="actor")
+        scene.show()
+
+        tracker = sm.NodeStateTracker()
+        self.assertEqual(len(tracker.update(scene.step(return_frames=False))), len(tracker.names))
+        position = tracker.state("actor")["position"].copy()
+        for _ in range(3):
+            # Only the actor moves
+            changed = tracker.update(scene.step(return_frames=False))
+            np.testing.assert_array_equal(changed, [tracker.index("actor")])
+        self.assertFalse(np.array_equal(tracker.state("actor")["position"], position))
+        scene.close()
+
+    def test_scene(self):
+        self._check_scene()
+
+    def test_scene_json(self):
+        self._check_scene(protocol_features=[])
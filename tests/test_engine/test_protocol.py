@@ -0,0 +1,92 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import json
+import unittest
+
+import numpy as np
+
+from simulate.engine.protocol import (
+    as_action_tensor,
+    cast_sensor_values,
+    decode_binary_frame,
+    encode_binary_frame,
+    encode_binary_frame_parts,
+    is_binary_frame,
+    to_json_serializable,
+)
+
+
+class BinaryFrameTest(unittest.TestCase):
+    def test_round_trip(self):
+        camera = np.random.randint(0, 255, size=(2, 1, 3, 8, 8), dtype=np.uint8)
+        reward = np.random.rand(2, 1, 1).astype(np.float32)
+        frame = encode_binary_frame(
+            {"nodes": {}},
+            [(["actor_sensor_buffers", "CameraSensor"], camera), (["actor_reward_buffer"], reward)],
+        )
+        self.assertTrue(is_binary_frame(frame))
+        self.assertFalse(is_binary_frame(b'{"nodes": {}}'))
+
+        data = decode_binary_frame(bytearray(frame))
+        self.assertEqual(data["nodes"], {})
+        np.testing.assert_array_equal(data["actor_sensor_buffers"]["CameraSensor"], camera)
+        np.testing.assert_array_equal(data["actor_reward_buffer"], reward)
+        self.assertEqual(data["actor_reward_buffer"].dtype, np.float32)
+
+    def test_payloads_are_aligned(self):
+        frame = encode_binary_frame({}, [(["a"], np.zeros(3, dtype=np.uint8)), (["b"], np.ones(5, dtype=np.float32))])
+        data = decode_binary_frame(frame)
+        self.assertEqual(data["b"].ctypes.data % 8, data["a"].ctypes.data % 8)
+        np.testing.assert_array_equal(data["b"], np.ones(5, dtype=np.float32))
+
+    def test_frame_parts(self):
+        glb = np.frombuffer(b"glTF" + bytes(range(13)), dtype=np.uint8)
+        parts = encode_binary_frame_parts({"type": "Initialize"}, [(["glb"], glb)])
+        # Contiguous payloads are sent without copy
+        self.assertTrue(np.shares_memory(np.frombuffer(parts[1], dtype=np.uint8), glb))
+        frame = b"".join(parts)
+        self.assertEqual(len(frame) % 8, 0)
+        data = decode_binary_frame(frame)
+        self.assertEqual(data["type"], "Initialize")
+        self.assertEqual(data["glb"].tobytes(), glb.tobytes())
+
+    def test_unsupported_dtype(self):
+        with self.assertRaises(TypeError):
+            encode_binary_frame({}, [(["a"], np.zeros(3, dtype=np.complex64))])
+
+    def test_action_tensors(self):
+        self.assertEqual(as_action_tensor([[[1]]]).dtype, np.int32)
+        self.assertEqual(as_action_tensor(np.zeros((1, 2, 3), dtype=np.float64)).dtype, np.float32)
+        self.assertEqual(as_action_tensor(np.arange(4, dtype=np.int64)[::2]).flags["C_CONTIGUOUS"], True)
+
+        frame = encode_binary_frame({"type": "Step"}, [(["action", "actuator"], as_action_tensor([[[0.5, 1.0]]]))])
+        data = decode_binary_frame(frame)
+        self.assertEqual(data["type"], "Step")
+        np.testing.assert_array_equal(data["action"]["actuator"], np.array([[[0.5, 1.0]]], dtype=np.float32))
+
+    def test_json_fallback(self):
+        message = json.dumps(
+            {"action": {"actuator": np.ones((1, 1, 2))}, "n": np.int64(3)}, default=to_json_serializable
+        )
+        self.assertEqual(json.loads(message), {"action": {"actuator": [[[1.0, 1.0]]]}, "n": 3})
+
+    def test_cast_sensor_values(self):
+        values = np.array([-2.0, 0.0, 0.5, 1.0, 3.0], dtype=np.float32)
+        np.testing.assert_array_equal(cast_sensor_values(values, "uint8", [0.0, 1.0]), [0, 0, 128, 255, 255])
+        self.assertEqual(cast_sensor_values(values, "float16").dtype, np.float16)
+        self.assertIs(cast_sensor_values(values, "float32"), values)
+        # Camera pixels are normalized to [0, 1] when sent as floats
+        pixels = np.array([0, 255], dtype=np.uint8)
+        np.testing.assert_array_equal(cast_sensor_values(pixels, "float32"), [0.0, 1.0])
@@ -0,0 +1,63 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import os
+import unittest
+
+import numpy as np
+
+from simulate.engine.shared_memory import ObservationRing, get_shared_memory_path
+
+
+class ObservationRingTest(unittest.TestCase):
+    def test_read_slots(self):
+        path = get_shared_memory_path()
+        layout = {
+            "slots": 2,
+            "slot_size": 64,
+            "tensors": [
+                {
+                    "path": ["actor_sensor_buffers", "CameraSensor"],
+                    "dtype": "uint8",
+                    "shape": [1, 1, 2, 2, 3],
+                    "offset": 0,
+                },
+                {"path": ["actor_reward_buffer"], "dtype": "float32", "shape": [1, 1, 1], "offset": 16},
+            ],
+        }
+        # Write the file as the engine would
+        camera = np.arange(12, dtype=np.uint8).reshape(1, 1, 2, 2, 3)
+        content = bytearray(layout["slots"] * layout["slot_size"])
+        for slot in range(layout["slots"]):
+            start = slot * layout["slot_size"]
+            content[start : start + camera.nbytes] = (camera + slot).tobytes()
+            content[start + 16 : start + 20] = np.float32(slot + 0.5).tobytes()
+        with open(path, "wb") as f:
+            f.write(content)
+
+        ring = ObservationRing(path, layout)
+        for slot in range(layout["slots"]):
+            event = ring.read(slot, {"nodes": {}})
+            np.testing.assert_array_equal(event["actor_sensor_buffers"]["CameraSensor"], camera + slot)
+            np.testing.assert_array_equal(event["actor_reward_buffer"], [[[slot + 0.5]]])
+            self.assertEqual(event["actor_reward_buffer"].dtype, np.float32)
+
+        # The slots hold stale buffers for the sensors which weren't requested by the step
+        event = ring.read(0, {"nodes": {}, "shared_memory_sensors": []})
+        self.assertNotIn("actor_sensor_buffers", event)
+        self.assertNotIn("shared_memory_sensors", event)
+        del event
+
+        ring.close()
+        self.assertFalse(os.path.exists(path))
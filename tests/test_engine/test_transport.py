@@ -0,0 +1,93 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import os
+import socket
+import subprocess
+import sys
+import threading
+import unittest
+
+import simulate as sm
+from simulate.engine.transport import TcpTransport, UnixSocketTransport, create_transport
+
+
+class TransportTest(unittest.TestCase):
+    def _check_connection(self, transport, connect):
+        transport.listen()
+        thread = threading.Thread(target=connect)
+        thread.start()
+        client, _ = transport.accept()
+        thread.join()
+        self.assertEqual(client.recv(5), b"hello")
+        client.close()
+        transport.close()
+
+    def test_tcp(self):
+        transport = create_transport("tcp", port=56001, find_free_port=True)
+        self.assertIsInstance(transport, TcpTransport)
+        self.assertEqual(transport.engine_args(), ["port", str(transport.port)])
+
+        def connect():
+            with socket.create_connection(("127.0.0.1", transport.port)) as s:
+                s.sendall(b"hello")
+
+        self._check_connection(transport, connect)
+
+    def test_concurrent_free_ports(self):
+        # Engines started from several threads don't pick the same free port
+        transports = [TcpTransport(port=56101, find_free_port=True) for _ in range(8)]
+        threads = [threading.Thread(target=transport.listen) for transport in transports]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({transport.port for transport in transports}), len(transports))
+        for transport in transports:
+            transport.close()
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix domain sockets are not available")
+    def test_unix(self):
+        transport = create_transport("unix")
+        self.assertIsInstance(transport, UnixSocketTransport)
+        self.assertEqual(transport.engine_args(), ["socket_path", transport.path])
+
+        def connect():
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                s.connect(transport.path)
+                s.sendall(b"hello")
+
+        self._check_connection(transport, connect)
+        self.assertFalse(os.path.exists(transport.path))
+
+    def test_accept_timeout(self):
+        transport = create_transport("tcp", port=56201, find_free_port=True)
+        transport.listen()
+        with self.assertRaises(TimeoutError):
+            transport.accept(timeout=0.1)
+
+        # An engine which exits before connecting isn't waited for
+        proc = subprocess.Popen([sys.executable, "-c", "pass"])
+        with self.assertRaises(ConnectionError):
+            transport.accept(timeout=10.0, proc=proc)
+        transport.close()
+
+    def test_godot_unix_transport(self):
+        # The Godot client can't connect to Unix domain sockets
+        with self.assertRaises(ValueError):
+            sm.Scene(engine="godot", engine_transport="unix")
+
+    def test_unknown_transport(self):
+        with self.assertRaises(ValueError):
+            create_transport("udp")
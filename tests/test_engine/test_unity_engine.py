@@ -0,0 +1,196 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import io
+import os
+import signal
+import tarfile
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import simulate as sm
+from simulate.engine.mock_engine import MockEngineServer
+from simulate.engine.transport import TcpTransport
+from simulate.engine.unity_engine import UNITY_EXECUTABLE_PATH, extract_unity_build
+
+
+def write_build_archive(path, content):
+    with tarfile.open(path, "w:gz") as archive:
+        directory = tarfile.TarInfo("Build")
+        directory.type = tarfile.DIRTYPE
+        archive.addfile(directory)
+        info = tarfile.TarInfo(os.path.join("Build", UNITY_EXECUTABLE_PATH))
+        info.size = len(content)
+        archive.addfile(info, io.BytesIO(content))
+
+
+class ExtractUnityBuildTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "unity")
+        self.archive = os.path.join(self.temp_dir.name, "build.tar.gz")
+        write_build_archive(self.archive, b"v1")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_cached_extraction(self):
+        executable = extract_unity_build(self.archive, cache_dir=self.cache_dir)
+        self.assertTrue(executable.endswith(os.path.join("Build", UNITY_EXECUTABLE_PATH)))
+        with open(executable, "rb") as f:
+            self.assertEqual(f.read(), b"v1")
+
+        # The extracted build is reused as is
+        with open(executable, "wb") as f:
+            f.write(b"modified")
+        self.assertEqual(extract_unity_build(self.archive, cache_dir=self.cache_dir), executable)
+        with open(executable, "rb") as f:
+            self.assertEqual(f.read(), b"modified")
+
+        # A new build is extracted next to the previous one
+        write_build_archive(self.archive, b"version 2")
+        new_executable = extract_unity_build(self.archive, cache_dir=self.cache_dir)
+        self.assertNotEqual(new_executable, executable)
+        with open(new_executable, "rb") as f:
+            self.assertEqual(f.read(), b"version 2")
+
+    def test_concurrent_extraction(self):
+        with ThreadPoolExecutor(8) as executor:
+            executables = list(executor.map(lambda _: extract_unity_build(self.archive, self.cache_dir), range(8)))
+        self.assertEqual(len(set(executables)), 1)
+        # Only the extracted build and its lock are left, no temporary directory
+        directories = [name for name in os.listdir(self.cache_dir) if not name.endswith(".lock")]
+        self.assertEqual(len(directories), 1)
+
+
+class RestartTest(unittest.TestCase):
+    def setUp(self):
+        self.port = TcpTransport.find_port_number(57401)
+
+    def _show_scene(self, **server_kwargs):
+        server = MockEngineServer(port=self.port, **server_kwargs).start()
+        scene = sm.Scene(engine="unity", engine_exe=None, engine_port=self.port)
+        root = sm.Box(name="map_0")
+        root += sm.EgocentricCameraActor(name="actor", camera_width=8, camera_height=6)
+        scene += root
+        scene.show()
+        return scene, server
+
+    def _check_restart(self, scene):
+        # The new engine connects once the failed one is closed
+        server = MockEngineServer(port=self.port)
+        threading.Timer(0.1, server.start).start()
+        self.assertIsInstance(scene.engine.restart(), dict)
+        self.assertEqual(server.n_scenes, 1)
+        event = scene.step()
+        self.assertEqual(event["actor_sensor_buffers"]["CameraSensor"].shape, (1, 1, 3, 6, 8))
+        scene.close()
+        server.join(timeout=5)
+
+    def test_restart_after_crash(self):
+        scene, server = self._show_scene(fail_after_steps=2)
+        scene.step()
+        scene.step()
+        with self.assertRaises(ConnectionError):
+            scene.step()
+        self.assertTrue(scene.engine.is_alive())  # no process with the editor
+        self._check_restart(scene)
+
+    def test_no_restart_after_close(self):
+        scene, server = self._show_scene()
+        scene.close()
+        server.join(timeout=5)
+        with self.assertRaises(RuntimeError):
+            scene.engine.restart()
+
+    def test_restart_after_hang(self):
+        scene, server = self._show_scene(fail_after_steps=1, failure="hang")
+        scene.step()
+        scene.engine.step_send_async()
+        self.assertFalse(scene.engine.poll_response(0.2))
+        self._check_restart(scene)
+        # The hung engine was disconnected
+        server.join(timeout=5)
+        self.assertFalse(server._runner.is_alive())
+
+
+class ResetTest(unittest.TestCase):
+    def setUp(self):
+        self.port = TcpTransport.find_port_number(57501)
+
+    def _show_scene(self, n_maps=3, **server_kwargs):
+        self.server = MockEngineServer(port=self.port, **server_kwargs).start()
+        scene = sm.Scene(engine="unity", engine_exe=None, engine_port=self.port)
+        for i in range(n_maps):
+            root = sm.Box(name=f"map_{i}")
+            root += sm.EgocentricCameraActor(name=f"actor_{i}", camera_width=8, camera_height=6)
+            scene += root
+        scene.show(maps=[f"map_{i}" for i in range(n_maps)], n_show=n_maps)
+        return scene
+
+    def tearDown(self):
+        self.scene.close()
+        self.server.join(timeout=5)
+
+    def test_reset_observations(self):
+        self.scene = self._show_scene()
+        self.scene.step()
+        n_steps = self.server.n_steps
+
+        # The observations are returned by the reset itself
+        event = self.scene.reset(observe=True)
+        self.assertEqual(event["actor_sensor_buffers"]["CameraSensor"].shape, (3, 1, 3, 6, 8))
+        self.assertEqual(self.server.n_steps, n_steps)
+
+        event = self.scene.reset(indices=[1], observe=True)
+        self.assertEqual(event["actor_sensor_buffers"]["CameraSensor"].shape, (3, 1, 3, 6, 8))
+        self.assertEqual(self.server.n_steps, n_steps)
+
+    def test_reset_without_feature(self):
+        self.scene = self._show_scene(protocol_features=[])
+        n_steps = self.server.n_steps
+
+        # Older engines observe with a step which doesn't advance the simulation
+        event = self.scene.reset(observe=True)
+        self.assertIn("CameraSensor", event["actor_sensor_buffers"])
+        self.assertEqual(self.server.n_steps, n_steps + 1)
+
+        # The maps can't be reset separately
+        with self.assertRaises(NotImplementedError):
+            self.scene.reset(indices=[1])
+
+
+class SignalTest(unittest.TestCase):
+    def test_interrupt_step(self):
+        port = TcpTransport.find_port_number(57601)
+        server = MockEngineServer(port=port, latency=0.01).start()
+        previous_handler = signal.getsignal(signal.SIGINT)
+        scene = sm.Scene(engine="unity", engine_exe=None, engine_port=port)
+        scene += sm.Box(name="box")
+        scene.show()
+
+        # Ctrl-C closes the engine and still stops the loop
+        threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGINT)).start()
+        n_steps = 0
+        with self.assertRaises(KeyboardInterrupt):
+            while n_steps < 1000:
+                scene.step()
+                n_steps += 1
+        self.assertLess(n_steps, 1000)
+        self.assertTrue(scene.engine._closed)
+        self.assertIs(signal.getsignal(signal.SIGINT), previous_handler)
+        server.join(timeout=5)
+        self.assertFalse(server._runner.is_alive())
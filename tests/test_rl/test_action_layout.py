@@ -0,0 +1,117 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+import unittest
+
+import numpy as np
+
+from simulate.assets.sensors import spaces
+from simulate.rl.action_layout import ActionLayout
+
+
+ACTION_SPACE = spaces.Dict(
+    {
+        "move": spaces.Discrete(3),
+        "force": spaces.Box(low=-1.0, high=1.0, shape=(2,), dtype=np.float64),
+    }
+)
+
+
+class ActionLayoutTest(unittest.TestCase):
+    def test_layout(self):
+        layout = ActionLayout(["move", "force"], ACTION_SPACE, n_maps=2, n_actors_per_map=3)
+        self.assertEqual(layout.shapes, {"move": (2, 3, 1), "force": (2, 3, 2)})
+        self.assertEqual(layout.dtypes, {"move": np.int32, "force": np.float32})
+        self.assertEqual(layout.offsets, {"move": 0, "force": 1})
+        self.assertEqual(layout.size, 3)
+
+    def test_single_tag(self):
+        layout = ActionLayout(["move"], spaces.Discrete(3))
+        for action in (2, np.int64(2), [2], [[[2]]], np.array([2.0]), {"move": 2}):
+            packed = layout.pack(action)
+            np.testing.assert_array_equal(packed["move"], [[[2]]])
+            self.assertEqual(packed["move"].dtype, np.int32)
+
+    def test_pack(self):
+        layout = ActionLayout(["move", "force"], ACTION_SPACE, n_maps=2, n_actors_per_map=3)
+        move = np.arange(6) % 3
+        force = np.arange(12, dtype=np.float64).reshape(6, 2)
+        packed = layout.pack({"move": move.tolist(), "force": force})
+        np.testing.assert_array_equal(packed["move"], move.reshape(2, 3, 1))
+        np.testing.assert_array_equal(packed["force"], force.reshape(2, 3, 2))
+        self.assertEqual(packed["force"].dtype, np.float32)
+
+        # A flat action holds the action tags at their offsets
+        flat = layout.pack(np.concatenate([move[:, None], force], axis=1))
+        for tag in layout.tags:
+            np.testing.assert_array_equal(flat[tag], packed[tag])
+
+        # Actions of some action tags only
+        self.assertEqual(list(layout.pack({"force": force})), ["force"])
+
+    def test_validation(self):
+        layout = ActionLayout(["move", "force"], ACTION_SPACE, n_maps=2, n_actors_per_map=3)
+        with self.assertRaises(ValueError):
+            layout.pack({"jump": np.zeros(6)})
+        with self.assertRaises(ValueError):
+            layout.pack({"force": np.zeros(6)})
+        with self.assertRaises(ValueError):
+            layout.pack({"move": [0, 1, 2, 3, 0, 1]})
+        with self.assertRaises(ValueError):
+            layout.pack(np.zeros((6, 2)))
+
+        # Discrete actions aren't truncated to integers
+        with self.assertRaises(ValueError):
+            layout.pack({"move": [0.9, 1, 2, 0, 1, 2]})
+        with self.assertRaises(ValueError):
+            layout.pack({"move": np.full(6, np.nan)})
+        with self.assertRaises(ValueError):
+            layout.pack({"move": ["a"] * 6})
+        # Whole floats are fine, e.g. in a flat action holding discrete and continuous action tags
+        packed = layout.pack(np.ones((6, 3)))
+        np.testing.assert_array_equal(packed["move"].ravel(), np.ones(6))
+
+        # Trusted actions are only converted
+        layout.trusted = True
+        packed = layout.pack({"move": [0, 1, 2, 3, 0, 1]})
+        np.testing.assert_array_equal(packed["move"].ravel(), [0, 1, 2, 3, 0, 1])
+
+    def test_discrete_start(self):
+        space = spaces.Discrete(3)
+        space.start = -1  # as in recent gym versions
+        layout = ActionLayout(["move"], space, n_actors_per_map=3)
+        np.testing.assert_array_equal(layout.pack([-1, 0, 1])["move"].ravel(), [-1, 0, 1])
+        with self.assertRaises(ValueError):
+            layout.pack([0, 1, 2])
+
+    def test_pack_sequence(self):
+        layout = ActionLayout(["move", "force"], ACTION_SPACE, n_maps=2, n_actors_per_map=3)
+        actions = {"move": np.zeros((4, 6), dtype=np.int64), "force": np.zeros((4, 6, 2))}
+        packed = layout.pack_sequence(actions)
+        self.assertEqual(packed["move"].shape, (4, 2, 3, 1))
+        self.assertEqual(packed["force"].shape, (4, 2, 3, 2))
+        self.assertEqual(packed["force"].dtype, np.float32)
+        # The actions of the caller are left as is
+        self.assertEqual(actions["move"].shape, (4, 6))
+
+        # The actions of several tags can't be told apart without a dict
+        with self.assertRaises(ValueError):
+            layout.pack_sequence(np.zeros((4, 6, 3)))
+        with self.assertRaises(ValueError):
+            layout.pack_sequence({"move": np.full((4, 6), 0.5)})
+        with self.assertRaises(ValueError):
+            layout.pack_sequence({"move": np.zeros((4, 5), dtype=np.int64)})
+        with self.assertRaises(ValueError):
+            layout.pack_sequence({"move": 0})
@@ -0,0 +1,102 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+import asyncio
+import time
+import unittest
+
+import numpy as np
+
+import simulate as sm
+from simulate.engine.mock_engine import MockEngineServer
+from simulate.engine.transport import TcpTransport
+
+
+N_ENVS = 3
+LATENCY = 0.2
+
+
+def create_scene(port, **engine_kwargs):
+    scene = sm.Scene(engine="unity", engine_exe=None, engine_port=port, **engine_kwargs)
+    scene += sm.Box(name="map_0")
+    scene += sm.EgocentricCameraActor(name="actor_0", camera_width=8, camera_height=6)
+    return scene
+
+
+class AsyncRLEnvTest(unittest.TestCase):
+    def _start_servers(self, n_servers, **server_kwargs):
+        self.servers, ports = [], []
+        port = 58001
+        for _ in range(n_servers):
+            port = TcpTransport.find_port_number(port)
+            self.servers.append(MockEngineServer(port=port, **server_kwargs).start())
+            ports.append(port)
+            port += 1
+        return ports
+
+    def _join_servers(self):
+        for server in self.servers:
+            server.join(timeout=5)
+            self.assertFalse(server._runner.is_alive())
+
+    def test_gather(self):
+        envs = [sm.AsyncRLEnv(create_scene(port)) for port in self._start_servers(N_ENVS, latency=LATENCY)]
+
+        async def run():
+            await asyncio.gather(*(env.reset() for env in envs))
+            start = time.perf_counter()
+            results = await asyncio.gather(*(env.step(0) for env in envs))
+            elapsed = time.perf_counter() - start
+
+            # The environments wait for their engines concurrently
+            self.assertLess(elapsed, N_ENVS * LATENCY)
+            for obs, reward, done, info in results:
+                self.assertEqual(obs["CameraSensor"].shape, (3, 6, 8))
+                self.assertEqual(np.shape(reward), (1,))
+
+            await asyncio.gather(*(env.step_send_async(1) for env in envs))
+            results = await asyncio.gather(*(env.step_recv_async() for env in envs))
+            self.assertEqual(len(results), N_ENVS)
+            await asyncio.gather(*(env.close() for env in envs))
+
+        asyncio.run(run())
+        self._join_servers()
+        for server in self.servers:
+            self.assertEqual(server.n_steps, 2)
+
+    def test_timeout(self):
+        (port,) = self._start_servers(1, fail_after_steps=1, failure="hang")
+        env = sm.AsyncRLEnv(create_scene(port))
+        env.engine.timeout = 0.2
+
+        async def run():
+            await env.reset()
+            await env.step(0)
+            with self.assertRaises(asyncio.TimeoutError):
+                await env.step(0)
+            # The hanging engine still receives the close command
+            await env.close()
+
+        asyncio.run(run())
+        self._join_servers()
+
+    def test_pipelined_engine(self):
+        # The responses are matched to the commands by order only
+        (port,) = self._start_servers(1)
+        scene = create_scene(port, pipeline_depth=2)
+        with self.assertRaises(ValueError):
+            sm.AsyncRLEnv(scene)
+        scene.close()
+        self._join_servers()
@@ -0,0 +1,233 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+import os
+import signal
+import threading
+import time
+import unittest
+
+import numpy as np
+
+import simulate as sm
+from simulate.engine.mock_engine import MockEngineServer
+from simulate.engine.transport import TcpTransport
+from simulate.rl.multi_proc_rl_env import ENGINE_RESTARTED
+
+
+N_SHOW = 2
+
+
+def create_map(index):
+    root = sm.Box(name=f"map_{index}")
+    root += sm.EgocentricCameraActor(name=f"actor_{index}", camera_width=8, camera_height=6)
+    return root
+
+
+def create_map_with_state_sensor(index):
+    root = sm.Box(name=f"map_{index}")
+    actor = sm.EgocentricCameraActor(name=f"actor_{index}", camera_width=8, camera_height=6)
+    actor += sm.StateSensor(target_entity=actor, properties=["position"])
+    root += actor
+    return root
+
+
+def find_free_ports(starting_port, n):
+    """Find the first `n` consecutive free ports, the mock engines of an environment connect to one port each."""
+    port = TcpTransport.find_port_number(starting_port)
+    while any(TcpTransport.find_port_number(port + i) != port + i for i in range(n)):
+        port = TcpTransport.find_port_number(port + 1)
+    return port
+
+
+def serve_restarted_engine(engine, port):
+    """Serve the engine with a new mock engine once it listens again, after its failed engine was dropped."""
+    failed_transport = engine.transport
+
+    def serve():
+        while engine.transport is failed_transport or engine.transport.socket is None:
+            time.sleep(0.01)
+        MockEngineServer(port=port).serve()
+
+    threading.Thread(target=serve, daemon=True).start()
+
+
+class MultiProcessRLEnvTest(unittest.TestCase):
+    def _create_env(self, server_kwargs, map_fn=create_map, **env_kwargs):
+        """Create an environment with a mock engine per item of `server_kwargs`, showing `N_SHOW` maps each."""
+        starting_port = find_free_ports(57701, len(server_kwargs))
+        self.servers = [
+            MockEngineServer(port=starting_port + i, **kwargs).start() for i, kwargs in enumerate(server_kwargs)
+        ]
+
+        def env_fn(port):
+            return sm.ParallelRLEnv(map_fn, n_maps=N_SHOW, n_show=N_SHOW, engine_exe=None, engine_port=port)
+
+        self.starting_port = starting_port
+        return sm.MultiProcessRLEnv(env_fn, len(server_kwargs), starting_port=starting_port, **env_kwargs)
+
+    def _actions(self, env):
+        return np.zeros(env.num_envs, dtype=np.int64)
+
+    def test_interrupt_step(self):
+        previous_handler = signal.getsignal(signal.SIGINT)
+        env = self._create_env([{"latency": 0.01}, {"latency": 0.01}])
+        env.reset()
+
+        # Ctrl-C closes all the engines and still stops the training loop
+        threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGINT)).start()
+        n_steps = 0
+        with self.assertRaises(KeyboardInterrupt):
+            while n_steps < 1000:
+                env.step(self._actions(env))
+                n_steps += 1
+        self.assertLess(n_steps, 1000)
+        self.assertIs(signal.getsignal(signal.SIGINT), previous_handler)
+        for server in self.servers:
+            server.join(timeout=5)
+            self.assertFalse(server._runner.is_alive())
+
+    def _check_restart(self, failure, failed_index=1, reuse_buffers=False):
+        server_kwargs = [{}, {}]
+        server_kwargs[failed_index] = {"fail_after_steps": 2, "failure": failure}
+        env = self._create_env(
+            server_kwargs,
+            map_fn=create_map_with_state_sensor,
+            step_timeout=0.5,
+            heartbeat_interval=0.1,
+            reuse_buffers=reuse_buffers,
+        )
+        env.reset()
+        serve_restarted_engine(env.envs[failed_index].scene.engine, self.starting_port + failed_index)
+        for _ in range(2):
+            obs, reward, done, info = env.step(self._actions(env))
+            self.assertFalse(any(ENGINE_RESTARTED in item for item in info))
+
+        # The sub-environments of the failed engine are reset and done, the others carry on
+        obs, reward, done, info = env.step(self._actions(env), sensors=["StateSensor"])
+        self.assertEqual(env.n_restarts, 1)
+        # The restarted engine observed all its sensors, only the requested ones are returned
+        self.assertEqual(list(obs.keys()), ["StateSensor"])
+        self.assertEqual(obs["StateSensor"].shape, (2 * N_SHOW, 3))
+        restarted = np.arange(2 * N_SHOW) // N_SHOW == failed_index
+        np.testing.assert_array_equal(done[restarted], 1.0)
+        self.assertEqual([ENGINE_RESTARTED in item for item in info], restarted.tolist())
+
+        obs, reward, done, info = env.step(self._actions(env))
+        self.assertEqual(env.n_restarts, 1)
+        self.assertEqual(sorted(obs.keys()), ["CameraSensor", "StateSensor"])
+        self.assertEqual(obs["CameraSensor"].shape, (2 * N_SHOW, 3, 6, 8))
+        self.assertEqual(obs["StateSensor"].shape, (2 * N_SHOW, 3))
+        env.close()
+
+    def test_restart_after_crash(self):
+        self._check_restart("crash")
+
+    def test_restart_after_hang(self):
+        self._check_restart("hang")
+
+    def test_restart_reuse_buffers(self):
+        # The outputs don't take their sensors from the first engine, which is restarted
+        self._check_restart("crash", failed_index=0, reuse_buffers=True)
+
+    def test_step_after_close(self):
+        env = self._create_env([{}, {}])
+        env.reset()
+        env.close()
+        # The closed connections aren't mistaken for failed engines, which would be restarted
+        with self.assertRaises(RuntimeError):
+            env.step(self._actions(env))
+        self.assertEqual(env.n_restarts, 0)
+
+        env = self._create_env([{"latency": 0.1}, {}])
+        env.step_async(self._actions(env))
+        env.close()
+        with self.assertRaises(RuntimeError):
+            env.step_wait()
+        self.assertEqual(env.n_restarts, 0)
+
+    def test_step_async(self):
+        env = self._create_env([{"episode_length": 2}, {"episode_length": 2}])
+        env.reset()
+        env.step_async(self._actions(env))
+        obs, reward, done, info = env.step_wait()
+        self.assertEqual(obs["CameraSensor"].shape, (2 * N_SHOW, 3, 6, 8))
+        self.assertEqual(reward.shape, (2 * N_SHOW,))
+        self.assertEqual(len(info), 2 * N_SHOW)
+        np.testing.assert_array_equal(done, 0.0)
+
+        env.step_async(self._actions(env))
+        obs, reward, done, info = env.step_wait()
+        np.testing.assert_array_equal(done, 1.0)
+        env.close()
+
+    def _check_receive_order(self, reuse_buffers):
+        # The first engines answer last, and are received and decoded after the others
+        latencies = [0.1, 0.05, 0.0]
+        env = self._create_env(
+            [{"latency": latency} for latency in latencies], receive_threads=3, reuse_buffers=reuse_buffers
+        )
+        env.reset()
+        # The engines are at different steps, and fill their cameras with different values
+        for i, sub_env in enumerate(env.envs):
+            for _ in range(i):
+                sub_env.step(np.zeros(N_SHOW, dtype=np.int64))
+
+        for _ in range(2):
+            obs, reward, done, info = env.step(self._actions(env))
+            self.assertEqual(obs["CameraSensor"].shape, (3 * N_SHOW, 3, 6, 8))
+            self.assertEqual(reward.shape, (3 * N_SHOW,))
+            expected = [server.n_steps % 256 for server in self.servers]
+            self.assertEqual(len(set(expected)), 3)
+            for i, value in enumerate(expected):
+                np.testing.assert_array_equal(obs["CameraSensor"][i * N_SHOW : (i + 1) * N_SHOW], value)
+        env.close()
+
+    def test_receive_order(self):
+        self._check_receive_order(reuse_buffers=False)
+
+    def test_receive_order_reuse_buffers(self):
+        self._check_receive_order(reuse_buffers=True)
+
+    def test_attributes(self):
+        env = self._create_env([{}, {}])
+        self.assertEqual(env.get_attr("n_show"), [N_SHOW] * 2 * N_SHOW)
+
+        # Each environment is set for all its maps, or not at all
+        env.set_attr("custom", 1, indices=range(N_SHOW, 2 * N_SHOW))
+        self.assertEqual(env.get_attr("custom", indices=[N_SHOW, N_SHOW + 1]), [1, 1])
+        self.assertFalse(hasattr(env.envs[0], "custom"))
+        with self.assertRaises(NotImplementedError):
+            env.set_attr("custom", 2, indices=[0])
+        self.assertFalse(hasattr(env.envs[0], "custom"))
+        env.close()
+
+    def test_env_method(self):
+        env = self._create_env([{}, {}])
+        env.set_attr("custom", 0, indices=range(N_SHOW))
+        env.set_attr("custom", 1, indices=range(N_SHOW, 2 * N_SHOW))
+        # The results are in the order of the indices
+        results = env.env_method("get_attr", "custom", indices=[3, 2, 0, 1])
+        self.assertEqual(results, [[1] * N_SHOW] * 2 + [[0] * N_SHOW] * 2)
+        results = env.env_method("reset", indices=[2, 3])
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["CameraSensor"].shape, (N_SHOW, 3, 6, 8))
+
+        # The other maps of an environment aren't reset with it
+        with self.assertRaises(NotImplementedError):
+            env.env_method("reset", indices=[1])
+        obs = env.reset(indices=[1])
+        self.assertEqual(obs["CameraSensor"].shape, (1, 3, 6, 8))
+        env.close()
@@ -0,0 +1,80 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+import unittest
+
+import numpy as np
+
+import simulate as sm
+from simulate.engine.mock_engine import MockEngineServer
+from simulate.engine.transport import TcpTransport
+
+
+N_SHOW = 3
+
+
+def create_map(index):
+    root = sm.Box(name=f"map_{index}")
+    root += sm.EgocentricCameraActor(name=f"actor_{index}", camera_width=8, camera_height=6)
+    return root
+
+
+class ParallelRLEnvTest(unittest.TestCase):
+    def setUp(self):
+        port = TcpTransport.find_port_number(57801)
+        self.server = MockEngineServer(port=port, episode_length=2).start()
+        self.env = sm.ParallelRLEnv(create_map, n_maps=N_SHOW, n_show=N_SHOW, engine_exe=None, engine_port=port)
+
+    def tearDown(self):
+        self.env.close()
+        self.server.join(timeout=5)
+
+    def test_step_async(self):
+        self.env.reset()
+        self.env.step_async(np.zeros(N_SHOW, dtype=np.int64))
+        obs, reward, done, info = self.env.step_wait()
+        self.assertEqual(obs["CameraSensor"].shape, (N_SHOW, 3, 6, 8))
+        self.assertEqual(reward.shape, (N_SHOW,))
+        self.assertEqual(len(info), N_SHOW)
+        np.testing.assert_array_equal(done, 0.0)
+
+        self.env.step_async(np.zeros(N_SHOW, dtype=np.int64))
+        obs, reward, done, info = self.env.step_wait()
+        np.testing.assert_array_equal(done, 1.0)
+
+    def test_attributes(self):
+        self.assertEqual(self.env.get_attr("n_show"), [N_SHOW] * N_SHOW)
+        self.assertEqual(self.env.get_attr("n_show", indices=[2, 0]), [N_SHOW] * 2)
+
+        # The maps share the attributes of the environment
+        self.env.set_attr("custom", 1)
+        self.assertEqual(self.env.get_attr("custom", indices=1), [1])
+        with self.assertRaises(NotImplementedError):
+            self.env.set_attr("custom", 2, indices=[0])
+        self.assertEqual(self.env.custom, 1)
+        self.env.set_attr("custom", 3, indices=[])
+        self.assertEqual(self.env.custom, 1)
+
+    def test_env_method(self):
+        results = self.env.env_method("reset")
+        self.assertEqual(len(results), N_SHOW)
+        self.assertEqual(results[0]["CameraSensor"].shape, (N_SHOW, 3, 6, 8))
+
+        # Resetting some maps only goes through `reset(indices=...)`, not a reset of all the maps
+        with self.assertRaises(NotImplementedError):
+            self.env.env_method("reset", indices=[1])
+        self.assertEqual(self.env.env_method("reset", indices=[]), [])
+        obs = self.env.reset(indices=[1])
+        self.assertEqual(obs["CameraSensor"].shape, (1, 3, 6, 8))
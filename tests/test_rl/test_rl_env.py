@@ -0,0 +1,104 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+import unittest
+
+import numpy as np
+
+import simulate as sm
+from simulate.engine.mock_engine import MockEngineServer
+from simulate.engine.transport import TcpTransport
+
+
+N_STEPS = 5
+EPISODE_LENGTH = 2
+
+
+def create_map(index):
+    root = sm.Box(name=f"map_{index}")
+    root += sm.EgocentricCameraActor(name=f"actor_{index}", camera_width=8, camera_height=6)
+    return root
+
+
+class RolloutTest(unittest.TestCase):
+    def _start_server(self, starting_port, **kwargs):
+        port = TcpTransport.find_port_number(starting_port)
+        MockEngineServer(port=port, seed=0, episode_length=EPISODE_LENGTH, **kwargs).start()
+        return port
+
+    def _create_rl_env(self, starting_port, **server_kwargs):
+        scene = sm.Scene(
+            engine="unity", engine_exe=None, engine_port=self._start_server(starting_port, **server_kwargs)
+        )
+        scene += create_map(0)
+        return sm.RLEnv(scene)
+
+    def _check_rl_env(self, **server_kwargs):
+        # The same seeded engine, stepped one step after the other or with a rollout
+        step_env = self._create_rl_env(57901, **server_kwargs)
+        rollout_env = self._create_rl_env(57951, **server_kwargs)
+        step_env.reset()
+        rollout_env.reset()
+        actions = np.array([0, 1, 2, 1, 0])
+
+        rewards, dones = [], []
+        for action in actions:
+            obs, reward, done, info = step_env.step(action)
+            rewards.append(reward)
+            dones.append(done)
+        obs, reward, done, info = rollout_env.rollout(actions)
+        self.assertEqual(reward.shape, (N_STEPS, 1))
+        np.testing.assert_array_equal(reward, np.array(rewards).reshape(N_STEPS, 1))
+        np.testing.assert_array_equal(done.ravel(), [0, 1, 0, 1, 0])
+        np.testing.assert_array_equal(done, np.array(dones).reshape(N_STEPS, 1))
+        self.assertEqual(obs["CameraSensor"].shape, (N_STEPS, 3, 6, 8))
+
+        # Invalid actions are rejected before reaching the engine
+        with self.assertRaises(ValueError):
+            rollout_env.rollout(np.full(N_STEPS, 0.5))
+        with self.assertRaises(ValueError):
+            rollout_env.rollout(np.full(N_STEPS, 3))
+        step_env.close()
+        rollout_env.close()
+
+    def test_rl_env(self):
+        self._check_rl_env()
+
+    def test_rl_env_json(self):
+        self._check_rl_env(protocol_features=[])
+
+    def test_scene(self):
+        scene = sm.Scene(engine="unity", engine_exe=None, engine_port=self._start_server(57901))
+        scene += create_map(0)
+        scene.show(maps=["map_0"], n_show=1)
+        actions = {scene.actors[0].action_tags[0]: np.zeros((N_STEPS, 1, 1, 1), dtype=np.int32)}
+        event = scene.rollout(actions)
+        np.testing.assert_array_equal(event["actor_done_buffer"].ravel(), [0, 1, 0, 1, 0])
+        self.assertEqual(event["actor_reward_buffer"].shape, (N_STEPS, 1, 1, 1))
+        self.assertEqual(event["actor_sensor_buffers"]["CameraSensor"].shape, (N_STEPS, 1, 1, 3, 6, 8))
+        scene.close()
+
+    def test_parallel_rl_env(self):
+        port = self._start_server(57901)
+        env = sm.ParallelRLEnv(create_map, n_maps=2, n_show=2, engine_exe=None, engine_port=port)
+        env.reset()
+        actions = {env.action_tags[0]: np.zeros((N_STEPS, 2), dtype=np.int64)}
+        obs, reward, done, info = env.rollout(actions)
+        self.assertEqual(reward.shape, (N_STEPS, 2))
+        np.testing.assert_array_equal(done, [[0, 0], [1, 1], [0, 0], [1, 1], [0, 0]])
+        self.assertEqual(obs["CameraSensor"].shape, (N_STEPS, 2, 3, 6, 8))
+        # The actions of the caller are left as is
+        self.assertEqual(actions[env.action_tags[0]].shape, (N_STEPS, 2))
+        env.close()
@@ -0,0 +1,68 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+import unittest
+
+import numpy as np
+
+from simulate.assets.sensors import spaces
+from simulate.rl.step_buffers import StepBuffers
+
+
+OBSERVATION_SPACE = spaces.Dict(
+    {
+        "CameraSensor": spaces.Box(low=0, high=255, shape=(3, 2, 4), dtype=np.uint8),
+        "StateSensor": spaces.Box(low=-np.inf, high=np.inf, shape=(5,), dtype=np.float32),
+    }
+)
+
+
+class StepBuffersTest(unittest.TestCase):
+    def test_write_slices(self):
+        buffers = StepBuffers(OBSERVATION_SPACE, n_envs=4)
+        camera, state, reward = buffers.obs["CameraSensor"], buffers.obs["StateSensor"], buffers.reward
+        for engine in range(2):
+            # Each engine returns (n_show, n_actors_per_map, ...) arrays for 2 sub-environments
+            obs = {
+                "CameraSensor": np.full((2, 1, 3, 2, 4), engine + 1, dtype=np.uint8),
+                "StateSensor": np.full((2, 1, 5), engine + 1, dtype=np.float64),
+            }
+            buffers.write(2 * engine, obs, reward=np.full((2, 1), engine + 1), done=np.array([[0.0], [1.0]]))
+
+        obs, reward, done = buffers.outputs(["CameraSensor", "StateSensor"])
+        np.testing.assert_array_equal(obs["CameraSensor"][:, 0, 0, 0], [1, 1, 2, 2])
+        np.testing.assert_array_equal(obs["StateSensor"][:, 0], [1, 1, 2, 2])
+        self.assertEqual(obs["StateSensor"].dtype, np.float32)
+        np.testing.assert_array_equal(reward, [1, 1, 2, 2])
+        np.testing.assert_array_equal(done, [0, 1, 0, 1])
+        # The outputs are the buffers allocated once
+        self.assertIs(obs["CameraSensor"], camera)
+        self.assertIs(obs["StateSensor"], state)
+        self.assertIs(reward, buffers.reward)
+
+        # A reset only writes the observations
+        buffers.write(0, {"StateSensor": np.zeros((2, 5))})
+        np.testing.assert_array_equal(state[:, 0], [0, 0, 2, 2])
+        np.testing.assert_array_equal(reward, [1, 1, 2, 2])
+
+    def test_copy(self):
+        buffers = StepBuffers(OBSERVATION_SPACE, n_envs=2, copy=True)
+        buffers.write(0, {"StateSensor": np.ones((2, 5))}, reward=np.ones(2), done=np.zeros(2))
+        obs, reward, done = buffers.outputs(["StateSensor"])
+        self.assertEqual(list(obs.keys()), ["StateSensor"])
+        buffers.write(0, {"StateSensor": np.zeros((2, 5))}, reward=np.zeros(2), done=np.ones(2))
+        np.testing.assert_array_equal(obs["StateSensor"], np.ones((2, 5)))
+        np.testing.assert_array_equal(reward, [1, 1])
+        np.testing.assert_array_equal(done, [0, 0])
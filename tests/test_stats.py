@@ -0,0 +1,61 @@
+# Copyright 2022 The HuggingFace Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# Lint as: python3
+import unittest
+
+from simulate.utils.stats import RollingHistogram, StepStats
+
+
+class StepStatsTest(unittest.TestCase):
+    def test_disabled(self):
+        stats = StepStats()
+        stats.record("send", 1.0)
+        with stats.timer("encode"):
+            pass
+        self.assertEqual(stats.summary(), {})
+
+    def test_summary(self):
+        stats = StepStats(enabled=True)
+        for value in range(1, 101):
+            stats.record("bytes_sent", value)
+        with stats.timer("encode"):
+            pass
+
+        summary = stats.summary()
+        self.assertEqual(summary["bytes_sent"]["count"], 100)
+        self.assertAlmostEqual(summary["bytes_sent"]["mean"], 50.5)
+        self.assertAlmostEqual(summary["bytes_sent"]["p50"], 50.5)
+        self.assertAlmostEqual(summary["bytes_sent"]["p99"], 99.01)
+        self.assertEqual(summary["bytes_sent"]["max"], 100)
+        self.assertEqual(summary["encode"]["count"], 1)
+        self.assertGreaterEqual(summary["encode"]["mean"], 0)
+
+    def test_rolling_window(self):
+        histogram = RollingHistogram(window_size=10)
+        for value in range(25):
+            histogram.add(value)
+        self.assertEqual(histogram.count, 25)
+        self.assertEqual(sorted(histogram.values), list(range(15, 25)))
+        self.assertEqual(histogram.summary()["max"], 24)
+
+    def test_merge(self):
+        first, second = StepStats(enabled=True), StepStats(enabled=True)
+        first.record("step", 1.0)
+        second.record("step", 3.0)
+        second.record("send", 2.0)
+
+        merged = StepStats.merge([first, second])
+        self.assertEqual(merged["step"]["count"], 2)
+        self.assertAlmostEqual(merged["step"]["mean"], 2.0)
+        self.assertEqual(merged["send"]["count"], 1)